@@ -6,16 +6,21 @@
 # MAGIC processing one day at a time and tracking progress in a Delta table.
 # MAGIC
 # MAGIC **Features:**
-# MAGIC - Incremental processing (one date at a time per folder)
-# MAGIC - **Parallel processing** support (process multiple folders concurrently)
-# MAGIC - Progress tracking via Delta table
+# MAGIC - Incremental processing (one date at a time, or a batch of dates per run)
+# MAGIC - Single-pass source inventory (each folder is listed once per run)
+# MAGIC - Persistent listing cache (only changed folders and new date folders are re-listed)
+# MAGIC - **Parallel processing** support (file-level copies on one bounded work queue)
+# MAGIC - Progress tracking via Delta table, with per-folder copy telemetry (latency percentiles, MB/s)
 # MAGIC - Handles multiple file patterns:
 # MAGIC   - Direct files: `table/YYYY-MM-DD_file.ext`
 # MAGIC   - Date folders: `table/YYYY-MM-DD/files`
 # MAGIC   - Simple dated: `YYYY-MM-DD.ext`
 # MAGIC - Handles sparse dates (e.g., product_csv weekly snapshots)
 # MAGIC - Restart capability to begin from scratch
+# MAGIC - Optional small-file compaction (CSV/Parquet) with per-record source lineage
+# MAGIC - Optional archive mode: stream members of `export.zip` straight into the target volume
 # MAGIC - Supports cross-catalog and cross-schema transfers
+# MAGIC - Storage and tracking behind interfaces (`volume_transfer.py`), benchmarked locally
 # MAGIC
 # MAGIC **Prerequisites:**
 # MAGIC - Source volume must exist with export files
@@ -35,49 +40,86 @@
 
 # DBTITLE 1,Create Widgets
 dbutils.widgets.text("source_volume_path", "/Volumes/acme_supermarkets/edw_raw/arrival", "Source Volume Path")
+dbutils.widgets.text("source_archive_path", "", "Optional: Stream from Zip Archive (e.g. .../export.zip)")
 dbutils.widgets.text("target_volume_path", "/Volumes/acme_supermarkets/edw_raw/landing", "Target Volume Path")
 dbutils.widgets.text("tracking_catalog", "acme_supermarkets", "Tracking Table Catalog")
 dbutils.widgets.text("tracking_schema", "_meta", "Tracking Table Schema")
 dbutils.widgets.dropdown("restart", "false", ["false", "true"], "Restart from Beginning")
 dbutils.widgets.text("date_limit", "", "Optional: Process only this specific date (YYYY-MM-DD)")
+dbutils.widgets.text("max_dates", "1", "Max Simulation Dates per Run")
+dbutils.widgets.text("end_date", "", "Optional: Process pending dates up to this date (YYYY-MM-DD)")
 dbutils.widgets.dropdown("max_workers", "4", ["1", "2", "4", "8", "16"], "Max Parallel Workers (1=sequential)")
+dbutils.widgets.text("max_file_attempts", "3", "Failed Attempts per File Before Giving Up")
+dbutils.widgets.dropdown("use_listing_cache", "true", ["true", "false"], "Reuse Cached Source Listings")
+dbutils.widgets.dropdown("skip_identical", "true", ["true", "false"], "Skip Files Already Identical in Target")
+dbutils.widgets.dropdown("verify_checksum", "false", ["false", "true"], "Compare Content Checksums (slower)")
+dbutils.widgets.dropdown("compact_small_files", "false", ["false", "true"], "Compact Small CSV/Parquet Files")
+dbutils.widgets.text("compaction_target_mb", "128", "Compaction: Target File Size (MB)")
+dbutils.widgets.text("compaction_folders", "", "Compaction: Folders (comma-separated, empty = all)")
+dbutils.widgets.dropdown("cleanup_dry_run", "false", ["false", "true"], "Restart: Only Report What Would Be Deleted")
+dbutils.widgets.dropdown("cleanup_workers", "16", ["4", "8", "16", "32", "64"], "Restart: Parallel Delete Workers")
 
 # COMMAND ----------
 
 # DBTITLE 1,Get Parameters
 source_volume_path = dbutils.widgets.get("source_volume_path")
+source_archive_path = dbutils.widgets.get("source_archive_path").strip()
 target_volume_path = dbutils.widgets.get("target_volume_path")
 tracking_catalog = dbutils.widgets.get("tracking_catalog")
 tracking_schema = dbutils.widgets.get("tracking_schema")
 restart = dbutils.widgets.get("restart").lower() == "true"
 date_limit = dbutils.widgets.get("date_limit").strip()
+max_dates = max(1, int(dbutils.widgets.get("max_dates").strip() or "1"))
+end_date = dbutils.widgets.get("end_date").strip()
 max_workers = int(dbutils.widgets.get("max_workers"))
+max_file_attempts = max(1, int(dbutils.widgets.get("max_file_attempts").strip() or "3"))
+use_listing_cache = dbutils.widgets.get("use_listing_cache").lower() == "true"
+skip_identical = dbutils.widgets.get("skip_identical").lower() == "true"
+verify_checksum = dbutils.widgets.get("verify_checksum").lower() == "true"
+compact_small_files = dbutils.widgets.get("compact_small_files").lower() == "true"
+compaction_target_mb = int(dbutils.widgets.get("compaction_target_mb").strip() or "128")
+compaction_folders = tuple(f.strip() for f in dbutils.widgets.get("compaction_folders").split(",") if f.strip())
+cleanup_dry_run = dbutils.widgets.get("cleanup_dry_run").lower() == "true"
+cleanup_workers = int(dbutils.widgets.get("cleanup_workers"))
 
 print(f"Configuration:")
-print(f"  Source Volume: {source_volume_path}")
+print(f"  Source Volume: {source_volume_path if not source_archive_path else '(archive)'}")
+print(f"  Source Archive: {source_archive_path if source_archive_path else 'None (transfer from source volume)'}")
 print(f"  Target Volume: {target_volume_path}")
 print(f"  Tracking Catalog: {tracking_catalog}")
 print(f"  Tracking Schema: {tracking_schema}")
-print(f"  Restart: {restart}")
+print(f"  Restart: {restart} {'(cleanup dry run)' if restart and cleanup_dry_run else ''}")
 print(f"  Date Limit: {date_limit if date_limit else 'None (process next available)'}")
+print(f"  Max Dates: {max_dates}")
+print(f"  End Date: {end_date if end_date else 'None'}")
 print(f"  Max Workers: {max_workers} {'(sequential)' if max_workers == 1 else '(parallel)'}")
+print(f"  Max File Attempts: {max_file_attempts}")
+print(f"  Use Listing Cache: {use_listing_cache}")
+print(f"  Skip Identical: {skip_identical} {'(with checksum)' if skip_identical and verify_checksum else ''}")
+print(f"  Compact Small Files: {compact_small_files}")
+if compact_small_files:
+    print(f"  Compaction: target {compaction_target_mb} MB, folders: {', '.join(compaction_folders) or 'all'}")
 
 # COMMAND ----------
 
 # MAGIC %md
 # MAGIC ## 2. Import Libraries and Setup
+# MAGIC
+# MAGIC The transfer logic lives in `volume_transfer.py` next to this notebook. Storage access goes
+# MAGIC through `DbutilsStorage` (dbutils.fs) and progress is kept in Delta tables by `DeltaTrackingStore`;
+# MAGIC `scripts/benchmark_file_transfer.py` runs the same code against the local filesystem.
 
 # COMMAND ----------
 
+import os
+import sys
+from datetime import datetime
+
 from pyspark.sql import SparkSession
-from pyspark.sql.functions import col, lit, current_timestamp, max as sql_max
-from pyspark.sql.types import StructType, StructField, StringType, DateType, LongType, TimestampType, IntegerType
-from datetime import datetime, date
-import re
-from typing import List, Dict, Optional, Tuple
-from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+
+# Make volume_transfer.py (next to this notebook) importable
+sys.path.append(os.getcwd())
+from volume_transfer import ArchiveStorage, DbutilsStorage, DeltaTrackingStore, TransferConfig, VolumeTransfer
 
 # Initialize Spark
 spark = SparkSession.builder.getOrCreate()
@@ -89,638 +131,66 @@ spark = SparkSession.builder.getOrCreate()
 
 # COMMAND ----------
 
-# DBTITLE 1,Define Tracking Table Schema
-tracking_table = f"{tracking_catalog}.{tracking_schema}.file_transfer_tracker"
-
-table_schema = StructType([
-    StructField("simulation_date", DateType(), False),
-    StructField("total_folders_found", IntegerType(), False),
-    StructField("folders_with_files", IntegerType(), False),
-    StructField("folders_skipped", IntegerType(), False),
-    StructField("total_files_transferred", IntegerType(), False),
-    StructField("total_bytes_transferred", LongType(), False),
-    StructField("last_updated", TimestampType(), False),
-    StructField("status", StringType(), False)  # 'success', 'partial', 'failed'
-])
-
-# COMMAND ----------
-
-def cleanup_target_volume(target_path: str):
-    """
-    Delete all subdirectories and files from the target volume.
-    
-    This function is used when restart=True to ensure a clean slate
-    for the file transfer process. The root volume path itself is preserved.
-    
-    Args:
-        target_path: Target volume path to clean up
-    """
-    try:
-        print(f"🧹 Cleaning up target volume: {target_path}")
-
-        # List all items in target volume
-        items = dbutils.fs.ls(target_path)
-
-        if not items:
-            print("  ℹ️  Target volume is already empty")
-            return
-
-        deleted_count = 0
-        error_count = 0
-
-        # Delete each subdirectory/file
-        for item in items:
-            # Skip hidden files/folders (starting with .)
-            if item.name.startswith('.'):
-                continue
-
-            try:
-                dbutils.fs.rm(item.path, recurse=True)
-                print(f"  ✓ Deleted: {item.name}")
-                deleted_count += 1
-            except Exception as e:
-                print(f"  ❌ Failed to delete {item.name}: {e}")
-                error_count += 1
-
-        print(f"✅ Cleanup complete: {deleted_count} item(s) deleted")
-        if error_count > 0:
-            print(f"⚠️  {error_count} item(s) failed to delete")
-
-    except Exception as e:
-        # Handle case where target volume doesn't exist or is inaccessible
-        if "FileNotFoundException" in str(e) or "does not exist" in str(e).lower():
-            print(f"  ℹ️  Target volume does not exist yet or is empty")
-        else:
-            print(f"❌ Error during cleanup: {e}")
-            raise
-
-# COMMAND ----------
-
-# DBTITLE 1,Initialize Tracking Table
-def initialize_tracking_table(recreate: bool = False):
-    """
-    Initialize or recreate the tracking table.
-
-    Args:
-        recreate: If True, drop and recreate the table
-    """
-    if recreate:
-        print(f"🔄 Dropping existing tracking table: {tracking_table}")
-        spark.sql(f"DROP TABLE IF EXISTS {tracking_table}")
-
-    # Clean up target volume if restart is requested
-        cleanup_target_volume(target_volume_path)
-        print(f"✅ Target volume cleaned up: {target_volume_path}")
-    # Create table if it doesn't exist
-    create_sql = f"""
-    CREATE TABLE IF NOT EXISTS {tracking_table} (
-        simulation_date DATE NOT NULL,
-        total_folders_found INT NOT NULL,
-        folders_with_files INT NOT NULL,
-        folders_skipped INT NOT NULL,
-        total_files_transferred INT NOT NULL,
-        total_bytes_transferred BIGINT NOT NULL,
-        last_updated TIMESTAMP NOT NULL,
-        status STRING NOT NULL,
-        CONSTRAINT pk_simulation_date PRIMARY KEY (simulation_date)
-    )
-    USING DELTA
-    COMMENT 'Tracks incremental file transfer progress by simulation date - all folders process same date on each run'
-    """
-
-    spark.sql(create_sql)
-    print(f"✅ Tracking table ready: {tracking_table}")
-
-
-# Initialize table
-initialize_tracking_table(recreate=restart)
-
-# COMMAND ----------
-
-# MAGIC %md
-# MAGIC ## 4. File Discovery and Pattern Detection
-
-# COMMAND ----------
-
-# DBTITLE 1,Discover Export Folders
-def get_export_folders(base_path: str) -> List[str]:
-    """
-    Discover all subdirectories in the export path.
-
-    Args:
-        base_path: Base export path
-
-    Returns:
-        List of folder names (relative to base path)
-    """
-    try:
-        files = dbutils.fs.ls(base_path)
-        folders = [f.name.rstrip('/') for f in files if f.isDir() and not f.name.startswith('.')]
-        return sorted(folders)
-    except Exception as e:
-        print(f"❌ Error listing folders: {e}")
-        return []
-
-
-# COMMAND ----------
-
-# DBTITLE 1,Extract Dates from Files
-def extract_dates_from_folder(folder_path: str, folder_name: str) -> List[date]:
-    """
-    Extract all available dates from files in a folder.
-
-    Handles three patterns:
-    1. YYYY-MM-DD_filename.ext (direct files)
-    2. YYYY-MM-DD/files (date folders)
-    3. YYYY-MM-DD.ext (simple dated files)
-
-    Args:
-        folder_path: Full path to folder
-        folder_name: Folder name for pattern detection
-
-    Returns:
-        Sorted list of dates found
-    """
-    dates = set()
-    date_pattern = re.compile(r'(\d{4}-\d{2}-\d{2})')
-
-    try:
-        items = dbutils.fs.ls(folder_path)
-
-        for item in items:
-            # Extract date from name
-            match = date_pattern.search(item.name)
-            if match:
-                date_str = match.group(1)
-                try:
-                    parsed_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    dates.add(parsed_date)
-                except ValueError:
-                    pass
-
-        return sorted(list(dates))
-
-    except Exception as e:
-        print(f"⚠️  Error reading folder {folder_name}: {e}")
-        return []
-
-# COMMAND ----------
-
-# DBTITLE 1,Get Files for Specific Date
-def get_files_for_date(folder_path: str, folder_name: str, target_date: date) -> List[Tuple[str, int]]:
-    """
-    Get all files for a specific date in a folder.
-
-    Args:
-        folder_path: Full path to folder
-        folder_name: Folder name
-        target_date: Date to find files for
-
-    Returns:
-        List of tuples (file_path, size_bytes)
-    """
-    files = []
-    date_str = target_date.strftime('%Y-%m-%d')
-
-    try:
-        items = dbutils.fs.ls(folder_path)
-
-        for item in items:
-            # Check if item matches the target date
-            if date_str in item.name:
-                if item.isDir():
-                    # If it's a date folder, get all files inside
-                    sub_items = dbutils.fs.ls(item.path)
-                    for sub_item in sub_items:
-                        if sub_item.isFile():
-                            # Normalize path by removing dbfs: prefix if present
-                            clean_path = sub_item.path.replace("dbfs:", "") if sub_item.path.startswith("dbfs:") else sub_item.path
-                            files.append((clean_path, sub_item.size))
-                elif item.isFile():
-                    # Direct file with date
-                    # Normalize path by removing dbfs: prefix if present
-                    clean_path = item.path.replace("dbfs:", "") if item.path.startswith("dbfs:") else item.path
-                    files.append((clean_path, item.size))
-
-        return files
-
-    except Exception as e:
-        print(f"❌ Error getting files for {folder_name} on {date_str}: {e}")
-        return []
-
-# COMMAND ----------
-
-# MAGIC %md
-# MAGIC ## 5. Transfer Logic
-
-# COMMAND ----------
-
-# DBTITLE 1,Get Last Processed Simulation Date
-def get_last_processed_simulation_date() -> Optional[date]:
-    """
-    Get the last globally processed simulation date from tracking table.
-
-    This is a global date that applies to all folders - all folders
-    process the same simulation date on each run.
-
-    Returns:
-        Last processed simulation date or None if table is empty (first run)
-    """
-    try:
-        result = spark.sql(f"""
-            SELECT MAX(simulation_date) as last_date
-            FROM {tracking_table}
-        """).collect()
-
-        if result and result[0]['last_date']:
-            return result[0]['last_date']
-        return None
-
-    except Exception as e:
-        # Table might be empty or not exist
-        return None
-
-# COMMAND ----------
-
-# DBTITLE 1,Get Next Simulation Date
-def get_next_simulation_date(last_processed_global: Optional[date]) -> Optional[date]:
-    """
-    Determine the next simulation date to process globally across all folders.
-
-    This function scans all folders to find all available dates, then returns
-    the next date after the last processed simulation date. All folders will
-    attempt to process this date (folders without files will be skipped).
-
-    Args:
-        last_processed_global: Last processed simulation date (None if first run)
-
-    Returns:
-        Next simulation date to process or None if all dates processed
-    """
-    # Discover all folders
-    folders = get_export_folders(source_volume_path)
-
-    if not folders:
-        print("⚠️  No folders found in source volume")
-        return None
-
-    # Collect all unique dates from all folders
-    all_dates = set()
-    for folder_name in folders:
-        folder_path = f"{source_volume_path}/{folder_name}"
-        folder_dates = extract_dates_from_folder(folder_path, folder_name)
-        all_dates.update(folder_dates)
-
-    # Sort dates chronologically
-    sorted_dates = sorted(list(all_dates))
-
-    if not sorted_dates:
-        print("⚠️  No dated files found in any folder")
-        return None
-
-    # First run - return earliest date
-    if last_processed_global is None:
-        return sorted_dates[0]
-
-    # Find next date after last_processed_global
-    next_dates = [d for d in sorted_dates if d > last_processed_global]
-
-    return next_dates[0] if next_dates else None
-
-# COMMAND ----------
-
-# DBTITLE 1,Transfer Files for Date
-def transfer_files_for_date(
-    folder_name: str,
-    folder_path: str,
-    target_date: date,
-    files: List[Tuple[str, int]]
-) -> Dict:
-    """
-    Transfer all files for a specific date.
-
-    Args:
-        folder_name: Folder name
-        folder_path: Source folder path
-        target_date: Date being processed
-        files: List of (file_path, size) tuples
-
-    Returns:
-        Statistics dict with transferred/failed counts
-    """
-    stats = {
-        'transferred': 0,
-        'failed': 0,
-        'bytes': 0,
-        'errors': []
-    }
-
-    if not files:
-        print(f"  ⚠️  No files found for {target_date}")
-        return stats
-
-    # Create target directory structure
-    target_base = f"{target_volume_path}/{folder_name}"
-
-    for file_path, file_size in files:
-        try:
-            # Preserve directory structure relative to folder
-            # Extract relative path from source
-            rel_path = file_path.replace(f"{folder_path}/", "")
-            target_path = f"{target_base}/{rel_path}"
-
-            # Copy file
-            dbutils.fs.cp(file_path, target_path, recurse=False)
-
-            stats['transferred'] += 1
-            stats['bytes'] += file_size
-
-        except Exception as e:
-            stats['failed'] += 1
-            stats['errors'].append(f"{file_path}: {str(e)}")
-            print(f"    ❌ Failed: {file_path} - {e}")
-
-    return stats
-
-# COMMAND ----------
-
-# DBTITLE 1,Update Tracking Table
-def update_tracking(simulation_date: date, date_stats: Dict):
-    """
-    Update tracking table with results for a simulation date.
-
-    Args:
-        simulation_date: The simulation date that was processed
-        date_stats: Dictionary with aggregated statistics:
-            - total_folders_found: Number of folders found
-            - folders_with_files: Number of folders that had files for this date
-            - folders_skipped: Number of folders that had no files for this date
-            - total_files_transferred: Total files transferred across all folders
-            - total_bytes_transferred: Total bytes transferred across all folders
-            - status: Overall status ('success', 'partial', 'failed')
-    """
-    # Create DataFrame for new record
-    new_record = spark.createDataFrame([
-        (
-            simulation_date,
-            date_stats['total_folders_found'],
-            date_stats['folders_with_files'],
-            date_stats['folders_skipped'],
-            date_stats['total_files_transferred'],
-            date_stats['total_bytes_transferred'],
-            datetime.now(),
-            date_stats['status']
-        )
-    ], table_schema)
-
-    # Append to tracking table
-    new_record.write.format("delta").mode("append").saveAsTable(tracking_table)
-
-    print(f"\n📊 Tracking Updated:")
-    print(f"   Simulation Date: {simulation_date}")
-    print(f"   Folders with files: {date_stats['folders_with_files']}/{date_stats['total_folders_found']}")
-    print(f"   Folders skipped: {date_stats['folders_skipped']}")
-    print(f"   Total files: {date_stats['total_files_transferred']}")
-    print(f"   Total bytes: {date_stats['total_bytes_transferred']:,}")
-    print(f"   Status: {date_stats['status']}")
-
-# COMMAND ----------
-
-# MAGIC %md
-# MAGIC ## 6. Main Processing Loop
-
-# COMMAND ----------
-
-# DBTITLE 1,Process Single Folder for Date
-def process_single_folder_for_date(
-    folder_name: str, 
-    target_date: date,
-    source_path: str
-) -> Dict:
-    """
-    Process a single folder for a specific simulation date.
-    
-    This function is designed to be thread-safe for parallel execution.
-    
-    Args:
-        folder_name: Name of the folder to process
-        target_date: The simulation date to process
-        source_path: Base source volume path
-        
-    Returns:
-        Dictionary with processing results:
-            - folder_name: str
-            - has_files: bool (True if folder had files for this date)
-            - files_transferred: int
-            - bytes_transferred: int
-            - errors: List[str]
-    """
-    result = {
-        'folder_name': folder_name,
-        'has_files': False,
-        'files_transferred': 0,
-        'bytes_transferred': 0,
-        'errors': []
-    }
-    
-    folder_path = f"{source_path}/{folder_name}"
-    
-    try:
-        # Get available dates in this folder
-        available_dates = extract_dates_from_folder(folder_path, folder_name)
-        
-        # Check if folder has files for target_date
-        if target_date not in available_dates:
-            print(f"  ⏭️  {folder_name}: Skipped (no files for {target_date})")
-            return result
-        
-        # Get files for target_date
-        files = get_files_for_date(folder_path, folder_name, target_date)
-        
-        if not files:
-            print(f"  ⏭️  {folder_name}: Skipped (no files found)")
-            return result
-        
-        result['has_files'] = True
-        print(f"  📄 {folder_name}: {len(files)} file(s) found")
-        
-        # Transfer files for this folder
-        transfer_stats = transfer_files_for_date(folder_name, folder_path, target_date, files)
-        
-        # Update result
-        result['files_transferred'] = transfer_stats['transferred']
-        result['bytes_transferred'] = transfer_stats['bytes']
-        result['errors'] = transfer_stats['errors']
-        
-        print(f"  ✅ {folder_name}: {transfer_stats['transferred']} file(s) transferred ({transfer_stats['bytes']:,} bytes)")
-        
-    except Exception as e:
-        error_msg = f"{folder_name}: Unexpected error - {str(e)}"
-        result['errors'].append(error_msg)
-        print(f"  ❌ {error_msg}")
-    
-    return result
-
-# COMMAND ----------
-
-# DBTITLE 1,Process All Folders for Simulation Date
-def process_all_folders(specific_date: Optional[str] = None):
-    """
-    Main processing function - processes all folders for the same simulation date.
-
-    All folders are synchronized to process the same simulation date on each run.
-    Folders without files for that date are skipped (not an error).
-
-    Args:
-        specific_date: Optional specific date to process (YYYY-MM-DD)
-    """
-    print("=" * 80)
-    print("🚀 Starting Incremental File Transfer (Global Simulation Date)")
-    print("=" * 80)
-
-    # 1. Discover all export folders
-    folders = get_export_folders(source_volume_path)
-
-    if not folders:
-        print("❌ No export folders found!")
-        return
-
-    print(f"\n📁 Found {len(folders)} export folders")
-
-    # 2. Determine which simulation date to process
-    if specific_date:
-        # User specified a specific date
-        target_date = datetime.strptime(specific_date, '%Y-%m-%d').date()
-        print(f"🎯 User-specified simulation date: {target_date}")
-    else:
-        # Get last processed simulation date (global across all folders)
-        last_processed_global = get_last_processed_simulation_date()
-
-        if last_processed_global:
-            print(f"✓ Last processed simulation date: {last_processed_global}")
-        else:
-            print(f"ℹ️  First run - no previous simulation dates processed")
-
-        # Get next simulation date across all folders
-        target_date = get_next_simulation_date(last_processed_global)
-
-    if target_date is None:
-        print("\n✅ All simulation dates have been processed!")
-        print("=" * 80)
-        return
-
-    print(f"\n{'='*80}")
-    print(f"📅 Processing Simulation Date: {target_date}")
-    print(f"{'='*80}\n")
-
-    # 3. Initialize statistics for this simulation date
-    date_stats = {
-        'total_folders_found': len(folders),
-        'folders_with_files': 0,
-        'folders_skipped': 0,
-        'total_files_transferred': 0,
-        'total_bytes_transferred': 0,
-        'errors': []
-    }
-
-    # 4. Process each folder for THIS simulation date (sequential or parallel)
-    if max_workers == 1:
-        # Sequential processing (original behavior)
-        print(f"  🔄 Processing folders sequentially...")
-        for folder_name in folders:
-            result = process_single_folder_for_date(folder_name, target_date, source_volume_path)
-            
-            # Update date-level stats
-            if result['has_files']:
-                date_stats['folders_with_files'] += 1
-                date_stats['total_files_transferred'] += result['files_transferred']
-                date_stats['total_bytes_transferred'] += result['bytes_transferred']
-            else:
-                date_stats['folders_skipped'] += 1
-            
-            if result['errors']:
-                date_stats['errors'].extend(result['errors'])
-    else:
-        # Parallel processing using ThreadPoolExecutor
-        print(f"  ⚡ Processing folders in parallel (max {max_workers} workers)...")
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all folder processing tasks
-            future_to_folder = {
-                executor.submit(process_single_folder_for_date, folder_name, target_date, source_volume_path): folder_name
-                for folder_name in folders
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(future_to_folder):
-                folder_name = future_to_folder[future]
-                try:
-                    result = future.result()
-                    
-                    # Update date-level stats (thread-safe since we're collecting sequentially)
-                    if result['has_files']:
-                        date_stats['folders_with_files'] += 1
-                        date_stats['total_files_transferred'] += result['files_transferred']
-                        date_stats['total_bytes_transferred'] += result['bytes_transferred']
-                    else:
-                        date_stats['folders_skipped'] += 1
-                    
-                    if result['errors']:
-                        date_stats['errors'].extend(result['errors'])
-                        
-                except Exception as e:
-                    print(f"  ❌ Exception processing {folder_name}: {e}")
-                    date_stats['folders_skipped'] += 1
-                    date_stats['errors'].append(f"{folder_name}: {str(e)}")
-
-    # 5. Determine overall status
-    if date_stats['errors']:
-        status = 'partial' if date_stats['total_files_transferred'] > 0 else 'failed'
-    else:
-        status = 'success'
-
-    date_stats['status'] = status
-
-    # 6. Update tracking table for this simulation date
-    update_tracking(target_date, date_stats)
-
-    # 7. Print summary
-    print("\n" + "=" * 80)
-    print("📊 Simulation Date Summary")
-    print("=" * 80)
-    print(f"Simulation Date: {target_date}")
-    print(f"Folders with files: {date_stats['folders_with_files']}")
-    print(f"Folders skipped: {date_stats['folders_skipped']}")
-    print(f"Total files transferred: {date_stats['total_files_transferred']}")
-    print(f"Total bytes transferred: {date_stats['total_bytes_transferred']:,}")
-    print(f"Status: {status}")
-
-    if date_stats['errors']:
-        print(f"\n❌ Errors encountered: {len(date_stats['errors'])}")
-        for error in date_stats['errors'][:10]:
-            print(f"  - {error}")
-        if len(date_stats['errors']) > 10:
-            print(f"  ... and {len(date_stats['errors']) - 10} more")
-    else:
-        print("\n✅ All transfers completed successfully!")
-
-    print("=" * 80)
+# DBTITLE 1,Initialize Transfer and Tracking Tables
+storage = DbutilsStorage(dbutils)
+if source_archive_path:
+    # Stream members of the archive straight into the target volume - no unzip into the source volume
+    storage = ArchiveStorage(source_archive_path, storage)
+    source_volume_path = storage.default_source_path()
+    print(f"📦 Transferring from archive: {source_volume_path}")
+
+config = TransferConfig(
+    source_path=source_volume_path,
+    target_path=target_volume_path,
+    max_workers=max_workers,
+    max_file_attempts=max_file_attempts,
+    max_dates=max_dates,
+    end_date=datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None,
+    use_listing_cache=use_listing_cache,
+    skip_identical=skip_identical,
+    verify_checksum=verify_checksum,
+    cleanup_workers=cleanup_workers,
+    compact_small_files=compact_small_files,
+    compaction_target_bytes=compaction_target_mb * 1024 * 1024,
+    compaction_folders=compaction_folders
+)
+store = DeltaTrackingStore(spark, tracking_catalog, tracking_schema)
+transfer = VolumeTransfer(config, storage, store)
+
+tracking_table = store.tracking_table
+listing_cache_table = store.listing_cache_table
+ledger_table = store.ledger_table
+telemetry_table = store.telemetry_table
+
+if restart and cleanup_dry_run:
+    # Report what a restart would delete, without dropping or deleting anything
+    transfer.cleanup_target_volume(target_volume_path, dry_run=True)
+    storage.close()
+    dbutils.notebook.exit("Cleanup dry run complete - nothing was deleted")
+
+# Create tables (drop them and clean up the target volume on restart)
+transfer.initialize(restart=restart)
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## 7. Execute Transfer
+# MAGIC ## 4. Execute Transfer
 
 # COMMAND ----------
 
 # DBTITLE 1,Run Transfer
 # Execute the transfer process
-process_all_folders(specific_date=date_limit if date_limit else None)
+try:
+    all_stats = transfer.process_all_folders(specific_date=date_limit if date_limit else None)
+finally:
+    # Release the archive handles opened by the worker threads
+    storage.close()
+print(f"Listing calls this run: {storage.listing_calls:,}")
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## 8. View Tracking Table
+# MAGIC ## 5. View Tracking Table
 
 # COMMAND ----------
 
@@ -743,7 +213,7 @@ display(spark.sql(f"""
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## 9. Utility Queries
+# MAGIC ## 6. Utility Queries
 
 # COMMAND ----------
 
@@ -758,6 +228,7 @@ display(spark.sql(f"""
         AVG(folders_with_files) as avg_folders_with_files,
         AVG(folders_skipped) as avg_folders_skipped,
         SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as successful_runs,
+        SUM(CASE WHEN status = 'success_with_errors' THEN 1 ELSE 0 END) as success_with_errors_runs,
         SUM(CASE WHEN status = 'partial' THEN 1 ELSE 0 END) as partial_runs,
         SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed_runs
     FROM {tracking_table}
@@ -765,8 +236,50 @@ display(spark.sql(f"""
 
 # COMMAND ----------
 
+# DBTITLE 1,Per-Folder Throughput Trend
+# Throughput over the last 7 processed dates vs. all dates, slowest folders first
+display(spark.sql(f"""
+    WITH ranked AS (
+        SELECT
+            *,
+            ROW_NUMBER() OVER (PARTITION BY folder_name ORDER BY simulation_date DESC) as recency
+        FROM {telemetry_table}
+    )
+    SELECT
+        folder_name,
+        COUNT(*) as dates_processed,
+        MAX(simulation_date) as latest_date,
+        SUM(files_copied) as files_copied,
+        SUM(files_failed) as files_failed,
+        SUM(files_failed_permanent) as files_given_up,
+        ROUND(SUM(bytes_copied) / 1024 / 1024, 2) as total_mb,
+        ROUND(AVG(mb_per_second), 2) as avg_mb_per_second,
+        ROUND(AVG(CASE WHEN recency <= 7 THEN mb_per_second END), 2) as last_7_dates_mb_per_second,
+        ROUND(AVG(CASE WHEN recency <= 7 THEN latency_p95_ms END), 1) as last_7_dates_p95_ms,
+        ROUND(MAX(latency_max_ms), 1) as max_latency_ms,
+        ROUND(SUM(listing_seconds), 1) as listing_seconds,
+        ROUND(SUM(wall_seconds), 1) as copy_wall_seconds,
+        MAX_BY(max_workers, simulation_date) as latest_max_workers
+    FROM ranked
+    GROUP BY folder_name
+    ORDER BY avg_mb_per_second ASC NULLS LAST
+"""))
+
+# COMMAND ----------
+
+# DBTITLE 1,Stuck Files
+# Files given up after max_file_attempts failed copies - they are no longer retried
+display(spark.sql(f"""
+    SELECT simulation_date, folder_name, source_path, file_size, attempt, error, transferred_at
+    FROM {ledger_table}
+    WHERE status = 'failed_permanent'
+    ORDER BY simulation_date DESC, folder_name, source_path
+"""))
+
+# COMMAND ----------
+
 # MAGIC %md
-# MAGIC ## 10. Manual Reset (Optional)
+# MAGIC ## 7. Manual Reset (Optional)
 # MAGIC
 # MAGIC Uncomment and run to reset tracking for a specific folder:
 
@@ -805,11 +318,44 @@ display(spark.sql(f"""
 # MAGIC 5. Run notebook - processes first date from each folder
 # MAGIC 6. Check tracking table for results
 # MAGIC
+# MAGIC ### Small-File Compaction
+# MAGIC - Set `compact_small_files=true` to merge a folder's small CSV and Parquet files (up to 16 MB each) of one date
+# MAGIC   into files of about `compaction_target_mb`, written as `<date>_compacted_<hash>.<ext>` in the same landing directory
+# MAGIC - Limit compaction to feeds with many small files with `compaction_folders` (e.g., `delivery_slot_availability,store_inventory_transaction`)
+# MAGIC - Every record gets its original landing path in `_original_source_file_path`; the TMPL001/TMPL003 ingestions
+# MAGIC   restore `_source_file_path` from it (`py_functions/source_lineage.py`), so lineage stays per source file
+# MAGIC - CSV files must have a header row; files whose header or Parquet schema differs from the group's first file are copied as they are
+# MAGIC - Compacted files are recorded in the ledger with status `compacted` and the compacted file as `target_path`
+# MAGIC - Enable compaction for a feed before its first ingestion, or expect one Auto Loader restart when the new column appears
+# MAGIC - `scripts/benchmark_compaction.py` compares raw-ingestion micro-batch times with and without compaction
+# MAGIC
+# MAGIC ### Archive Mode
+# MAGIC - Set `source_archive_path` to the export archive in a volume (e.g., `/Volumes/acme_supermarkets/edw_raw/raw/export.zip`)
+# MAGIC   to transfer from the archive instead of `source_volume_path` - no unzip into the arrival volume is needed
+# MAGIC - Only the archive's central directory is read to find folders and dates (same date rules as for volumes)
+# MAGIC - Only members of the dates being processed are extracted, each streamed straight into `landing/<folder>/`
+# MAGIC   on the `max_workers` threads (written to a hidden `.partial` file, then renamed)
+# MAGIC - A single top-level directory in the archive (e.g. `export/`) is used as the source root
+# MAGIC - Run with `restart=true` when switching between archive and volume sources, so cached listings are rebuilt
+# MAGIC
+# MAGIC ### Restart Cleanup
+# MAGIC - `restart=true` deletes everything in the target volume except hidden top-level entries (starting with `.`)
+# MAGIC - The target tree is listed level by level, then files are deleted in batches and directories bottom-up,
+# MAGIC   with `cleanup_workers` concurrent deletes; progress is printed in objects/s
+# MAGIC - Set `cleanup_dry_run=true` with `restart=true` to only report the object count and bytes that would be deleted
+# MAGIC   (the notebook stops after the report; no tables are dropped)
+# MAGIC
 # MAGIC ### Subsequent Runs
 # MAGIC 1. Set `restart=false` (default)
 # MAGIC 2. Run notebook - processes next **simulation date** across all folders
 # MAGIC 3. Repeat daily or as needed
 # MAGIC
+# MAGIC ### Batch Catch-Up
+# MAGIC 1. Set `max_dates` to the number of pending dates to transfer (e.g., "365" for a year)
+# MAGIC 2. Optionally set `end_date` to stop at a given date (e.g., "2024-12-31")
+# MAGIC 3. Run notebook - all files of all dates share one work queue of `max_workers` threads
+# MAGIC 4. Each date is recorded in the tracking table once it and all earlier dates are complete
+# MAGIC
 # MAGIC ### Process Specific Date
 # MAGIC 1. Set `date_limit` to specific date (e.g., "2024-01-15")
 # MAGIC 2. Run notebook - processes only that date across all folders
@@ -823,20 +369,53 @@ display(spark.sql(f"""
 # MAGIC
 # MAGIC ### Parallel Processing
 # MAGIC - **max_workers=1**: Sequential processing (original behavior, safest)
-# MAGIC - **max_workers=4**: Recommended for most cases (4 concurrent folder transfers)
-# MAGIC - **max_workers=8**: Aggressive parallelism (use if you have many folders and good I/O)
+# MAGIC - **max_workers=4**: Recommended for most cases (4 concurrent file copies)
+# MAGIC - **max_workers=8**: Aggressive parallelism (use if you have many files and good I/O)
 # MAGIC - **max_workers=16**: Maximum parallelism (only for very large datasets)
 # MAGIC
 # MAGIC **Performance Tips:**
 # MAGIC - Start with max_workers=4 and increase if needed
 # MAGIC - Higher values may not always be faster (I/O bottlenecks, network limits)
 # MAGIC - Use max_workers=1 for debugging or troubleshooting
-# MAGIC - Parallel processing is thread-safe and properly handles errors per folder
+# MAGIC - Parallel processing is thread-safe and properly handles errors per file
+# MAGIC - Dense folders (e.g., date folders with many part files) are copied in parallel, not on one thread
+# MAGIC
+# MAGIC ### Listing Cache
+# MAGIC - Source listings are persisted in `file_transfer_listing_cache` in the tracking schema
+# MAGIC - Folders whose directory modification time is unchanged are served from the cache without listing
+# MAGIC - Date folders on or before the last processed simulation date are never re-listed
+# MAGIC - Set `use_listing_cache=false` to force a full listing (e.g., after files were added to an existing date folder)
+# MAGIC - `restart=true` drops the cache along with the tracking table
+# MAGIC
+# MAGIC ### Transfer Ledger and Resume
+# MAGIC - Every copy attempt is recorded in `file_transfer_ledger` (path, size, modification time, status)
+# MAGIC - Ledger and tracking rows are buffered and written in one Delta append per table per batch
+# MAGIC - Files already copied for a date are skipped when the date is processed again (e.g., after an interrupted run)
+# MAGIC - Ledger and tracking tables are compacted (`OPTIMIZE`) once they reach 64 files
+# MAGIC
+# MAGIC ### Skip Identical Files
+# MAGIC - With `skip_identical=true` (default) files whose target copy has the same size and is not older are not copied again
+# MAGIC - Set `verify_checksum=true` to also compare MD5 checksums (reads both files)
+# MAGIC - Re-running a partial or failed date only copies the missing or changed files
+# MAGIC - Unchanged target files keep their modification time, so Auto Loader does not see them as rewritten
+# MAGIC
+# MAGIC ### Local Benchmark
+# MAGIC - `volume_transfer.py` also provides `LocalStorage` and `InMemoryTrackingStore`
+# MAGIC - `python scripts/benchmark_file_transfer.py` builds a synthetic arrival tree (all three layouts) and
+# MAGIC   reports files/s, MB/s and listing calls per `max_workers` value
+# MAGIC - Local numbers measure the engine's overhead; re-check against a volume before raising `max_workers` in production
 # MAGIC
 # MAGIC ### Monitor Progress
 # MAGIC - Check "View Tracking Table" section to see history by simulation date
-# MAGIC - Check "Progress Overview" for overall statistics
+# MAGIC - Check "Progress Overview" for overall statistics and per-folder throughput trends
+# MAGIC - `file_transfer_telemetry` has one row per simulation date and folder: files copied/skipped/failed,
+# MAGIC   listing time, summed copy time, copy wall time, per-file latency p50/p95/max, MB/s and `max_workers`
+# MAGIC - Compare `mb_per_second` and `latency_p95_ms` across runs with different `max_workers` to see whether more workers help
 # MAGIC - Review status column for any failures
+# MAGIC - A file that fails `max_file_attempts` times (default 3) is given up: the ledger records it as
+# MAGIC   `failed_permanent`, telemetry counts it in `files_failed_permanent`, and its date is `success_with_errors`,
+# MAGIC   which no longer holds back the watermark. See "Stuck Files"; to retry one, fix the source and delete its
+# MAGIC   `failed`/`failed_permanent` ledger rows (or replace the file, which changes its size/modification time)
 # MAGIC - Track `folders_skipped` to see which dates had missing files
 # MAGIC
 # MAGIC ### Example Configuration
@@ -0,0 +1,1993 @@
+"""
+Volume-to-volume file transfer engine used by 03_Transfer_Files_To_Volume.
+
+The notebook only reads its widgets and wires up the objects defined here:
+
+- StorageBackend: listing, copy, delete and checksum of files. DbutilsStorage wraps
+  dbutils.fs for Unity Catalog volumes; LocalStorage uses the local filesystem;
+  ArchiveStorage serves a zip archive's members as a read-only source tree.
+- TrackingStore: tracking table, listing cache and transfer ledger. DeltaTrackingStore
+  keeps them in Delta tables; InMemoryTrackingStore keeps them in process.
+- VolumeTransfer: discovery, planning and parallel transfer of simulation dates.
+
+With LocalStorage and InMemoryTrackingStore the whole transfer runs without Spark or
+a workspace, which is what scripts/benchmark_file_transfer.py uses to measure it.
+"""
+
+import csv
+import hashlib
+import io
+import math
+import os
+import re
+import shutil
+import threading
+import time
+import zipfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from datetime import datetime, date
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+DATE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+# Source inventory: folder name -> date -> list of (file_path, size_bytes, modification_time)
+SourceInventory = Dict[str, Dict[date, List[Tuple[str, int, int]]]]
+
+# Buffered writes - flushed with one write per table per batch
+LEDGER_FLUSH_ROWS = 10000
+COMPACT_MIN_FILES = 64
+
+# Failed copies - after MAX_FILE_ATTEMPTS failed attempts a file is given up ('failed_permanent'
+# in the ledger) and no longer holds back its date; such dates are 'success_with_errors'
+MAX_FILE_ATTEMPTS = 3
+COMPLETE_STATUSES = ('success', 'success_with_errors')
+
+# Restart cleanup - objects deleted per task, and seconds between progress lines
+CLEANUP_BATCH_SIZE = 200
+CLEANUP_PROGRESS_SECONDS = 10
+
+# Small-file compaction - files up to COMPACTION_SMALL_FILE_BYTES of one folder and date are
+# merged into files of about COMPACTION_TARGET_BYTES; each record keeps its original landing
+# path in LINEAGE_COLUMN (see py_functions/source_lineage.py)
+COMPACTION_SMALL_FILE_BYTES = 16 * 1024 * 1024
+COMPACTION_TARGET_BYTES = 128 * 1024 * 1024
+COMPACTION_FORMATS = ('.csv', '.parquet')
+LINEAGE_COLUMN = '_original_source_file_path'
+
+
+def normalize_path(path: str) -> str:
+    """Normalize path by removing dbfs: prefix if present."""
+    return path.replace("dbfs:", "", 1) if path.startswith("dbfs:") else path
+
+
+def parse_entry_date(name: str) -> Optional[date]:
+    """
+    Extract the date from a file or folder name.
+
+    Args:
+        name: File or folder name (e.g., '2024-01-08_product.csv', '2024-01-08')
+
+    Returns:
+        Parsed date or None if the name contains no valid date
+    """
+    match = DATE_PATTERN.search(name)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+@contextmanager
+def write_atomically(target_path: str) -> Iterator[BinaryIO]:
+    """
+    Write a file through a hidden partial file (ignored by Auto Loader) that is renamed into place.
+
+    Parent directories are created as needed; the partial file is removed on failure.
+    """
+    directory, name = os.path.split(target_path)
+    partial_path = os.path.join(directory, f".{name}.partial")
+    os.makedirs(directory, exist_ok=True)
+    try:
+        with open(partial_path, 'wb') as f:
+            yield f
+        os.replace(partial_path, target_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+
+# ---------------------------------------------------------------------------
+# Storage backends
+# ---------------------------------------------------------------------------
+
+class FileEntry(NamedTuple):
+    """One listed file or directory."""
+    path: str
+    name: str  # Without trailing '/'
+    size: int
+    modification_time: int  # ms since epoch, 0 if unknown
+    is_dir: bool
+
+
+class StorageBackend(ABC):
+    """
+    File operations used by the transfer. Implementations must be thread-safe.
+
+    Every ls call is counted in listing_calls, for the run summary and benchmarks.
+    """
+
+    def __init__(self):
+        self.listing_calls = 0
+        self._listing_calls_lock = threading.Lock()
+
+    def ls(self, path: str) -> List[FileEntry]:
+        """
+        List a directory.
+
+        Raises:
+            FileNotFoundError: If the directory does not exist
+        """
+        with self._listing_calls_lock:
+            self.listing_calls += 1
+        return self._ls(path)
+
+    @abstractmethod
+    def _ls(self, path: str) -> List[FileEntry]:
+        ...
+
+    @abstractmethod
+    def cp(self, source_path: str, target_path: str):
+        """Copy one file, creating the target's parent directories as needed."""
+
+    @abstractmethod
+    def rm(self, path: str, recurse: bool = False):
+        """Delete a file, or a directory (with recurse=True, including its contents)."""
+
+    def open(self, path: str) -> BinaryIO:
+        """Open a file for reading (through the /Volumes FUSE mount on Databricks)."""
+        return open(path, 'rb')
+
+    def checksum(self, path: str) -> str:
+        """
+        Compute the MD5 checksum of a file.
+
+        Returns:
+            Hex digest of the file content
+        """
+        digest = hashlib.md5()
+        with self.open(path) as f:
+            for chunk in iter(lambda: f.read(8 * 1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def close(self):
+        """Release any handles held by the backend. The backend is not used afterwards."""
+
+
+class DbutilsStorage(StorageBackend):
+    """Unity Catalog volumes through dbutils.fs."""
+
+    def __init__(self, dbutils):
+        super().__init__()
+        self.dbutils = dbutils
+
+    def _ls(self, path: str) -> List[FileEntry]:
+        try:
+            items = self.dbutils.fs.ls(path)
+        except Exception as e:
+            if "FileNotFoundException" in str(e) or "does not exist" in str(e).lower():
+                raise FileNotFoundError(path) from e
+            raise
+        return [
+            FileEntry(
+                normalize_path(item.path),
+                item.name.rstrip('/'),
+                item.size,
+                getattr(item, 'modificationTime', 0) or 0,
+                item.isDir()
+            )
+            for item in items
+        ]
+
+    def cp(self, source_path: str, target_path: str):
+        self.dbutils.fs.cp(source_path, target_path, recurse=False)
+
+    def rm(self, path: str, recurse: bool = False):
+        self.dbutils.fs.rm(path, recurse=recurse)
+
+
+class LocalStorage(StorageBackend):
+    """The local filesystem, for benchmarks and tests off the workspace."""
+
+    def _ls(self, path: str) -> List[FileEntry]:
+        entries = []
+        with os.scandir(path) as items:
+            for item in items:
+                stat = item.stat()
+                is_dir = item.is_dir()
+                entries.append(FileEntry(
+                    item.path,
+                    item.name,
+                    0 if is_dir else stat.st_size,
+                    int(stat.st_mtime * 1000),
+                    is_dir
+                ))
+        return entries
+
+    def cp(self, source_path: str, target_path: str):
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        shutil.copyfile(source_path, target_path)
+
+    def rm(self, path: str, recurse: bool = False):
+        if os.path.isdir(path):
+            if recurse:
+                shutil.rmtree(path)
+            else:
+                os.rmdir(path)
+        else:
+            os.remove(path)
+
+
+class ArchiveStorage(StorageBackend):
+    """
+    A zip archive as a read-only source tree, on top of the storage of the target.
+
+    Paths below archive_path (e.g. '/Volumes/.../export.zip/export/product_csv/...')
+    are members of the archive; all other paths are passed to target_storage. Only
+    the archive's central directory is read to list it, and cp streams one member
+    straight into the target file, so the archive is never unpacked. Each thread
+    reads through its own handle on the archive, so members are extracted in
+    parallel by the transfer's worker threads.
+    """
+
+    def __init__(self, archive_path: str, target_storage: StorageBackend):
+        super().__init__()
+        self.archive_path = archive_path.rstrip('/')
+        self.target_storage = target_storage
+        self._handles = threading.local()
+        # Every thread's handle, so close() can release them after the worker threads exit
+        self._open_archives: List[zipfile.ZipFile] = []
+        self._open_archives_lock = threading.Lock()
+
+        # Directory (relative to the archive root, '' for the root) -> child name -> entry
+        self._tree: Dict[str, Dict[str, FileEntry]] = {'': {}}
+        self._members: Dict[str, zipfile.ZipInfo] = {}
+        for info in self._archive().infolist():
+            parts = [part for part in info.filename.split('/') if part]
+            if info.is_dir() or not parts or parts[0] == '__MACOSX' or parts[-1].startswith('.'):
+                continue
+            member_path = '/'.join(parts)
+            mtime = int(datetime(*info.date_time).timestamp() * 1000)
+            self._members[member_path] = info
+            for depth in range(len(parts)):
+                parent = '/'.join(parts[:depth])
+                name = parts[depth]
+                is_dir = depth < len(parts) - 1
+                children = self._tree.setdefault(parent, {})
+                existing = children.get(name)
+                children[name] = FileEntry(
+                    f"{self.archive_path}/{'/'.join(parts[:depth + 1])}",
+                    name,
+                    0 if is_dir else info.file_size,
+                    # Directories report the latest modification time of any member below them
+                    max(mtime, existing.modification_time) if existing else mtime,
+                    is_dir
+                )
+                if is_dir:
+                    self._tree.setdefault('/'.join(parts[:depth + 1]), {})
+
+    def _archive(self) -> zipfile.ZipFile:
+        archive = getattr(self._handles, 'archive', None)
+        if archive is None:
+            archive = self._handles.archive = zipfile.ZipFile(self.archive_path)
+            with self._open_archives_lock:
+                self._open_archives.append(archive)
+        return archive
+
+    def close(self):
+        """Close every thread's handle on the archive, and the target storage."""
+        with self._open_archives_lock:
+            archives, self._open_archives = self._open_archives, []
+        for archive in archives:
+            archive.close()
+        self.target_storage.close()
+
+    def _relative(self, path: str) -> Optional[str]:
+        """Path relative to the archive root, or None if path is not inside the archive."""
+        path = normalize_path(path).rstrip('/')
+        if path == self.archive_path:
+            return ''
+        if path.startswith(self.archive_path + '/'):
+            return path[len(self.archive_path) + 1:]
+        return None
+
+    def default_source_path(self) -> str:
+        """
+        The source path to transfer from: the archive root, or its single top-level
+        directory if all members are under one (e.g. 'export/' in export.zip).
+        """
+        top_level = list(self._tree[''].values())
+        if len(top_level) == 1 and top_level[0].is_dir and parse_entry_date(top_level[0].name) is None:
+            return top_level[0].path
+        return self.archive_path
+
+    def _ls(self, path: str) -> List[FileEntry]:
+        relative = self._relative(path)
+        if relative is None:
+            return self.target_storage._ls(path)
+        if relative not in self._tree:
+            raise FileNotFoundError(path)
+        return list(self._tree[relative].values())
+
+    def cp(self, source_path: str, target_path: str):
+        relative = self._relative(source_path)
+        if relative is None:
+            return self.target_storage.cp(source_path, target_path)
+
+        with self._archive().open(self._members[relative]) as source, write_atomically(target_path) as target:
+            shutil.copyfileobj(source, target, 8 * 1024 * 1024)
+
+    def rm(self, path: str, recurse: bool = False):
+        if self._relative(path) is not None:
+            raise PermissionError(f"Archive members are read-only: {path}")
+        self.target_storage.rm(path, recurse=recurse)
+
+    def open(self, path: str) -> BinaryIO:
+        relative = self._relative(path)
+        if relative is None:
+            return self.target_storage.open(path)
+        return self._archive().open(self._members[relative])
+
+
+# ---------------------------------------------------------------------------
+# Small-file compaction
+# ---------------------------------------------------------------------------
+
+def compact_csv_files(
+    storage: StorageBackend,
+    sources: List[Tuple[str, str]],
+    output_path: str
+) -> List[int]:
+    """
+    Merge CSV files (with a header row) into one file, adding LINEAGE_COLUMN to every record.
+
+    Files whose header differs from the first file's header are not merged.
+
+    Args:
+        storage: Storage to read the source files from
+        sources: List of (source_path, lineage_path)
+        output_path: Path of the merged file
+
+    Returns:
+        Indices of the merged sources (no file is written if none were merged)
+    """
+    merged: List[int] = []
+    header: Optional[List[str]] = None
+    with write_atomically(output_path) as output_file:
+        output = io.TextIOWrapper(output_file, encoding='utf-8', newline='')
+        writer = csv.writer(output)
+        for index, (source_path, lineage_path) in enumerate(sources):
+            with storage.open(source_path) as source_file:
+                reader = csv.reader(io.TextIOWrapper(source_file, encoding='utf-8', newline=''))
+                source_header = next(reader, None)
+                if source_header is None:
+                    continue
+                if header is None:
+                    header = source_header
+                    writer.writerow(header + [LINEAGE_COLUMN])
+                elif source_header != header:
+                    continue
+                for row in reader:
+                    writer.writerow(row + [lineage_path])
+            merged.append(index)
+        output.flush()
+        output.detach()
+    if not merged:
+        os.remove(output_path)
+    return merged
+
+
+def compact_parquet_files(
+    storage: StorageBackend,
+    sources: List[Tuple[str, str]],
+    output_path: str
+) -> List[int]:
+    """
+    Merge Parquet files into one file, adding LINEAGE_COLUMN to every record (requires pyarrow).
+
+    Files whose schema differs from the first file's schema are not merged.
+
+    Args:
+        storage: Storage to read the source files from
+        sources: List of (source_path, lineage_path)
+        output_path: Path of the merged file
+
+    Returns:
+        Indices of the merged sources (no file is written if none were merged)
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    merged: List[int] = []
+    schema = None
+    with write_atomically(output_path) as output_file:
+        writer = None
+        for index, (source_path, lineage_path) in enumerate(sources):
+            with storage.open(source_path) as source_file:
+                table = pq.read_table(source_file)
+            if schema is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(output_file, schema.append(pa.field(LINEAGE_COLUMN, pa.string())))
+            elif not table.schema.equals(schema):
+                continue
+            writer.write_table(table.append_column(LINEAGE_COLUMN, pa.array([lineage_path] * table.num_rows, pa.string())))
+            merged.append(index)
+        if writer is not None:
+            writer.close()
+    if not merged:
+        os.remove(output_path)
+    return merged
+
+
+# ---------------------------------------------------------------------------
+# Tracking stores
+# ---------------------------------------------------------------------------
+
+class TrackingStore(ABC):
+    """
+    Persistent state of the transfer: tracking rows, listing cache and ledger.
+
+    Row layouts:
+        tracking: (simulation_date, total_folders_found, folders_with_files, folders_skipped,
+                   total_files_transferred, total_bytes_transferred, last_updated, status)
+        ledger:   (simulation_date, folder_name, source_path, target_path, file_size,
+                   source_modification_time, checksum, status, error, transferred_at, attempt)
+        telemetry: (simulation_date, folder_name, files_copied, files_skipped, files_failed,
+                    bytes_copied, listing_seconds, copy_seconds, wall_seconds, latency_p50_ms,
+                    latency_p95_ms, latency_max_ms, mb_per_second, max_workers, recorded_at,
+                    files_failed_permanent)
+        listings: folder name -> {'modification_time', 'entries'} where entries is
+                  entry name -> {'date', 'modification_time', 'files'}
+    """
+
+    def initialize(self, recreate: bool = False):
+        """Create the store (dropping existing state first if recreate)."""
+
+    @abstractmethod
+    def last_processed_date(self) -> Optional[date]:
+        """
+        Watermark: the last simulation date before the first partial or failed date.
+
+        None on the first run, or when the earliest tracked date is not complete, so
+        dates with failed copies are retried instead of being passed over. Dates whose
+        only failures are files given up after max_file_attempts ('success_with_errors')
+        count as complete.
+        """
+
+    @abstractmethod
+    def load_listing_cache(self) -> Dict[str, Dict]:
+        """Cached folder listings."""
+
+    @abstractmethod
+    def save_listing_cache(self, listings: Dict[str, Dict]):
+        """Replace the cached listings of the given folders."""
+
+    @abstractmethod
+    def load_copied_files(self, dates: List[date]) -> Dict[str, Tuple[int, int]]:
+        """Source path -> (file_size, source_modification_time) of files already copied, compacted or skipped."""
+
+    @abstractmethod
+    def load_failed_attempts(self, dates: List[date]) -> Dict[Tuple[str, int, int], int]:
+        """(source_path, file_size, source_modification_time) -> number of failed copy attempts."""
+
+    @abstractmethod
+    def append_ledger(self, rows: List[Tuple]):
+        """Append ledger rows."""
+
+    @abstractmethod
+    def upsert_tracking(self, rows: List[Tuple]):
+        """Insert tracking rows, replacing any existing row for the same simulation date."""
+
+    @abstractmethod
+    def append_telemetry(self, rows: List[Tuple]):
+        """Append per-folder telemetry rows."""
+
+    def compact(self):
+        """Compact the stored tables, if the store needs it."""
+
+
+class InMemoryTrackingStore(TrackingStore):
+    """Tracking state held in process, for benchmarks and dry runs."""
+
+    def __init__(self):
+        self.initialize(recreate=True)
+
+    def initialize(self, recreate: bool = False):
+        if recreate or not hasattr(self, 'tracking_rows'):
+            self.tracking_rows: List[Tuple] = []
+            self.ledger_rows: List[Tuple] = []
+            self.telemetry_rows: List[Tuple] = []
+            self.listings: Dict[str, Dict] = {}
+
+    def last_processed_date(self) -> Optional[date]:
+        first_incomplete = min((row[0] for row in self.tracking_rows if row[7] not in COMPLETE_STATUSES),
+                               default=None)
+        return max(
+            (row[0] for row in self.tracking_rows if first_incomplete is None or row[0] < first_incomplete),
+            default=None
+        )
+
+    def load_listing_cache(self) -> Dict[str, Dict]:
+        return dict(self.listings)
+
+    def save_listing_cache(self, listings: Dict[str, Dict]):
+        self.listings.update(listings)
+
+    def load_copied_files(self, dates: List[date]) -> Dict[str, Tuple[int, int]]:
+        dates = set(dates)
+        return {
+            row[2]: (row[4], row[5])
+            for row in self.ledger_rows
+            if row[7] in ('copied', 'skipped', 'compacted') and row[0] in dates
+        }
+
+    def load_failed_attempts(self, dates: List[date]) -> Dict[Tuple[str, int, int], int]:
+        dates = set(dates)
+        attempts: Dict[Tuple[str, int, int], int] = {}
+        for row in self.ledger_rows:
+            if row[7] in ('failed', 'failed_permanent') and row[0] in dates:
+                attempts[(row[2], row[4], row[5])] = attempts.get((row[2], row[4], row[5]), 0) + 1
+        return attempts
+
+    def append_ledger(self, rows: List[Tuple]):
+        self.ledger_rows.extend(rows)
+
+    def upsert_tracking(self, rows: List[Tuple]):
+        replaced = {row[0] for row in rows}
+        self.tracking_rows = [row for row in self.tracking_rows if row[0] not in replaced] + list(rows)
+
+    def append_telemetry(self, rows: List[Tuple]):
+        self.telemetry_rows.extend(rows)
+
+
+class DeltaTrackingStore(TrackingStore):
+    """Tracking state in Delta tables in <catalog>.<schema>."""
+
+    def __init__(self, spark, catalog: str, schema: str, compact_min_files: int = COMPACT_MIN_FILES):
+        from pyspark.sql.types import (
+            StructType, StructField, StringType, DateType, LongType, TimestampType, IntegerType, DoubleType
+        )
+
+        self.spark = spark
+        self.compact_min_files = compact_min_files
+        self.tracking_table = f"{catalog}.{schema}.file_transfer_tracker"
+        # Persisted source listings, one row per dated file, so runs only re-list changed folders
+        self.listing_cache_table = f"{catalog}.{schema}.file_transfer_listing_cache"
+        # Per-file transfer ledger, used to resume a date from the last file copied
+        self.ledger_table = f"{catalog}.{schema}.file_transfer_ledger"
+        # Per-folder copy telemetry, one row per simulation date and folder
+        self.telemetry_table = f"{catalog}.{schema}.file_transfer_telemetry"
+
+        self.tracking_schema = StructType([
+            StructField("simulation_date", DateType(), False),
+            StructField("total_folders_found", IntegerType(), False),
+            StructField("folders_with_files", IntegerType(), False),
+            StructField("folders_skipped", IntegerType(), False),
+            StructField("total_files_transferred", IntegerType(), False),
+            StructField("total_bytes_transferred", LongType(), False),
+            StructField("last_updated", TimestampType(), False),
+            StructField("status", StringType(), False)  # 'success', 'success_with_errors', 'partial', 'failed'
+        ])
+
+        self.listing_cache_schema = StructType([
+            StructField("folder_name", StringType(), False),
+            StructField("folder_modification_time", LongType(), False),
+            StructField("entry_name", StringType(), False),
+            StructField("entry_date", DateType(), False),
+            StructField("entry_modification_time", LongType(), False),
+            StructField("file_path", StringType(), False),
+            StructField("file_size", LongType(), False),
+            StructField("file_modification_time", LongType(), False),
+            StructField("cached_at", TimestampType(), False)
+        ])
+
+        self.ledger_schema = StructType([
+            StructField("simulation_date", DateType(), False),
+            StructField("folder_name", StringType(), False),
+            StructField("source_path", StringType(), False),
+            StructField("target_path", StringType(), False),
+            StructField("file_size", LongType(), False),
+            StructField("source_modification_time", LongType(), False),
+            StructField("checksum", StringType(), True),  # Content checksum, when computed
+            StructField("status", StringType(), False),  # 'copied', 'compacted', 'skipped', 'failed', 'failed_permanent'
+            StructField("error", StringType(), True),
+            StructField("transferred_at", TimestampType(), False),
+            StructField("attempt", IntegerType(), True)  # Copy attempt of this file version, 1 for the first
+        ])
+
+        self.telemetry_schema = StructType([
+            StructField("simulation_date", DateType(), False),
+            StructField("folder_name", StringType(), False),
+            StructField("files_copied", IntegerType(), False),
+            StructField("files_skipped", IntegerType(), False),
+            StructField("files_failed", IntegerType(), False),
+            StructField("bytes_copied", LongType(), False),
+            StructField("listing_seconds", DoubleType(), False),
+            StructField("copy_seconds", DoubleType(), False),  # Sum of per-file copy latencies
+            StructField("wall_seconds", DoubleType(), False),  # First copy start to last copy end
+            StructField("latency_p50_ms", DoubleType(), True),
+            StructField("latency_p95_ms", DoubleType(), True),
+            StructField("latency_max_ms", DoubleType(), True),
+            StructField("mb_per_second", DoubleType(), True),
+            StructField("max_workers", IntegerType(), False),
+            StructField("recorded_at", TimestampType(), False),
+            StructField("files_failed_permanent", IntegerType(), True)  # Files given up after max_file_attempts
+        ])
+
+    def initialize(self, recreate: bool = False):
+        """
+        Initialize or recreate the tracking, listing cache and ledger tables.
+
+        Args:
+            recreate: If True, drop and recreate the tables
+        """
+        spark = self.spark
+        if recreate:
+            print(f"🔄 Dropping existing tracking table: {self.tracking_table}")
+            spark.sql(f"DROP TABLE IF EXISTS {self.tracking_table}")
+            spark.sql(f"DROP TABLE IF EXISTS {self.listing_cache_table}")
+            spark.sql(f"DROP TABLE IF EXISTS {self.ledger_table}")
+            spark.sql(f"DROP TABLE IF EXISTS {self.telemetry_table}")
+
+        spark.sql(f"""
+        CREATE TABLE IF NOT EXISTS {self.tracking_table} (
+            simulation_date DATE NOT NULL,
+            total_folders_found INT NOT NULL,
+            folders_with_files INT NOT NULL,
+            folders_skipped INT NOT NULL,
+            total_files_transferred INT NOT NULL,
+            total_bytes_transferred BIGINT NOT NULL,
+            last_updated TIMESTAMP NOT NULL,
+            status STRING NOT NULL,
+            CONSTRAINT pk_simulation_date PRIMARY KEY (simulation_date)
+        )
+        USING DELTA
+        COMMENT 'Tracks incremental file transfer progress by simulation date - all folders process same date on each run'
+        """)
+        print(f"✅ Tracking table ready: {self.tracking_table}")
+
+        spark.sql(f"""
+        CREATE TABLE IF NOT EXISTS {self.listing_cache_table} (
+            folder_name STRING NOT NULL,
+            folder_modification_time BIGINT NOT NULL,
+            entry_name STRING NOT NULL,
+            entry_date DATE NOT NULL,
+            entry_modification_time BIGINT NOT NULL,
+            file_path STRING NOT NULL,
+            file_size BIGINT NOT NULL,
+            file_modification_time BIGINT NOT NULL,
+            cached_at TIMESTAMP NOT NULL
+        )
+        USING DELTA
+        COMMENT 'Cached source volume listings (one row per dated file) - folders are re-listed only when they change'
+        """)
+        print(f"✅ Listing cache ready: {self.listing_cache_table}")
+
+        spark.sql(f"""
+        CREATE TABLE IF NOT EXISTS {self.ledger_table} (
+            simulation_date DATE NOT NULL,
+            folder_name STRING NOT NULL,
+            source_path STRING NOT NULL,
+            target_path STRING NOT NULL,
+            file_size BIGINT NOT NULL,
+            source_modification_time BIGINT NOT NULL,
+            checksum STRING,
+            status STRING NOT NULL,
+            error STRING,
+            transferred_at TIMESTAMP NOT NULL,
+            attempt INT
+        )
+        USING DELTA
+        COMMENT 'Per-file transfer ledger - one row per copy attempt, used to resume partially transferred dates'
+        """)
+        print(f"✅ Transfer ledger ready: {self.ledger_table}")
+
+        spark.sql(f"""
+        CREATE TABLE IF NOT EXISTS {self.telemetry_table} (
+            simulation_date DATE NOT NULL,
+            folder_name STRING NOT NULL,
+            files_copied INT NOT NULL,
+            files_skipped INT NOT NULL,
+            files_failed INT NOT NULL,
+            bytes_copied BIGINT NOT NULL,
+            listing_seconds DOUBLE NOT NULL,
+            copy_seconds DOUBLE NOT NULL,
+            wall_seconds DOUBLE NOT NULL,
+            latency_p50_ms DOUBLE,
+            latency_p95_ms DOUBLE,
+            latency_max_ms DOUBLE,
+            mb_per_second DOUBLE,
+            max_workers INT NOT NULL,
+            recorded_at TIMESTAMP NOT NULL,
+            files_failed_permanent INT
+        )
+        USING DELTA
+        COMMENT 'Per-folder transfer telemetry by simulation date - listing and copy time, copy latency percentiles, throughput'
+        """)
+        print(f"✅ Transfer telemetry ready: {self.telemetry_table}")
+
+        # Tables created before per-file attempt limits get the new columns
+        self.add_missing_columns(self.ledger_table, {"attempt": "INT"})
+        self.add_missing_columns(self.telemetry_table, {"files_failed_permanent": "INT"})
+
+    def add_missing_columns(self, table_name: str, columns: Dict[str, str]):
+        """Add the given (name -> SQL type) columns to a table that does not have them yet."""
+        existing = set(self.spark.table(table_name).columns)
+        missing = [f"{name} {sql_type}" for name, sql_type in columns.items() if name not in existing]
+        if missing:
+            self.spark.sql(f"ALTER TABLE {table_name} ADD COLUMNS ({', '.join(missing)})")
+            print(f"✅ Added {', '.join(missing)} to {table_name}")
+
+    def last_processed_date(self) -> Optional[date]:
+        """
+        Get the last globally processed simulation date from the tracking table.
+
+        This is a global date that applies to all folders - all folders
+        process the same simulation date on each run. It stops before the first
+        partial or failed date, so that date is picked up again by the next run.
+        """
+        complete = ", ".join(f"'{status}'" for status in COMPLETE_STATUSES)
+        try:
+            result = self.spark.sql(f"""
+                SELECT MAX(simulation_date) as last_date
+                FROM {self.tracking_table}
+                WHERE simulation_date < COALESCE(
+                    (SELECT MIN(simulation_date) FROM {self.tracking_table} WHERE status NOT IN ({complete})),
+                    DATE'9999-12-31'
+                )
+            """).collect()
+
+            if result and result[0]['last_date']:
+                return result[0]['last_date']
+            return None
+
+        except Exception:
+            # Table might be empty or not exist
+            return None
+
+    def load_listing_cache(self) -> Dict[str, Dict]:
+        cache: Dict[str, Dict] = {}
+        try:
+            rows = self.spark.table(self.listing_cache_table).collect()
+        except Exception as e:
+            print(f"⚠️  Listing cache unavailable, listing all folders: {e}")
+            return cache
+
+        for row in rows:
+            folder = cache.setdefault(row['folder_name'], {
+                'modification_time': row['folder_modification_time'],
+                'entries': {}
+            })
+            entry = folder['entries'].setdefault(row['entry_name'], {
+                'date': row['entry_date'],
+                'modification_time': row['entry_modification_time'],
+                'files': []
+            })
+            entry['files'].append((row['file_path'], row['file_size'], row['file_modification_time']))
+
+        return cache
+
+    def save_listing_cache(self, listings: Dict[str, Dict]):
+        """Replace the cached listings of the given folders in one Delta write."""
+        if not listings:
+            return
+
+        cached_at = datetime.now()
+        rows = [
+            (folder_name, listing['modification_time'], entry_name, entry['date'], entry['modification_time'],
+             file_path, file_size, file_mtime, cached_at)
+            for folder_name, listing in listings.items()
+            for entry_name, entry in listing['entries'].items()
+            for file_path, file_size, file_mtime in entry['files']
+        ]
+        folder_list = ", ".join("'" + name.replace("'", "''") + "'" for name in listings)
+
+        self.spark.createDataFrame(rows, self.listing_cache_schema) \
+            .write.format("delta") \
+            .mode("overwrite") \
+            .option("replaceWhere", f"folder_name IN ({folder_list})") \
+            .saveAsTable(self.listing_cache_table)
+
+    def load_copied_files(self, dates: List[date]) -> Dict[str, Tuple[int, int]]:
+        if not dates:
+            return {}
+
+        date_list = ", ".join(f"DATE'{d}'" for d in dates)
+        try:
+            rows = self.spark.sql(f"""
+                SELECT source_path, file_size, source_modification_time
+                FROM {self.ledger_table}
+                WHERE status IN ('copied', 'skipped', 'compacted') AND simulation_date IN ({date_list})
+            """).collect()
+        except Exception as e:
+            print(f"⚠️  Transfer ledger unavailable, not resuming: {e}")
+            return {}
+
+        return {row['source_path']: (row['file_size'], row['source_modification_time']) for row in rows}
+
+    def load_failed_attempts(self, dates: List[date]) -> Dict[Tuple[str, int, int], int]:
+        if not dates:
+            return {}
+
+        date_list = ", ".join(f"DATE'{d}'" for d in dates)
+        try:
+            rows = self.spark.sql(f"""
+                SELECT source_path, file_size, source_modification_time, COUNT(*) AS attempts
+                FROM {self.ledger_table}
+                WHERE status IN ('failed', 'failed_permanent') AND simulation_date IN ({date_list})
+                GROUP BY source_path, file_size, source_modification_time
+            """).collect()
+        except Exception as e:
+            print(f"⚠️  Transfer ledger unavailable, not counting failed attempts: {e}")
+            return {}
+
+        return {(row['source_path'], row['file_size'], row['source_modification_time']): row['attempts']
+                for row in rows}
+
+    def append_ledger(self, rows: List[Tuple]):
+        self.spark.createDataFrame(rows, self.ledger_schema) \
+            .write.format("delta").mode("append").saveAsTable(self.ledger_table)
+
+    def upsert_tracking(self, rows: List[Tuple]):
+        # The primary key is informational only, so re-processed dates are merged, not appended
+        self.spark.createDataFrame(rows, self.tracking_schema).createOrReplaceTempView("file_transfer_tracking_updates")
+        self.spark.sql(f"""
+            MERGE INTO {self.tracking_table} t
+            USING file_transfer_tracking_updates s
+            ON t.simulation_date = s.simulation_date
+            WHEN MATCHED THEN UPDATE SET *
+            WHEN NOT MATCHED THEN INSERT *
+        """)
+
+    def append_telemetry(self, rows: List[Tuple]):
+        self.spark.createDataFrame(rows, self.telemetry_schema) \
+            .write.format("delta").mode("append").saveAsTable(self.telemetry_table)
+
+    def compact(self):
+        self.compact_table_if_needed(self.ledger_table)
+        self.compact_table_if_needed(self.telemetry_table)
+        self.compact_table_if_needed(self.tracking_table)
+
+    def compact_table_if_needed(self, table_name: str):
+        """Run OPTIMIZE on a table once it has accumulated at least compact_min_files data files."""
+        try:
+            num_files = self.spark.sql(f"DESCRIBE DETAIL {table_name}").collect()[0]['numFiles']
+            if num_files >= self.compact_min_files:
+                self.spark.sql(f"OPTIMIZE {table_name}")
+                print(f"🧱 Compacted {table_name} ({num_files} files)")
+        except Exception as e:
+            print(f"⚠️  Could not compact {table_name}: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Inventory helpers
+# ---------------------------------------------------------------------------
+
+def extract_dates_from_folder(inventory: SourceInventory, folder_name: str) -> List[date]:
+    """Get all available dates for a folder from the source inventory, sorted."""
+    return sorted(inventory.get(folder_name, {}))
+
+
+def get_files_for_date(inventory: SourceInventory, folder_name: str, target_date: date) -> List[Tuple[str, int, int]]:
+    """Get all (file_path, size_bytes, modification_time) for a date in a folder from the source inventory."""
+    return inventory.get(folder_name, {}).get(target_date, [])
+
+
+def get_pending_simulation_dates(
+    last_processed_global: Optional[date],
+    inventory: SourceInventory,
+    limit: int = 1,
+    until: Optional[date] = None
+) -> List[date]:
+    """
+    Determine the next simulation dates to process globally across all folders.
+
+    This function collects all available dates from the source inventory, then returns
+    up to `limit` dates after the last processed simulation date, in order. All folders
+    will attempt to process each date (folders without files will be skipped).
+
+    Args:
+        last_processed_global: Last processed simulation date (None if first run)
+        inventory: Source inventory built by VolumeTransfer.build_source_inventory
+        limit: Maximum number of dates to return
+        until: Optional last date to include
+
+    Returns:
+        Sorted list of simulation dates to process (empty if all dates processed)
+    """
+    if not inventory:
+        print("⚠️  No folders found in source volume")
+        return []
+
+    # Collect all unique dates from all folders
+    all_dates = set()
+    for folder_name in inventory:
+        all_dates.update(extract_dates_from_folder(inventory, folder_name))
+
+    # Sort dates chronologically
+    sorted_dates = sorted(list(all_dates))
+
+    if not sorted_dates:
+        print("⚠️  No dated files found in any folder")
+        return []
+
+    # Dates after last_processed_global (all dates on first run)
+    pending = [
+        d for d in sorted_dates
+        if (last_processed_global is None or d > last_processed_global) and (until is None or d <= until)
+    ]
+
+    return pending[:limit]
+
+
+def finalize_date_stats(date_stats: Dict) -> Dict:
+    """
+    Set the overall status of a simulation date from its errors and transfer totals.
+
+    Failures still to be retried make a date 'partial' or 'failed'; a date whose only
+    failures are files given up after max_file_attempts is 'success_with_errors'.
+    """
+    if date_stats['errors']:
+        date_stats['status'] = 'partial' if date_stats['total_files_transferred'] > 0 else 'failed'
+    elif date_stats['files_given_up']:
+        date_stats['status'] = 'success_with_errors'
+    else:
+        date_stats['status'] = 'success'
+    return date_stats
+
+
+def latency_percentiles(latencies: List[float]) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    """
+    Summarize per-file copy latencies.
+
+    Args:
+        latencies: Copy latencies in seconds
+
+    Returns:
+        Tuple of (p50, p95, max) in milliseconds (nearest rank), or Nones if there are no latencies
+    """
+    if not latencies:
+        return None, None, None
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        return ordered[max(0, math.ceil(len(ordered) * p / 100) - 1)] * 1000
+
+    return percentile(50), percentile(95), ordered[-1] * 1000
+
+
+def ledger_status(result: Dict) -> str:
+    """Ledger status of a transfer result: 'copied', 'compacted', 'skipped' or 'failed'."""
+    if not result['ok']:
+        return 'failed'
+    if result.get('skipped'):
+        return 'skipped'
+    return 'compacted' if result.get('compacted') else 'copied'
+
+
+def print_folder_telemetry(all_stats: Dict[date, Dict], top: int = 5):
+    """Print the slowest folders of a run by copy wall time, with their throughput and p95 latency."""
+    folders: Dict[str, Dict] = {}
+    for date_stats in all_stats.values():
+        for folder_name, folder_stats in date_stats['folders'].items():
+            totals = folders.setdefault(folder_name, {'wall_seconds': 0.0, 'listing_seconds': 0.0,
+                                                      'bytes_copied': 0, 'latency_p95_ms': None})
+            totals['wall_seconds'] += folder_stats.get('wall_seconds', 0.0)
+            totals['listing_seconds'] += folder_stats.get('listing_seconds', 0.0)
+            totals['bytes_copied'] += folder_stats['bytes_copied']
+            p95 = folder_stats.get('latency_p95_ms')
+            if p95 is not None and (totals['latency_p95_ms'] is None or p95 > totals['latency_p95_ms']):
+                totals['latency_p95_ms'] = p95
+
+    slowest = sorted(folders.items(), key=lambda item: item[1]['wall_seconds'], reverse=True)[:top]
+    if not slowest or slowest[0][1]['wall_seconds'] == 0:
+        return
+
+    print("\n🐢 Slowest folders (copy wall time):")
+    for folder_name, totals in slowest:
+        mb_per_second = totals['bytes_copied'] / 1024 / 1024 / totals['wall_seconds'] if totals['wall_seconds'] else 0.0
+        p95 = f"{totals['latency_p95_ms']:,.0f} ms" if totals['latency_p95_ms'] is not None else "n/a"
+        print(f"   {folder_name}: {totals['wall_seconds']:.1f}s copying, {totals['listing_seconds']:.1f}s listing, "
+              f"{mb_per_second:,.1f} MB/s, p95 latency {p95}")
+
+
+# ---------------------------------------------------------------------------
+# Transfer
+# ---------------------------------------------------------------------------
+
+@dataclass
+class TransferConfig:
+    """Transfer settings, as read from the notebook widgets."""
+    source_path: str
+    target_path: str
+    max_workers: int = 4
+    max_dates: int = 1
+    end_date: Optional[date] = None
+    use_listing_cache: bool = True
+    skip_identical: bool = True
+    verify_checksum: bool = False
+    ledger_flush_rows: int = LEDGER_FLUSH_ROWS
+    max_file_attempts: int = MAX_FILE_ATTEMPTS  # Failed copies of a file before it is given up
+    cleanup_workers: int = 16
+    compact_small_files: bool = False
+    compaction_small_file_bytes: int = COMPACTION_SMALL_FILE_BYTES
+    compaction_target_bytes: int = COMPACTION_TARGET_BYTES
+    compaction_folders: Tuple[str, ...] = ()  # Folders to compact (all folders if empty)
+
+
+class VolumeTransfer:
+    """
+    Incremental transfer of dated export files from a source to a target volume.
+
+    All folders process the same simulation dates on each run. Files are listed and
+    copied through `storage`, and progress is recorded in `store`; ledger and tracking
+    rows are buffered and written in one append per table per batch.
+    """
+
+    def __init__(self, config: TransferConfig, storage: StorageBackend, store: TrackingStore):
+        self.config = config
+        self.storage = storage
+        self.store = store
+        self.tracking_buffer: List[Tuple] = []
+        self.ledger_buffer: List[Tuple] = []
+        self.telemetry_buffer: List[Tuple] = []
+        # Seconds spent listing each folder this run (0 for folders served from the listing cache)
+        self.listing_seconds: Dict[str, float] = {}
+
+    def initialize(self, restart: bool = False):
+        """
+        Initialize the tracking store; on restart, drop its state and clean up the target volume.
+
+        Args:
+            restart: If True, start the transfer from scratch
+        """
+        self.store.initialize(recreate=restart)
+        if restart:
+            # Clean up target volume if restart is requested
+            self.cleanup_target_volume(self.config.target_path)
+            print(f"✅ Target volume cleaned up: {self.config.target_path}")
+
+    def cleanup_target_volume(self, target_path: str, dry_run: bool = False) -> Dict:
+        """
+        Delete all subdirectories and files from the target volume, bottom-up and in parallel.
+
+        This function is used when restart=True to ensure a clean slate for the file
+        transfer process. The root volume path itself and hidden top-level entries
+        (starting with '.') are preserved. The tree is listed level by level with
+        cleanup_workers concurrent listings; then files are deleted in batches of
+        CLEANUP_BATCH_SIZE on cleanup_workers threads, and finally directories,
+        deepest level first. Progress (objects/s) is printed every
+        CLEANUP_PROGRESS_SECONDS.
+
+        Args:
+            target_path: Target volume path to clean up
+            dry_run: If True, only report the objects and bytes that would be deleted
+
+        Returns:
+            Dictionary with 'files', 'directories', 'bytes', 'deleted', 'errors' (list) and 'seconds'
+        """
+        print(f"🧹 {'Dry run - scanning' if dry_run else 'Cleaning up'} target volume: {target_path}")
+        start = time.perf_counter()
+        cleanup_stats = {'files': 0, 'directories': 0, 'bytes': 0, 'deleted': 0, 'errors': [], 'seconds': 0.0}
+
+        tree = self.walk_target_tree(target_path)
+        if tree is None:
+            # Target volume doesn't exist yet
+            print("  ℹ️  Target volume does not exist yet or is empty")
+            return cleanup_stats
+
+        files, directories_by_depth = tree
+        cleanup_stats['files'] = len(files)
+        cleanup_stats['directories'] = sum(len(dirs) for dirs in directories_by_depth.values())
+        cleanup_stats['bytes'] = sum(item.size for item in files)
+        total = cleanup_stats['files'] + cleanup_stats['directories']
+
+        if total == 0:
+            print("  ℹ️  Target volume is already empty")
+            return cleanup_stats
+
+        print(f"  Found {cleanup_stats['files']:,} file(s) and {cleanup_stats['directories']:,} directory(ies), "
+              f"{cleanup_stats['bytes']:,} bytes ({time.perf_counter() - start:.1f}s, "
+              f"{len(directories_by_depth)} level(s))")
+
+        if dry_run:
+            cleanup_stats['seconds'] = time.perf_counter() - start
+            print(f"✅ Dry run complete: {total:,} object(s), {cleanup_stats['bytes']:,} bytes would be deleted")
+            return cleanup_stats
+
+        progress = {'start': time.perf_counter(), 'last_report': time.perf_counter(), 'total': total}
+
+        # Files first, then directories from the deepest level up, so every rm removes a leaf
+        self._delete_in_batches(files, False, cleanup_stats, progress)
+        for depth in sorted(directories_by_depth, reverse=True):
+            self._delete_in_batches(directories_by_depth[depth], True, cleanup_stats, progress)
+
+        cleanup_stats['seconds'] = time.perf_counter() - start
+        elapsed = time.perf_counter() - progress['start']
+        print(f"✅ Cleanup complete: {cleanup_stats['deleted']:,} object(s) deleted, {cleanup_stats['bytes']:,} bytes "
+              f"in {elapsed:.1f}s ({cleanup_stats['deleted'] / max(elapsed, 1e-9):,.0f} objects/s)")
+        if cleanup_stats['errors']:
+            print(f"⚠️  {len(cleanup_stats['errors'])} object(s) failed to delete")
+            for error in cleanup_stats['errors'][:10]:
+                print(f"  - {error}")
+        return cleanup_stats
+
+    def walk_target_tree(self, target_path: str) -> Optional[Tuple[List[FileEntry], Dict[int, List[FileEntry]]]]:
+        """
+        List the tree below target_path level by level, listing each level's directories concurrently.
+
+        Hidden top-level entries (starting with '.') are left out.
+
+        Returns:
+            Tuple of (files, depth -> directories), or None if target_path does not exist
+        """
+        try:
+            level = [item for item in self.storage.ls(target_path) if not item.name.startswith('.')]
+        except FileNotFoundError:
+            return None
+
+        def list_directory(path: str) -> List[FileEntry]:
+            try:
+                return self.storage.ls(path)
+            except Exception as e:
+                # The directory is still removed recursively with its level
+                print(f"  ⚠️  Could not list {path}: {e}")
+                return []
+
+        files: List[FileEntry] = []
+        directories_by_depth: Dict[int, List[FileEntry]] = {}
+        depth = 0
+        with ThreadPoolExecutor(max_workers=self.config.cleanup_workers) as executor:
+            while level:
+                directories = [item for item in level if item.is_dir]
+                files.extend(item for item in level if not item.is_dir)
+                if directories:
+                    directories_by_depth[depth] = directories
+                level = [
+                    child
+                    for listing in executor.map(list_directory, [item.path for item in directories])
+                    for child in listing
+                ]
+                depth += 1
+
+        return files, directories_by_depth
+
+    def _delete_in_batches(self, entries: List[FileEntry], recurse: bool, cleanup_stats: Dict, progress: Dict):
+        """Delete entries in batches of CLEANUP_BATCH_SIZE on cleanup_workers threads, reporting progress."""
+        def delete_batch(batch: List[FileEntry]) -> Tuple[int, List[str]]:
+            deleted, errors = 0, []
+            for item in batch:
+                try:
+                    self.storage.rm(item.path, recurse=recurse)
+                    deleted += 1
+                except Exception as e:
+                    errors.append(f"{item.path}: {e}")
+            return deleted, errors
+
+        def record(future):
+            deleted, errors = future.result()
+            cleanup_stats['deleted'] += deleted
+            cleanup_stats['errors'].extend(errors)
+            now = time.perf_counter()
+            if now - progress['last_report'] >= CLEANUP_PROGRESS_SECONDS:
+                progress['last_report'] = now
+                rate = cleanup_stats['deleted'] / max(now - progress['start'], 1e-9)
+                print(f"  🧹 {cleanup_stats['deleted']:,}/{progress['total']:,} object(s) deleted "
+                      f"({rate:,.0f} objects/s)")
+
+        batches = [entries[i:i + CLEANUP_BATCH_SIZE] for i in range(0, len(entries), CLEANUP_BATCH_SIZE)]
+        max_in_flight = self.config.cleanup_workers * 2
+        with ThreadPoolExecutor(max_workers=self.config.cleanup_workers) as executor:
+            in_flight = set()
+            for batch in batches:
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future)
+                in_flight.add(executor.submit(delete_batch, batch))
+            for future in as_completed(in_flight):
+                record(future)
+
+    # -- Discovery -----------------------------------------------------------
+
+    def get_export_folders(self, base_path: str) -> Dict[str, int]:
+        """
+        Discover all subdirectories in the export path.
+
+        Returns:
+            Dictionary of folder name -> directory modification time in ms
+            (0 if the storage does not report one), sorted by name
+        """
+        try:
+            folders = {
+                item.name: item.modification_time
+                for item in self.storage.ls(base_path) if item.is_dir and not item.name.startswith('.')
+            }
+            return dict(sorted(folders.items()))
+        except Exception as e:
+            print(f"❌ Error listing folders: {e}")
+            return {}
+
+    def list_folder(
+        self,
+        folder_path: str,
+        folder_name: str,
+        cached_entries: Dict[str, Dict],
+        watermark: Optional[date]
+    ) -> Dict[str, Dict]:
+        """
+        List a folder once and describe each dated entry in it.
+
+        Handles three patterns:
+        1. YYYY-MM-DD_filename.ext (direct files)
+        2. YYYY-MM-DD/files (date folders)
+        3. YYYY-MM-DD.ext (simple dated files)
+
+        Date folders on or before the watermark reuse their cached files; every other
+        date folder is listed. A date folder's modification time is not relied on, since
+        object stores do not always update it when a file is added.
+
+        Args:
+            folder_path: Full path to folder
+            folder_name: Folder name for pattern detection
+            cached_entries: Previously cached entries for this folder (may be empty)
+            watermark: Last processed simulation date (None to re-list all date folders)
+
+        Returns:
+            Dictionary of entry name -> {'date', 'modification_time', 'files'}
+            where files is a list of (file_path, size_bytes, modification_time)
+        """
+        entries: Dict[str, Dict] = {}
+
+        try:
+            for item in self.storage.ls(folder_path):
+                item_date = parse_entry_date(item.name)
+                if item_date is None:
+                    continue
+
+                if item.is_dir:
+                    cached = cached_entries.get(item.name)
+                    if cached is not None and watermark is not None and item_date <= watermark:
+                        files = cached['files']
+                    else:
+                        # If it's a date folder, get all files inside
+                        files = [
+                            (sub_item.path, sub_item.size, sub_item.modification_time)
+                            for sub_item in self.storage.ls(item.path)
+                            if not sub_item.is_dir
+                        ]
+                else:
+                    # Direct file with date
+                    files = [(item.path, item.size, item.modification_time)]
+
+                if files:
+                    entries[item.name] = {'date': item_date, 'modification_time': item.modification_time, 'files': files}
+
+            return entries
+
+        except Exception as e:
+            print(f"⚠️  Error reading folder {folder_name}: {e}")
+            return {}
+
+    def build_source_inventory(self, base_path: str, watermark: Optional[date] = None) -> SourceInventory:
+        """
+        Walk the source volume once and index every dated file by folder and date.
+
+        With use_listing_cache, a folder is served from the listing cache without listing
+        only if its modification time is unchanged since the last run and none of its
+        cached entries is dated after the watermark. A folder's modification time does
+        not change when a file is added inside one of its date folders, so folders with
+        pending dates are always listed. Within listed folders, date folders on or before
+        the watermark are not re-listed. Listed folders are listed concurrently (up to
+        max_workers) and written back to the cache.
+
+        Args:
+            base_path: Base source volume path
+            watermark: Last processed simulation date (None if first run)
+
+        Returns:
+            Dictionary of folder name -> date -> list of (file_path, size_bytes, modification_time)
+        """
+        calls_before = self.storage.listing_calls
+        folders = self.get_export_folders(base_path)
+        cache = self.store.load_listing_cache() if self.config.use_listing_cache else {}
+
+        listings: Dict[str, Dict] = {}
+        to_list = []
+        for folder_name, folder_mtime in folders.items():
+            cached = cache.get(folder_name)
+            unchanged = (
+                cached is not None and folder_mtime and cached['modification_time'] == folder_mtime
+                and watermark is not None
+                and all(entry['date'] <= watermark for entry in cached['entries'].values())
+            )
+            if unchanged:
+                listings[folder_name] = cached
+            else:
+                to_list.append(folder_name)
+
+        def timed_list_folder(folder_name: str) -> Dict[str, Dict]:
+            start = time.perf_counter()
+            entries = self.list_folder(
+                f"{base_path}/{folder_name}",
+                folder_name,
+                cache.get(folder_name, {}).get('entries', {}),
+                watermark
+            )
+            self.listing_seconds[folder_name] = time.perf_counter() - start
+            return entries
+
+        self.listing_seconds = {folder_name: 0.0 for folder_name in folders}
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+            listed = executor.map(timed_list_folder, to_list)
+            changed = {
+                folder_name: {'modification_time': folders[folder_name], 'entries': entries}
+                for folder_name, entries in zip(to_list, listed)
+            }
+
+        listings.update(changed)
+        if self.config.use_listing_cache:
+            self.store.save_listing_cache(changed)
+
+        inventory: SourceInventory = {}
+        for folder_name in folders:
+            files_by_date = inventory.setdefault(folder_name, {})
+            for entry in listings[folder_name]['entries'].values():
+                files_by_date.setdefault(entry['date'], []).extend(entry['files'])
+
+        total_files = sum(len(files) for dates in inventory.values() for files in dates.values())
+        print(f"🗂️  Inventory built: {len(inventory)} folder(s), {total_files:,} file(s)")
+        print(f"   Re-listed {len(to_list)} folder(s), {len(folders) - len(to_list)} served from cache, "
+              f"{self.storage.listing_calls - calls_before:,} listing call(s)")
+        return inventory
+
+    # -- Copy ----------------------------------------------------------------
+
+    def get_target_path(self, folder_name: str, folder_path: str, file_path: str) -> str:
+        """Get the target path of a source file, preserving its path relative to the folder."""
+        rel_path = file_path.replace(f"{folder_path}/", "")
+        return f"{self.config.target_path}/{folder_name}/{rel_path}"
+
+    def transfer_file(self, folder_name: str, folder_path: str, file_path: str, file_size: int) -> Dict:
+        """
+        Copy one file to the target volume, preserving its path relative to the folder.
+
+        This function is designed to be thread-safe for parallel execution.
+
+        Returns:
+            Dictionary with 'ok' (bool), 'target_path' (str), 'bytes' (int), 'error' (str or None),
+            'started' (perf_counter at the start of the copy) and 'seconds' (copy latency)
+        """
+        target_path = self.get_target_path(folder_name, folder_path, file_path)
+        started = time.perf_counter()
+
+        try:
+            self.storage.cp(file_path, target_path)
+            return {'ok': True, 'target_path': target_path, 'bytes': file_size, 'error': None,
+                    'started': started, 'seconds': time.perf_counter() - started}
+
+        except Exception as e:
+            print(f"    ❌ Failed: {file_path} - {e}")
+            return {'ok': False, 'target_path': target_path, 'bytes': 0, 'error': f"{file_path}: {str(e)}",
+                    'started': started, 'seconds': time.perf_counter() - started}
+
+    def list_target_files(self, directories: List[str]) -> Dict[str, Tuple[int, int]]:
+        """
+        List target directories once each (concurrently) and index their files.
+
+        Args:
+            directories: Target directories to list (missing directories are treated as empty)
+
+        Returns:
+            Dictionary of file path -> (size_bytes, modification_time)
+        """
+        def list_directory(directory: str) -> List[FileEntry]:
+            try:
+                return [item for item in self.storage.ls(directory) if not item.is_dir]
+            except Exception:
+                # Target directory does not exist yet
+                return []
+
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+            listings = executor.map(list_directory, directories)
+            return {item.path: (item.size, item.modification_time) for listing in listings for item in listing}
+
+    def skip_identical_files(self, tasks: List[Tuple]) -> Tuple[List[Tuple], List[Tuple[Tuple, Dict]]]:
+        """
+        Split copy tasks into files that need copying and files already identical in the target.
+
+        A target file is identical if it has the same size and is not older than the source.
+        With verify_checksum, files that pass that check are also compared by MD5 checksum.
+
+        Args:
+            tasks: Copy tasks from plan_transfers_for_date
+
+        Returns:
+            Tuple of (tasks to copy, [(task, result)] for identical files)
+        """
+        if not tasks:
+            return [], []
+
+        target_paths = [self.get_target_path(task[0], task[1], task[3]) for task in tasks]
+        target_files = self.list_target_files(sorted({path.rsplit('/', 1)[0] for path in target_paths}))
+
+        def compare(task: Tuple, target_path: str) -> Optional[Dict]:
+            target = target_files.get(target_path)
+            if target is None or target[0] != task[4] or (task[5] and target[1] < task[5]):
+                return None
+            checksum = None
+            if self.config.verify_checksum:
+                checksum = self.storage.checksum(task[3])
+                if checksum != self.storage.checksum(target_path):
+                    return None
+            return {'ok': True, 'skipped': True, 'target_path': target_path, 'bytes': task[4],
+                    'checksum': checksum, 'error': None}
+
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+            comparisons = list(executor.map(compare, tasks, target_paths))
+
+        to_copy = [task for task, result in zip(tasks, comparisons) if result is None]
+        identical = [(task, result) for task, result in zip(tasks, comparisons) if result is not None]
+        return to_copy, identical
+
+    def transfer_batch(self, batch: List[Tuple]) -> List[Tuple[Tuple, Dict]]:
+        """Run one work item: copy a single file, or compact a group of small files."""
+        if len(batch) == 1:
+            task = batch[0]
+            return [(task, self.transfer_file(task[0], task[1], task[3], task[4]))]
+        return self.compact_files(batch)
+
+    def plan_compaction(self, tasks: List[Tuple]) -> List[List[Tuple]]:
+        """
+        Group copy tasks into work items, merging small files of each folder and date.
+
+        CSV and Parquet files of up to compaction_small_file_bytes (in compaction_folders,
+        or any folder if it is empty) that land in the same target directory are grouped
+        by simulation date and format, in chunks of about compaction_target_bytes. Other
+        files, and groups of a single file, are copied as they are.
+
+        Args:
+            tasks: Copy tasks from plan_transfers_for_date
+
+        Returns:
+            List of work items in date order - one task to copy, or several to compact
+        """
+        config = self.config
+        groups: Dict[Tuple, List[Tuple]] = {}
+        batches: List[List[Tuple]] = []
+        for task in tasks:
+            folder_name, folder_path, simulation_date, file_path, file_size, _ = task
+            extension = os.path.splitext(file_path)[1].lower()
+            if (extension in COMPACTION_FORMATS and file_size <= config.compaction_small_file_bytes
+                    and (not config.compaction_folders or folder_name in config.compaction_folders)):
+                target_directory = self.get_target_path(folder_name, folder_path, file_path).rsplit('/', 1)[0]
+                groups.setdefault((simulation_date, folder_name, target_directory, extension), []).append(task)
+            else:
+                batches.append([task])
+
+        for group in groups.values():
+            if len(group) == 1:
+                batches.append(group)
+                continue
+            chunk, chunk_bytes = [], 0
+            for task in sorted(group, key=lambda task: task[3]):
+                chunk.append(task)
+                chunk_bytes += task[4]
+                if chunk_bytes >= config.compaction_target_bytes:
+                    batches.append(chunk)
+                    chunk, chunk_bytes = [], 0
+            if chunk:
+                batches.append(chunk)
+
+        # Keep date order so dates still complete (and are committed) in sequence
+        return sorted(batches, key=lambda batch: batch[0][2])
+
+    def compact_files(self, batch: List[Tuple]) -> List[Tuple[Tuple, Dict]]:
+        """
+        Merge a group of small files of one folder and date into one target file.
+
+        Every record gets the target path its file would have had in LINEAGE_COLUMN. The
+        output is named after the date and a hash of its source paths, so a re-run of the
+        same group rewrites the same file. Files that cannot be merged (different header
+        or schema, or a failed compaction) are copied as they are.
+
+        Args:
+            batch: Copy tasks of one folder, date, target directory and format
+
+        Returns:
+            List of (task, result) for every file of the batch
+        """
+        started = time.perf_counter()
+        folder_name, _, simulation_date, file_path, _, _ = batch[0]
+        lineage_paths = [self.get_target_path(task[0], task[1], task[3]) for task in batch]
+        extension = os.path.splitext(file_path)[1].lower()
+        digest = hashlib.md5("\n".join(task[3] for task in batch).encode('utf-8')).hexdigest()[:12]
+        output_path = f"{lineage_paths[0].rsplit('/', 1)[0]}/{simulation_date}_compacted_{digest}{extension}"
+        compact = compact_csv_files if extension == '.csv' else compact_parquet_files
+
+        try:
+            merged = set(compact(self.storage, [(task[3], path) for task, path in zip(batch, lineage_paths)], output_path))
+        except Exception as e:
+            print(f"    ⚠️  Compaction failed for {folder_name} {simulation_date}, copying files instead: {e}")
+            merged = set()
+        finished = time.perf_counter()
+
+        results = []
+        for index, task in enumerate(batch):
+            if index in merged:
+                results.append((task, {
+                    'ok': True, 'compacted': True, 'target_path': output_path, 'bytes': task[4], 'error': None,
+                    'started': started, 'seconds': (finished - started) / len(batch), 'finished': finished
+                }))
+            else:
+                results.append((task, self.transfer_file(task[0], task[1], task[3], task[4])))
+        return results
+
+    # -- Tracking ------------------------------------------------------------
+
+    def update_tracking(self, simulation_date: date, date_stats: Dict):
+        """
+        Record the results for a simulation date in the tracking buffer.
+
+        Buffered rows are written to the tracking store by flush_transfer_log, in one
+        write per batch rather than one per date.
+        """
+        self.tracking_buffer.append((
+            simulation_date,
+            date_stats['total_folders_found'],
+            date_stats['folders_with_files'],
+            date_stats['folders_skipped'],
+            date_stats['total_files_transferred'],
+            date_stats['total_bytes_transferred'],
+            datetime.now(),
+            date_stats['status']
+        ))
+
+        print("\n📊 Tracking Recorded:")
+        print(f"   Simulation Date: {simulation_date}")
+        print(f"   Folders with files: {date_stats['folders_with_files']}/{date_stats['total_folders_found']}")
+        print(f"   Folders skipped: {date_stats['folders_skipped']}")
+        print(f"   Total files: {date_stats['total_files_transferred']}")
+        print(f"   Total bytes: {date_stats['total_bytes_transferred']:,}")
+        if date_stats['files_given_up']:
+            print(f"   Files given up: {len(date_stats['files_given_up'])}")
+        print(f"   Status: {date_stats['status']}")
+
+    def record_ledger(self, task: Tuple, result: Dict, attempt: int = 1, given_up: bool = False):
+        """
+        Buffer one ledger row for a copy attempt.
+
+        Args:
+            task: Copy task (folder_name, folder_path, simulation_date, file_path, file_size, modification_time)
+            result: Result returned by transfer_file
+            attempt: Copy attempt of this file version (1 for the first)
+            given_up: Whether this failed attempt was the file's last ('failed_permanent')
+        """
+        folder_name, _, simulation_date, file_path, file_size, modification_time = task
+        self.ledger_buffer.append((
+            simulation_date,
+            folder_name,
+            file_path,
+            result['target_path'],
+            file_size,
+            modification_time,
+            result.get('checksum'),
+            'failed_permanent' if given_up else ledger_status(result),
+            result['error'],
+            datetime.now(),
+            attempt
+        ))
+
+    def record_telemetry(self, simulation_date: date, folder_name: str, folder_stats: Dict, listing_seconds: float):
+        """
+        Buffer the telemetry row of one folder for a simulation date.
+
+        Args:
+            simulation_date: The simulation date that was processed
+            folder_name: Folder name
+            folder_stats: Per-folder accumulator from transfer_files_for_dates
+            listing_seconds: Time spent listing the folder (counted on its first date of the run)
+        """
+        p50, p95, latency_max = latency_percentiles(folder_stats['latencies'])
+        wall_seconds = (folder_stats['finished'] - folder_stats['started']) if folder_stats['started'] is not None else 0.0
+        mb_per_second = folder_stats['bytes_copied'] / 1024 / 1024 / wall_seconds if wall_seconds > 0 else None
+        folder_stats.update({
+            'listing_seconds': listing_seconds,
+            'copy_seconds': sum(folder_stats['latencies']),
+            'wall_seconds': wall_seconds,
+            'latency_p95_ms': p95,
+            'mb_per_second': mb_per_second
+        })
+        self.telemetry_buffer.append((
+            simulation_date,
+            folder_name,
+            folder_stats['files_copied'],
+            folder_stats['files_skipped'],
+            folder_stats['files_failed'],
+            folder_stats['bytes_copied'],
+            listing_seconds,
+            folder_stats['copy_seconds'],
+            wall_seconds,
+            p50,
+            p95,
+            latency_max,
+            mb_per_second,
+            self.config.max_workers,
+            datetime.now(),
+            folder_stats['files_failed_permanent']
+        ))
+
+    def flush_transfer_log(self):
+        """
+        Write buffered ledger, telemetry and tracking rows, one append per table.
+
+        Ledger rows are written first, so a date is never marked as processed in the
+        tracking table without the ledger rows of its files.
+        """
+        if self.ledger_buffer:
+            rows = list(self.ledger_buffer)
+            self.store.append_ledger(rows)
+            del self.ledger_buffer[:len(rows)]
+
+        if self.telemetry_buffer:
+            rows = list(self.telemetry_buffer)
+            self.store.append_telemetry(rows)
+            del self.telemetry_buffer[:len(rows)]
+
+        if self.tracking_buffer:
+            rows = list(self.tracking_buffer)
+            self.store.upsert_tracking(rows)
+            del self.tracking_buffer[:len(rows)]
+            print(f"\n💾 Tracking table updated: {len(rows)} simulation date(s) committed")
+
+    # -- Processing ----------------------------------------------------------
+
+    def plan_transfers_for_date(
+        self,
+        target_date: date,
+        inventory: SourceInventory,
+        copied_files: Dict[str, Tuple[int, int]],
+        failed_attempts: Optional[Dict[Tuple[str, int, int], int]] = None
+    ) -> Tuple[List[Tuple], Dict]:
+        """
+        Build the copy tasks for one simulation date across all folders.
+
+        Files the ledger records as already copied (same size and modification time)
+        are not planned again; they count towards the date's totals. Files that already
+        failed max_file_attempts times (same size and modification time) are not planned
+        either; they are listed in the date's 'files_given_up'.
+
+        Args:
+            target_date: The simulation date to process
+            inventory: Source inventory built by build_source_inventory
+            copied_files: Files already copied, from the tracking store
+            failed_attempts: Failed copy attempts per file version, from the tracking store
+
+        Returns:
+            Tuple of (tasks, date_stats) where each task is
+            (folder_name, folder_path, simulation_date, file_path, file_size, modification_time)
+            and date_stats holds the folder counts and already-copied totals for the date,
+            the previous failed attempts of each planned file under 'attempts', and a
+            per-folder telemetry accumulator under 'folders'
+        """
+        failed_attempts = failed_attempts or {}
+        tasks = []
+        date_stats = {
+            'total_folders_found': len(inventory),
+            'folders_with_files': 0,
+            'folders_skipped': 0,
+            'total_files_transferred': 0,
+            'total_bytes_transferred': 0,
+            'files_resumed': 0,
+            'files_skipped': 0,
+            'bytes_skipped': 0,
+            'bytes_copied': 0,
+            'files_compacted': 0,
+            'errors': [],
+            'files_given_up': [],
+            'attempts': {},
+            'folders': {}
+        }
+
+        for folder_name in sorted(inventory):
+            files = get_files_for_date(inventory, folder_name, target_date)
+
+            if not files:
+                date_stats['folders_skipped'] += 1
+                continue
+
+            date_stats['folders_with_files'] += 1
+            folder_stats = date_stats['folders'][folder_name] = {
+                'files_copied': 0,
+                'files_skipped': 0,
+                'files_failed': 0,
+                'files_failed_permanent': 0,
+                'bytes_copied': 0,
+                'latencies': [],
+                'started': None,
+                'finished': None
+            }
+            folder_path = f"{self.config.source_path}/{folder_name}"
+            for file_path, file_size, modification_time in files:
+                if copied_files.get(file_path) == (file_size, modification_time):
+                    folder_stats['files_skipped'] += 1
+                    date_stats['files_resumed'] += 1
+                    date_stats['files_skipped'] += 1
+                    date_stats['bytes_skipped'] += file_size
+                    date_stats['total_files_transferred'] += 1
+                    date_stats['total_bytes_transferred'] += file_size
+                    continue
+                attempts = failed_attempts.get((file_path, file_size, modification_time), 0)
+                if attempts >= self.config.max_file_attempts:
+                    folder_stats['files_failed_permanent'] += 1
+                    date_stats['files_given_up'].append(f"{file_path}: given up after {attempts} failed attempt(s)")
+                    continue
+                if attempts:
+                    date_stats['attempts'][file_path] = attempts
+                tasks.append((folder_name, folder_path, target_date, file_path, file_size, modification_time))
+
+        return tasks, date_stats
+
+    def transfer_files_for_dates(self, dates: List[date], inventory: SourceInventory) -> Dict[date, Dict]:
+        """
+        Transfer the files of several simulation dates through one bounded work queue.
+
+        Every (folder, date, file) copy is a separate task on a single thread pool of
+        max_workers threads, with at most max_workers * 4 tasks queued at a time. Tasks
+        are submitted in date order, and each date is recorded for the tracking table
+        as soon as it and all earlier dates have finished, so tracking never records a
+        date before the dates preceding it. Every copy is recorded in the transfer
+        ledger; files already copied by an interrupted run are skipped, and with
+        skip_identical so are files whose target copy is already identical.
+
+        With compact_small_files, small CSV and Parquet files of a folder and date are
+        merged into larger files (see plan_compaction) as one work item per output file.
+
+        Each copy's latency is recorded per folder; when a date is committed, one
+        telemetry row per folder (listing time, summed copy time, wall time from first
+        copy start to last copy end, latency p50/p95/max and MB/s) is buffered too.
+        Ledger, telemetry and tracking rows are buffered and written together when the
+        ledger buffer reaches ledger_flush_rows and at the end of the batch.
+
+        Args:
+            dates: Sorted simulation dates to process
+            inventory: Source inventory built by build_source_inventory
+
+        Returns:
+            Dictionary of simulation date -> date_stats (with status)
+        """
+        max_workers = self.config.max_workers
+        all_stats: Dict[date, Dict] = {}
+        remaining: Dict[date, int] = {}
+        tasks = []
+        copied_files = self.store.load_copied_files(dates)
+        failed_attempts = self.store.load_failed_attempts(dates)
+
+        for target_date in dates:
+            date_tasks, date_stats = self.plan_transfers_for_date(target_date, inventory, copied_files, failed_attempts)
+            all_stats[target_date] = date_stats
+            remaining[target_date] = len(date_tasks)
+            tasks.extend(date_tasks)
+            resumed = f", {date_stats['files_resumed']} already copied" if date_stats['files_resumed'] else ""
+            given_up = f", {len(date_stats['files_given_up'])} given up" if date_stats['files_given_up'] else ""
+            print(f"  📅 {target_date}: {len(date_tasks)} file(s) in {date_stats['folders_with_files']} folder(s), "
+                  f"{date_stats['folders_skipped']} folder(s) skipped{resumed}{given_up}")
+
+        commit_queue = list(dates)
+        # Listing time is counted once per folder, on its first date in this batch
+        unreported_listing = dict(self.listing_seconds)
+
+        def commit_ready_dates():
+            # Commit completed dates strictly in date order
+            while commit_queue and remaining[commit_queue[0]] == 0:
+                ready_date = commit_queue.pop(0)
+                self.update_tracking(ready_date, finalize_date_stats(all_stats[ready_date]))
+                for folder_name, folder_stats in all_stats[ready_date]['folders'].items():
+                    self.record_telemetry(ready_date, folder_name, folder_stats,
+                                          unreported_listing.pop(folder_name, 0.0))
+            if len(self.ledger_buffer) >= self.config.ledger_flush_rows:
+                self.flush_transfer_log()
+
+        def record(task, result):
+            date_stats = all_stats[task[2]]
+            folder_stats = date_stats['folders'][task[0]]
+            attempt = date_stats['attempts'].get(task[3], 0) + 1
+            given_up = not result['ok'] and attempt >= self.config.max_file_attempts
+            self.record_ledger(task, result, attempt, given_up)
+            if 'seconds' in result:
+                folder_stats['latencies'].append(result['seconds'])
+                finished = result.get('finished', result['started'] + result['seconds'])
+                if folder_stats['started'] is None or result['started'] < folder_stats['started']:
+                    folder_stats['started'] = result['started']
+                if folder_stats['finished'] is None or finished > folder_stats['finished']:
+                    folder_stats['finished'] = finished
+            if result['ok']:
+                date_stats['total_files_transferred'] += 1
+                date_stats['total_bytes_transferred'] += result['bytes']
+                if result.get('skipped'):
+                    date_stats['files_skipped'] += 1
+                    date_stats['bytes_skipped'] += result['bytes']
+                    folder_stats['files_skipped'] += 1
+                else:
+                    date_stats['bytes_copied'] += result['bytes']
+                    date_stats['files_compacted'] += 1 if result.get('compacted') else 0
+                    folder_stats['files_copied'] += 1
+                    folder_stats['bytes_copied'] += result['bytes']
+            elif given_up:
+                print(f"    ⛔ Giving up after {attempt} failed attempt(s): {task[3]}")
+                date_stats['files_given_up'].append(f"{result['error']} (given up after {attempt} attempt(s))")
+                folder_stats['files_failed'] += 1
+                folder_stats['files_failed_permanent'] += 1
+            else:
+                date_stats['errors'].append(result['error'])
+                folder_stats['files_failed'] += 1
+            remaining[task[2]] -= 1
+
+        if self.config.skip_identical:
+            tasks, identical = self.skip_identical_files(tasks)
+            for task, result in identical:
+                record(task, result)
+            if identical:
+                print(f"  ⏭️  {len(identical)} file(s) already identical in target "
+                      f"({sum(result['bytes'] for _, result in identical):,} bytes skipped)")
+
+        # Work items: one copy task, or a group of small files to compact into one file
+        if self.config.compact_small_files:
+            batches = self.plan_compaction(tasks)
+            compacted = sum(len(batch) for batch in batches if len(batch) > 1)
+            if compacted:
+                print(f"  🗜️  {compacted} small file(s) to compact into "
+                      f"{sum(1 for batch in batches if len(batch) > 1)} file(s)")
+        else:
+            batches = [[task] for task in tasks]
+
+        max_in_flight = max_workers * 4
+        print(f"\n  ⚡ Transferring {len(tasks)} file(s) for {len(dates)} date(s) "
+              f"({'sequential' if max_workers == 1 else f'max {max_workers} workers'})...")
+
+        try:
+            commit_ready_dates()  # Dates without any files to copy
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                in_flight = set()
+                for batch in batches:
+                    if len(in_flight) >= max_in_flight:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            for task, result in future.result():
+                                record(task, result)
+                        commit_ready_dates()
+
+                    in_flight.add(executor.submit(self.transfer_batch, batch))
+
+                for future in as_completed(in_flight):
+                    for task, result in future.result():
+                        record(task, result)
+                    commit_ready_dates()
+        finally:
+            # Persist completed dates and copied files even if the run is interrupted
+            self.flush_transfer_log()
+
+        self.store.compact()
+
+        return all_stats
+
+    def process_all_folders(self, specific_date: Optional[str] = None) -> Dict[date, Dict]:
+        """
+        Main processing function - processes all folders for the next simulation date(s).
+
+        All folders are synchronized to process the same simulation dates on each run.
+        Folders without files for a date are skipped (not an error). Up to max_dates
+        pending dates (optionally bounded by end_date) are transferred in one run.
+
+        Args:
+            specific_date: Optional specific date to process (YYYY-MM-DD)
+
+        Returns:
+            Dictionary of simulation date -> date_stats (empty if nothing was processed)
+        """
+        print("=" * 80)
+        print("🚀 Starting Incremental File Transfer (Global Simulation Date)")
+        print("=" * 80)
+
+        # 1. Discover all export folders and their dated files in a single pass
+        last_processed_global = self.store.last_processed_date()
+        inventory = self.build_source_inventory(self.config.source_path, watermark=last_processed_global)
+        folders = sorted(inventory)
+
+        if not folders:
+            print("❌ No export folders found!")
+            return {}
+
+        print(f"\n📁 Found {len(folders)} export folders")
+
+        # 2. Determine which simulation dates to process
+        if specific_date:
+            # User specified a specific date
+            target_dates = [datetime.strptime(specific_date, '%Y-%m-%d').date()]
+            print(f"🎯 User-specified simulation date: {target_dates[0]}")
+        else:
+            if last_processed_global:
+                print(f"✓ Last processed simulation date: {last_processed_global}")
+            else:
+                print("ℹ️  First run - no previous simulation dates processed")
+
+            target_dates = get_pending_simulation_dates(
+                last_processed_global, inventory, self.config.max_dates, self.config.end_date
+            )
+
+        if not target_dates:
+            print("\n✅ All simulation dates have been processed!")
+            print("=" * 80)
+            return {}
+
+        print(f"\n{'='*80}")
+        if len(target_dates) == 1:
+            print(f"📅 Processing Simulation Date: {target_dates[0]}")
+        else:
+            print(f"📅 Processing {len(target_dates)} Simulation Dates: {target_dates[0]} → {target_dates[-1]}")
+        print(f"{'='*80}\n")
+
+        # 3. Transfer all files for these simulation dates (tracking is updated per date, in order)
+        all_stats = self.transfer_files_for_dates(target_dates, inventory)
+
+        # 4. Print summary
+        print("\n" + "=" * 80)
+        print("📊 Simulation Date Summary")
+        print("=" * 80)
+        for target_date, date_stats in all_stats.items():
+            print(f"Simulation Date: {target_date} | "
+                  f"Folders with files: {date_stats['folders_with_files']} | "
+                  f"Folders skipped: {date_stats['folders_skipped']} | "
+                  f"Files: {date_stats['total_files_transferred']} | "
+                  f"Bytes: {date_stats['total_bytes_transferred']:,} | "
+                  f"Copied: {date_stats['bytes_copied']:,} B | "
+                  f"Skipped: {date_stats['files_skipped']} file(s), {date_stats['bytes_skipped']:,} B | "
+                  f"Compacted: {date_stats['files_compacted']} file(s) | "
+                  f"Status: {date_stats['status']}")
+
+        print_folder_telemetry(all_stats)
+
+        errors = [error for date_stats in all_stats.values() for error in date_stats['errors']]
+        given_up = [error for date_stats in all_stats.values() for error in date_stats['files_given_up']]
+        if len(all_stats) > 1:
+            print(f"\nTotal files transferred: {sum(d['total_files_transferred'] for d in all_stats.values())}")
+            print(f"Total bytes transferred: {sum(d['total_bytes_transferred'] for d in all_stats.values()):,}")
+        print(f"Bytes copied: {sum(d['bytes_copied'] for d in all_stats.values()):,} | "
+              f"Bytes skipped (already in target): {sum(d['bytes_skipped'] for d in all_stats.values()):,}")
+
+        if given_up:
+            print(f"\n⛔ Files given up (not retried; see status 'failed_permanent' in the ledger): {len(given_up)}")
+            for error in given_up[:10]:
+                print(f"  - {error}")
+            if len(given_up) > 10:
+                print(f"  ... and {len(given_up) - 10} more")
+
+        if errors:
+            print(f"\n❌ Errors encountered: {len(errors)}")
+            for error in errors[:10]:
+                print(f"  - {error}")
+            if len(errors) > 10:
+                print(f"  ... and {len(errors) - 10} more")
+        elif not given_up:
+            print("\n✅ All transfers completed successfully!")
+
+        print("=" * 80)
+        return all_stats
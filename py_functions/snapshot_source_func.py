@@ -0,0 +1,209 @@
+"""
+Snapshot CDC source functions for append-only bronze tables.
+
+TMPL008 needs a function that, given the last processed snapshot version, returns the
+next snapshot's rows and version. make_snapshot_source builds such a function for any
+bronze table whose snapshot version can be derived from the source file path, e.g.
+weekly full extracts named "2024-01-08_product.csv" plus "HIST_" baseline files.
+
+Each source reads a small index (<table>_snapshot_index) with the row count of every
+source file and its snapshot version. The index is a materialized view over the bronze
+table, defined next to it in the bronze flowgroup, so the pipeline keeps it in step with
+the table (including full refreshes); source functions only read it. Snapshot rows are
+selected with a plain column filter that Spark can push down rather than a per-row
+regexp over _source_file_path.
+
+When a source is several snapshots behind, the pending versions are looked up once per
+update from the in-process index, and each call reads only its own snapshot's rows
+through that pruned filter. Progress (snapshots applied per second, and the estimated
+time remaining) is logged through this module's logger, which lands in the driver log
+of the pipeline update.
+"""
+
+import logging
+import re
+import time
+from bisect import bisect_right
+from typing import Callable, List, Optional, Tuple
+from pyspark.sql.functions import col, lit
+from pyspark.sql import DataFrame
+
+logger = logging.getLogger(__name__)
+
+SnapshotSource = Callable[[Optional[str]], Optional[Tuple[DataFrame, str]]]
+
+
+def make_snapshot_source(
+    table: str,
+    version_pattern: str = r"(\d{4}-\d{2}-\d{2})",
+    baseline_marker: Optional[str] = None,
+    baseline_version: str = "2000-01-01",
+    version_column: str = "_snapshot_date",
+    source_column: str = "_source_file_path",
+    index_table: Optional[str] = None,
+) -> SnapshotSource:
+    """
+    Build a snapshot CDC source function for an append-only bronze table.
+
+    If the bronze table already persists version_column (TMPL004 with
+    snapshot_date_column: true), snapshots are selected by equality on that column so
+    Delta data skipping prunes files from other snapshots. Rows written before the
+    column existed are matched through the index's file list instead.
+
+    index_table is a materialized view with one row per source file: source_column,
+    version_column when the bronze table persists it, and row_count, e.g.
+
+        SELECT _source_file_path, _snapshot_date, count(*) AS row_count
+        FROM <table> GROUP BY ALL
+
+    Files without a persisted version are assigned one from version_pattern and
+    baseline_marker, once per file.
+
+    Args:
+        table: Fully qualified bronze table name
+        version_pattern: Regex whose first group extracts the version from source_column
+        baseline_marker: Substring marking baseline files (e.g., 'HIST_'), or None
+        baseline_version: Version assigned to baseline files
+        version_column: Column holding the snapshot version in the returned DataFrame
+        source_column: Column holding the source file path
+        index_table: Snapshot index materialized view (defaults to '<table>_snapshot_index')
+
+    Returns:
+        Function taking the latest processed snapshot version (or None) and returning
+        a (DataFrame, version) tuple for the next snapshot, or None when caught up
+    """
+    index_table = index_table or f"{table}_snapshot_index"
+    version_regex = re.compile(version_pattern)
+
+    # In-process copy of the index, reloaded whenever the source has caught up
+    state = {
+        "files": None,          # version -> source files
+        "next": {},             # version -> next version
+        "persisted": False,     # bronze table has version_column
+        "pending": 0,           # snapshots pending when the update started
+        "applied": 0,           # snapshots returned during this update
+        "started": None,        # monotonic time of the first returned snapshot
+    }
+
+    def derive_version(path: str) -> str:
+        """Version of a source file written before the bronze table persisted version_column."""
+        if baseline_marker and baseline_marker in path:
+            return baseline_version
+        match = version_regex.search(path)
+        return match.group(1) if match else ""
+
+    def load_index() -> None:
+        state["persisted"] = version_column in spark.table(table).columns
+        index = spark.table(index_table)
+        indexed_version = version_column in index.columns
+
+        # One row per source file (and version), so versions are derived once per file, never per row
+        files = {}
+        for row in index.select(*index.columns).collect():
+            path = row[source_column]
+            version = (row[version_column] if indexed_version else None) or derive_version(path)
+            if version and path not in files.setdefault(version, []):
+                files[version].append(path)
+
+        state["files"] = dict(sorted(files.items()))
+        versions = list(state["files"])
+        state["next"] = dict(zip([None] + versions, versions + [None]))
+
+    def lookup_next(latest_snapshot_version: Optional[str]) -> Optional[str]:
+        if latest_snapshot_version in state["next"]:
+            return state["next"][latest_snapshot_version]
+
+        # Version not in the index (e.g. processed before a file was removed) - fall back to a search
+        versions = list(state["files"])
+        position = bisect_right(versions, latest_snapshot_version)
+        return versions[position] if position < len(versions) else None
+
+    def snapshot_filter(version: str, files: List[str]):
+        if not state["persisted"]:
+            return col(source_column).isin(files)
+        # Both branches are prunable from file statistics (min/max and null counts)
+        return (col(version_column) == lit(version)) | (
+            col(version_column).isNull() & col(source_column).isin(files)
+        )
+
+    def pending_versions(first_version: str) -> List[str]:
+        versions = list(state["files"])
+        return versions[versions.index(first_version):]
+
+    def record_progress(version: Optional[str]) -> None:
+        """Log snapshots applied per second; version is the snapshot about to be returned, or None when caught up."""
+        now = time.monotonic()
+        if state["started"] is None:
+            state["started"] = now
+            state["pending"] = len(pending_versions(version))
+            logger.info("%s: %d snapshot(s) pending, starting at %s", table, state["pending"], version)
+            return
+
+        state["applied"] += 1
+        elapsed = now - state["started"]
+        rate = state["applied"] / elapsed if elapsed > 0 else 0.0
+        remaining = state["pending"] - state["applied"]
+        if version is None:
+            logger.info("%s: caught up - %d snapshot(s) applied in %.1fs (%.3f snapshots/s)",
+                        table, state["applied"], elapsed, rate)
+            return
+
+        eta = f"~{remaining / rate:,.0f}s remaining" if rate > 0 else "ETA unknown"
+        logger.info("%s: %d/%d snapshot(s) applied (%.3f snapshots/s, %s), next %s",
+                    table, state["applied"], state["pending"], rate, eta, version)
+
+    def next_snapshot_and_version(
+        latest_snapshot_version: Optional[str],
+    ) -> Optional[Tuple[DataFrame, str]]:
+        if state["files"] is None:
+            load_index()
+
+        next_snapshot = lookup_next(latest_snapshot_version)
+
+        if next_snapshot is None:
+            if state["started"] is not None:
+                record_progress(None)
+            # Reload the index on the next call, so snapshots landing later are picked up
+            # by long-running (e.g. continuous) pipelines
+            state["files"] = None
+            state["started"] = None
+            state["applied"] = 0
+
+            return None  # No more snapshots to process
+
+        record_progress(next_snapshot)
+
+        df = (
+            spark.table(table)
+            .where(snapshot_filter(next_snapshot, state["files"][next_snapshot]))
+            .withColumn(version_column, lit(next_snapshot))
+        )
+
+        return (df, next_snapshot)
+
+    return next_snapshot_and_version
+
+
+_product_snapshots = make_snapshot_source(
+    "{catalog}.{bronze_schema}.bronze_sap_prd",
+    baseline_marker="HIST_",
+)
+
+
+def next_product_snapshot_and_version(
+    latest_snapshot_version: Optional[str],
+) -> Optional[Tuple[DataFrame, str]]:
+    """
+    Process product snapshots incrementally from append-only bronze table.
+
+    HIST_ files are assigned to 2000-01-01 (historical baseline).
+
+    Args:
+        latest_snapshot_version: Most recent snapshot date processed (YYYY-MM-DD format),
+                               or None for the first run
+
+    Returns:
+        Tuple of (DataFrame, snapshot_date) containing the next snapshot's data and its date,
+        or None if no more snapshots are available to process
+    """
+    return _product_snapshots(latest_snapshot_version)
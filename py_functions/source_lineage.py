@@ -0,0 +1,53 @@
+"""
+Source lineage utilities for Lakehouse Plumber pipelines.
+
+The file transfer notebook (Notebooks/03_Transfer_Files_To_Volume.py) can compact many
+small landing files into fewer larger ones. Every compacted record then carries the
+path its original file would have had in the landing volume, in the
+_original_source_file_path column. This module restores _source_file_path from that
+column, so raw tables keep per-record source lineage whether or not files were compacted.
+"""
+
+from pyspark.sql import DataFrame
+from pyspark.sql.functions import coalesce, col
+
+
+# Must match LINEAGE_COLUMN in Notebooks/volume_transfer.py
+LINEAGE_COLUMN = "_original_source_file_path"
+
+
+def restore_source_file_path(df: DataFrame, spark, parameters: dict) -> DataFrame:
+    """
+    Replace _source_file_path with the original file path of compacted records.
+
+    Records from compacted files take their _source_file_path from the lineage column;
+    records from files landed as they are keep the path of the file they were read from.
+    The lineage column is dropped. DataFrames without the lineage column (feeds that
+    were never compacted) are returned unchanged.
+
+    Args:
+        df: Input DataFrame with the _source_file_path operational metadata column
+        spark: SparkSession instance (required by LHP but unused in this function)
+        parameters: Configuration parameters from YAML:
+            - lineage_column: Optional lineage column name (defaults to '_original_source_file_path')
+            - source_file_path_column: Optional path column name (defaults to '_source_file_path')
+
+    Returns:
+        DataFrame: DataFrame with _source_file_path pointing at each record's original file.
+
+    Example:
+        >>> # In LHP YAML template:
+        >>> # - name: restore_lineage
+        >>> #   type: transform
+        >>> #   transform_type: python
+        >>> #   module_path: "py_functions/source_lineage.py"
+        >>> #   function_name: "restore_source_file_path"
+    """
+    parameters = parameters or {}
+    lineage_column = parameters.get("lineage_column", LINEAGE_COLUMN)
+    path_column = parameters.get("source_file_path_column", "_source_file_path")
+
+    if lineage_column not in df.columns:
+        return df
+
+    return df.withColumn(path_column, coalesce(col(lineage_column), col(path_column))).drop(lineage_column)
@@ -0,0 +1,116 @@
+"""
+Surrogate key utilities for Lakehouse Plumber pipelines.
+
+TMPL004 can hash a declared list of business key columns into a surrogate key with
+xxhash64 (surrogate_key_columns). A 64-bit hash can collide, and xxhash64 skips null
+arguments, so keys that only differ by which column is null (e.g. (1, null) and
+(null, 1)) hash to the same value. This module reports both, for a bronze table or any
+DataFrame, before a key is relied on downstream.
+"""
+
+from typing import Dict, List, Optional, Union
+
+from pyspark.sql import DataFrame
+from pyspark.sql.functions import col, collect_list, count, countDistinct, struct, xxhash64
+from pyspark.sql.functions import sum as sum_
+
+
+def surrogate_key_collisions(
+    source: Union[str, DataFrame],
+    spark,
+    key_columns: List[str],
+    surrogate_key_name: Optional[str] = None,
+) -> DataFrame:
+    """
+    Return the surrogate keys that more than one distinct business key hashes to.
+
+    Args:
+        source: Table name or DataFrame holding the business key columns
+        spark: SparkSession instance (used to read `source` when it is a table name)
+        key_columns: Business key columns the surrogate key is hashed from
+        surrogate_key_name: Existing surrogate key column to check; when None the key
+            is computed as xxhash64(key_columns), as TMPL004 does
+
+    Returns:
+        DataFrame: One row per colliding surrogate key, with the number of distinct
+        business keys (business_keys) and rows (rows) behind it and the colliding
+        business keys (keys, an array of structs).
+    """
+    df = spark.table(source) if isinstance(source, str) else source
+    hash_column = col(surrogate_key_name) if surrogate_key_name else xxhash64(*key_columns)
+    keyed = df.select(hash_column.alias("surrogate_key"), struct(*key_columns).alias("business_key"))
+
+    per_key = keyed.groupBy("surrogate_key", "business_key").agg(count("*").alias("rows"))
+    return (
+        per_key.groupBy("surrogate_key")
+        .agg(
+            count("*").alias("business_keys"),
+            sum_("rows").alias("rows"),
+            collect_list("business_key").alias("keys"),
+        )
+        .where(col("business_keys") > 1)
+    )
+
+
+def surrogate_key_collision_report(
+    source: Union[str, DataFrame],
+    spark,
+    key_columns: List[str],
+    surrogate_key_name: Optional[str] = None,
+    show: int = 20,
+) -> Dict[str, float]:
+    """
+    Summarise how well a surrogate key identifies the business keys it is hashed from.
+
+    Prints the summary and up to `show` colliding surrogate keys.
+
+    Args:
+        source: Table name or DataFrame holding the business key columns
+        spark: SparkSession instance
+        key_columns: Business key columns the surrogate key is hashed from
+        surrogate_key_name: Existing surrogate key column to check; when None the key
+            is computed as xxhash64(key_columns)
+        show: Number of colliding surrogate keys to print
+
+    Returns:
+        dict: rows, business_keys (distinct), surrogate_keys (distinct),
+        colliding_surrogate_keys, rows_with_null_key_column and
+        expected_random_collisions (birthday bound for a 64-bit hash,
+        business_keys^2 / 2^65).
+
+    Example:
+        >>> from surrogate_keys import surrogate_key_collision_report
+        >>> surrogate_key_collision_report(
+        ...     "acme_edw_dev.edw_bronze.bronze_sfcc_cust_addr", spark,
+        ...     key_columns=["address_id"], surrogate_key_name="cust_addr_key")
+    """
+    df = spark.table(source) if isinstance(source, str) else source
+    hash_column = col(surrogate_key_name) if surrogate_key_name else xxhash64(*key_columns)
+    null_key = " OR ".join(f"`{column}` IS NULL" for column in key_columns)
+
+    totals = df.selectExpr(
+        "count(*) AS rows",
+        f"count_if({null_key}) AS rows_with_null_key_column",
+    ).first()
+    distinct = df.select(
+        countDistinct(struct(*key_columns)).alias("business_keys"),
+        countDistinct(hash_column).alias("surrogate_keys"),
+    ).first()
+    # Not cached: cache() and unpersist() are not supported on serverless compute
+    collisions = surrogate_key_collisions(df, spark, key_columns, surrogate_key_name)
+
+    report = {
+        "rows": totals["rows"],
+        "business_keys": distinct["business_keys"],
+        "surrogate_keys": distinct["surrogate_keys"],
+        "colliding_surrogate_keys": collisions.count(),
+        "rows_with_null_key_column": totals["rows_with_null_key_column"],
+        "expected_random_collisions": distinct["business_keys"] ** 2 / 2 ** 65,
+    }
+    for name, value in report.items():
+        print(f"{name:>28}: {value:,}" if isinstance(value, int) else f"{name:>28}: {value:.3g}")
+    if report["colliding_surrogate_keys"]:
+        for row in collisions.orderBy(col("business_keys").desc()).limit(show).collect():
+            print(f"{row['surrogate_key']:>20}: {row['business_keys']} business keys, {row['rows']:,} rows: "
+                  f"{[key.asDict() for key in row['keys']]}")
+    return report
@@ -2,31 +2,210 @@
 Timestamp conversion utilities for Lakehouse Plumber pipelines.
 
 This module provides functions to convert timestampntz (timestamp without timezone)
-columns to standard timestamp type for compatibility with Delta Lake and Databricks.
+columns to standard timestamp type for compatibility with Delta Lake and Databricks,
+and more generally to apply a declarative type mapping (e.g. int -> bigint, decimal
+widening) to every column, including fields nested in structs, arrays and maps.
+
+All conversions are applied in a single select projection, and the projection is
+memoised per input schema so repeated streaming micro-batch plans reuse it.
 """
 
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
 from pyspark.sql import DataFrame
-from pyspark.sql.types import TimestampNTZType, TimestampType
+from pyspark.sql.types import (
+    ArrayType, BinaryType, BooleanType, ByteType, DataType, DateType, DecimalType, DoubleType,
+    FloatType, IntegerType, LongType, MapType, ShortType, StringType, StructField, StructType,
+    TimestampNTZType, TimestampType,
+)
 from pyspark.sql.functions import col
 
 
+# Default mapping used by the parquet ingestion template (TMPL003)
+DEFAULT_TYPE_MAPPING = {"timestamp_ntz": "timestamp"}
+
+_TARGET_TYPES = {
+    "string": StringType(),
+    "boolean": BooleanType(),
+    "binary": BinaryType(),
+    "tinyint": ByteType(),
+    "smallint": ShortType(),
+    "int": IntegerType(),
+    "integer": IntegerType(),
+    "bigint": LongType(),
+    "long": LongType(),
+    "float": FloatType(),
+    "double": DoubleType(),
+    "date": DateType(),
+    "timestamp": TimestampType(),
+    "timestamp_ntz": TimestampNTZType(),
+}
+
+_DECIMAL_PATTERN = re.compile(r"^decimal\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\)$")
+
+MappingKey = Tuple[Tuple[str, str], ...]
+
+
+def _normalise_type_mapping(type_mapping: Optional[Dict]) -> MappingKey:
+    """
+    Normalise a type mapping from YAML into a hashable, validated form.
+
+    Keys are source type names as in Spark's simpleString ('timestamp_ntz', 'int',
+    'smallint', ...) or 'decimal' for all decimals. Values are target type names;
+    for 'decimal' the value may be a precision ('38' or 38), which widens precision
+    and keeps each column's scale, or a full 'decimal(p,s)'.
+    """
+    mapping = DEFAULT_TYPE_MAPPING if type_mapping is None else type_mapping
+    normalised = []
+    for source, target in mapping.items():
+        source = str(source).strip().lower()
+        target = str(target).strip().lower()
+        if source == "integer":
+            source = "int"
+        if source == "decimal" and target.isdigit():
+            target = f"decimal({target})"
+        match = _DECIMAL_PATTERN.match(target)
+        if target not in _TARGET_TYPES and not match:
+            raise ValueError(f"Unsupported target type '{target}' for '{source}' in type_mapping")
+        if source == "decimal" and not match:
+            raise ValueError(f"Target type for 'decimal' must be a precision or decimal(p,s), got '{target}'")
+        if match:
+            precision = int(match.group(1))
+            scale = int(match.group(2) or 0)
+            if not 1 <= precision <= 38 or scale > precision:
+                raise ValueError(f"Invalid decimal target '{target}' for '{source}': precision must be 1-38 and scale <= precision")
+        normalised.append((source, target))
+    return tuple(sorted(normalised))
+
+
+def _target_type(data_type: DataType, mapping: Dict[str, str]) -> DataType:
+    """Return the converted type of data_type, rewriting nested struct, array and map types."""
+    if isinstance(data_type, StructType):
+        return StructType([
+            StructField(field.name, _target_type(field.dataType, mapping), field.nullable, field.metadata)
+            for field in data_type.fields
+        ])
+    if isinstance(data_type, ArrayType):
+        return ArrayType(_target_type(data_type.elementType, mapping), data_type.containsNull)
+    if isinstance(data_type, MapType):
+        return MapType(
+            _target_type(data_type.keyType, mapping),
+            _target_type(data_type.valueType, mapping),
+            data_type.valueContainsNull,
+        )
+
+    if isinstance(data_type, DecimalType):
+        target = mapping.get("decimal")
+        if target is None:
+            return data_type
+        match = _DECIMAL_PATTERN.match(target)
+        precision = int(match.group(1))
+        scale = int(match.group(2)) if match.group(2) is not None else data_type.scale
+        # Never lose integer digits of the source decimal. An explicit lower scale is
+        # applied as given, so fractional digits beyond it are rounded away.
+        if precision - scale < data_type.precision - data_type.scale:
+            return data_type
+        return DecimalType(precision, scale)
+
+    target = mapping.get(data_type.simpleString())
+    if target is None:
+        return data_type
+    match = _DECIMAL_PATTERN.match(target)
+    if match:
+        return DecimalType(int(match.group(1)), int(match.group(2) or 0))
+    return _TARGET_TYPES[target]
+
+
+@lru_cache(maxsize=256)
+def _projection_for_schema(schema_json: str, mapping_key: MappingKey) -> Tuple[Tuple[str, Optional[DataType]], ...]:
+    """
+    Compute the projection for a schema: (column name, cast type or None) per column.
+
+    Memoised on the schema JSON and type mapping, so every micro-batch plan over the
+    same input schema reuses the result.
+    """
+    schema = StructType.fromJson(json.loads(schema_json))
+    mapping = dict(mapping_key)
+    projection = []
+    for field in schema.fields:
+        target = _target_type(field.dataType, mapping)
+        projection.append((field.name, target if target != field.dataType else None))
+    return tuple(projection)
+
+
+def convert_column_types(df: DataFrame, spark, parameters: dict) -> DataFrame:
+    """
+    Convert column types according to a declarative type mapping in one projection.
+
+    Every column (and every field nested in struct, array or map columns) whose type
+    appears in the mapping is cast to its target type. Nested columns are converted
+    with a single cast over the whole column type, so no explode is needed. All
+    conversions are applied in one select, instead of one withColumn per column.
+
+    Args:
+        df: Input DataFrame
+        spark: SparkSession instance (required by LHP but unused in this function)
+        parameters: Configuration parameters from YAML:
+            - type_mapping: Optional dict of source type -> target type
+              (defaults to {'timestamp_ntz': 'timestamp'})
+
+    Returns:
+        DataFrame: DataFrame with converted columns, in the original column order.
+                   Returned unchanged if no column needs converting.
+
+    Example:
+        >>> # In LHP YAML template:
+        >>> # - name: convert_types
+        >>> #   type: transform
+        >>> #   transform_type: python
+        >>> #   module_path: "py_functions/timestamp_converter.py"
+        >>> #   function_name: "convert_column_types"
+        >>> #   parameters:
+        >>> #     type_mapping:
+        >>> #       timestamp_ntz: timestamp
+        >>> #       int: bigint
+        >>> #       decimal: 38
+    """
+    mapping_key = _normalise_type_mapping((parameters or {}).get("type_mapping"))
+    projection = _projection_for_schema(df.schema.json(), mapping_key)
+
+    if all(target is None for _, target in projection):
+        return df
+
+    columns = []
+    for name, target in projection:
+        column = col("`{}`".format(name.replace("`", "``")))
+        columns.append(column if target is None else column.cast(target).alias(name))
+
+    return df.select(*columns)
+
+
 def convert_timestampntz_to_timestamp(df: DataFrame, spark, parameters: dict) -> DataFrame:
     """
     Convert all timestampntz columns to timestamp type.
-    
+
     This function automatically detects all columns with TimestampNTZType in the DataFrame
     schema and converts them to standard TimestampType. This is necessary because some
     Parquet files use timestampntz which may not be fully supported in all contexts.
-    
+    Conversions are applied in a single projection (see convert_column_types); an optional
+    type_mapping parameter extends the default timestamp_ntz -> timestamp mapping.
+
+    timestampntz fields nested in struct, array and map columns are converted too. Earlier
+    versions only converted top-level columns, so nested fields used to stay timestampntz.
+
     Args:
         df: Input DataFrame with potential timestampntz columns
         spark: SparkSession instance (required by LHP but unused in this function)
-        parameters: Configuration parameters from YAML (required by LHP but unused)
-        
+        parameters: Configuration parameters from YAML:
+            - type_mapping: Optional additional source type -> target type mappings
+
     Returns:
-        DataFrame: DataFrame with all timestampntz columns converted to timestamp.
+        DataFrame: DataFrame with all timestampntz columns and nested fields converted to timestamp.
                    All other columns and data remain unchanged.
-    
+
     Example:
         >>> # In LHP YAML template:
         >>> # - name: convert_timestamp
@@ -36,11 +215,6 @@ def convert_timestampntz_to_timestamp(df: DataFrame, spark, parameters: dict) ->
         >>> #     file: "py_functions/timestamp_converter.py"
         >>> #     function: "convert_timestampntz_to_timestamp"
     """
-    # Iterate through schema to find timestampntz columns
-    for field in df.schema.fields:
-        if isinstance(field.dataType, TimestampNTZType):
-            # Cast timestampntz to timestamp (simple cast, no timezone conversion)
-            df = df.withColumn(field.name, col(field.name).cast(TimestampType()))
-    
-    return df
-
+    type_mapping = dict(DEFAULT_TYPE_MAPPING)
+    type_mapping.update((parameters or {}).get("type_mapping") or {})
+    return convert_column_types(df, spark, {"type_mapping": type_mapping})
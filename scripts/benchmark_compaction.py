@@ -0,0 +1,147 @@
+# benchmark_compaction.py
+"""
+Benchmark: raw-ingestion micro-batch time with and without small-file compaction
+(compact_small_files in Notebooks/volume_transfer.py).
+
+Creates an arrival folder with many small CSV or Parquet files per date (like the SFCC
+dlvr_slt_avlbt or NCR str_invtry_txn feeds), lands it twice with the transfer engine -
+once as is and once compacted - and then streams each landing directory through a
+file-source stream with maxFilesPerTrigger (as the TMPL001/TMPL003 Auto Loader
+ingestions do), with _source_file_path restored by py_functions/source_lineage.py.
+Reports landed files, micro-batches, mean and p95 batch time, total time and rows/s,
+and checks that both landings give the same per-file row counts.
+
+Usage:
+    python scripts/benchmark_compaction.py [--format csv|parquet] [--dates 10] [--files-per-date 200]
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from pyspark.sql import SparkSession
+from pyspark.sql.functions import col
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "Notebooks"))
+sys.path.insert(0, str(ROOT / "py_functions"))
+from source_lineage import restore_source_file_path  # noqa: E402
+from volume_transfer import InMemoryTrackingStore, LocalStorage, TransferConfig, VolumeTransfer  # noqa: E402
+
+FOLDER = "delivery_slot_availability"
+COLUMNS = ["slot_id", "store_id", "slot_start", "capacity", "booked"]
+
+
+def build_arrival_folder(root: str, file_format: str, dates: int, files_per_date: int, rows_per_file: int):
+    """Write <root>/<FOLDER>/YYYY-MM-DD/part-NNNNN.<ext> small files."""
+    rng = random.Random(42)
+    start = date(2024, 1, 1)
+    for day in range(dates):
+        day_name = (start + timedelta(days=day)).isoformat()
+        directory = os.path.join(root, FOLDER, day_name)
+        os.makedirs(directory)
+        for part in range(files_per_date):
+            rows = [
+                [f"{day_name}-{part}-{i}", rng.randint(1, 500), f"{day_name} {rng.randint(6, 21):02d}:00:00",
+                 rng.randint(5, 50), rng.randint(0, 50)]
+                for i in range(rows_per_file)
+            ]
+            path = os.path.join(directory, f"part-{part:05d}.{file_format}")
+            if file_format == "csv":
+                with open(path, "w", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(COLUMNS)
+                    writer.writerows(rows)
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                pq.write_table(pa.table({name: [row[i] for row in rows] for i, name in enumerate(COLUMNS)}), path)
+
+
+def land(source: str, target: str, dates: int, compact: bool, target_mb: int) -> int:
+    """Transfer every date into target and return the number of landed files."""
+    config = TransferConfig(source_path=source, target_path=target, max_workers=8, max_dates=dates,
+                            compact_small_files=compact, compaction_target_bytes=target_mb * 1024 * 1024)
+    with contextlib.redirect_stdout(io.StringIO()):
+        VolumeTransfer(config, LocalStorage(), InMemoryTrackingStore()).process_all_folders()
+    return sum(len(files) for _, _, files in os.walk(target))
+
+
+def ingest(spark, landing: str, file_format: str, max_files_per_trigger: int, checkpoint: str):
+    """Stream the landing folder to a memory sink; return batch durations (s), total seconds and the sink."""
+    reader = spark.readStream.format(file_format).option("maxFilesPerTrigger", max_files_per_trigger)
+    if file_format == "csv":
+        reader = reader.option("header", True)
+    # File-source streams need a schema up front; infer it from the landed files like Auto Loader does
+    schema = spark.read.format(file_format).option("header", True).option("inferSchema", True) \
+        .load(f"{landing}/{FOLDER}/*").schema
+    df = reader.schema(schema).load(f"{landing}/{FOLDER}/*") \
+        .withColumn("_source_file_path", col("_metadata.file_path"))
+    df = restore_source_file_path(df, spark, {})
+
+    sink = f"ingest_{abs(hash(landing))}"
+    start = time.perf_counter()
+    query = df.writeStream.format("memory").queryName(sink) \
+        .option("checkpointLocation", checkpoint).trigger(availableNow=True).start()
+    query.awaitTermination()
+    seconds = time.perf_counter() - start
+    durations = [p["durationMs"]["triggerExecution"] / 1000 for p in query.recentProgress if p["numInputRows"]]
+    return durations, seconds, sink
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--dates", type=int, default=10)
+    parser.add_argument("--files-per-date", type=int, default=200)
+    parser.add_argument("--rows-per-file", type=int, default=50)
+    parser.add_argument("--target-mb", type=int, default=128, help="Compaction target file size")
+    parser.add_argument("--max-files-per-trigger", type=int, default=100)
+    args = parser.parse_args()
+
+    spark = SparkSession.builder.master("local[4]").appName("benchmark_compaction") \
+        .config("spark.sql.streaming.numRecentProgressUpdates", 10000).getOrCreate()
+    spark.sparkContext.setLogLevel("ERROR")
+
+    work_dir = tempfile.mkdtemp(prefix="benchmark_compaction_")
+    try:
+        arrival = os.path.join(work_dir, "arrival")
+        build_arrival_folder(arrival, args.format, args.dates, args.files_per_date, args.rows_per_file)
+
+        print(f"{'landing':>10} {'files':>7} {'batches':>8} {'mean batch (ms)':>16} {'p95 batch (ms)':>15} "
+              f"{'total (s)':>10} {'rows/s':>10}")
+        row_counts = {}
+        for label, compact in (("raw", False), ("compacted", True)):
+            landing = os.path.join(work_dir, f"landing_{label}")
+            files = land(arrival, landing, args.dates, compact, args.target_mb)
+            durations, seconds, sink = ingest(spark, landing, args.format, args.max_files_per_trigger,
+                                              os.path.join(work_dir, f"checkpoint_{label}"))
+            rows = spark.table(sink)
+            total_rows = rows.count()
+            row_counts[label] = {
+                row["_source_file_path"].split(f"landing_{label}/", 1)[-1]: row["count"]
+                for row in rows.groupBy("_source_file_path").count().collect()
+            }
+            p95 = sorted(durations)[max(0, int(len(durations) * 0.95) - 1)] if durations else 0.0
+            print(f"{label:>10} {files:>7,} {len(durations):>8} {statistics.mean(durations or [0]) * 1000:>16.0f} "
+                  f"{p95 * 1000:>15.0f} {seconds:>10.2f} {total_rows / seconds:>10,.0f}")
+
+        lineage = "identical" if row_counts["raw"] == row_counts["compacted"] else "DIFFERENT"
+        print(f"Per-file row counts by _source_file_path: {lineage}")
+    finally:
+        spark.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
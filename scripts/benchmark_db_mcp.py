@@ -0,0 +1,245 @@
+# benchmark_db_mcp.py
+"""
+Benchmark: the lhp-chatbot MCP server (scripts/db_mcp.py) against a local stub of the
+Databricks serving endpoint that simulates a cold start and rate limits.
+
+The stub answers 503 for the first --cold-start seconds (with a slow response, like a
+scaled-to-zero endpoint spinning up), 429 whenever more than --rate-limit requests are
+in progress, and otherwise returns an output_text answer after --model-ms. A burst of
+--agents concurrent, distinct questions is sent through the server's query path twice:
+once with retries and the concurrency bound disabled (the old behaviour), and once with
+the configured semaphore and jittered retries. Reports answered/failed questions,
+retries, p50/p95 of the time until each question got its answer or error, and p95 of
+queue wait, connect and model time of the successful calls.
+
+A long answer (--answer-chars, generated over --generation-ms) is then requested once
+with ask_lakehouse_plumber and once with ask_lakehouse_plumber_streaming, comparing the
+time until the first text reaches the client.
+
+Usage:
+    python scripts/benchmark_db_mcp.py [--agents 16] [--cold-start 5] [--rate-limit 4]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+class StubEndpoint(BaseHTTPRequestHandler):
+    """Serving-endpoint stand-in; behaviour is configured on the server object."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            active = server.active
+            scripted = server.fail_statuses.pop(0) if server.fail_statuses else None
+        try:
+            if scripted is not None:
+                self.reply(scripted, {"error_code": "SCRIPTED_FAILURE", "message": f"Scripted {scripted}"})
+            elif time.monotonic() - server.started < server.cold_start:
+                time.sleep(server.cold_start_delay)
+                self.reply(503, {"error_code": "TEMPORARILY_UNAVAILABLE", "message": "Endpoint is scaling up"})
+            elif active > server.rate_limit:
+                self.reply(429, {"error_code": "REQUEST_LIMIT_EXCEEDED", "message": "Rate limit exceeded"})
+            else:
+                time.sleep(server.model_seconds)
+                question = body["input"][0]["content"]
+                answer = f"Answer to: {question}" + "." * server.answer_chars
+                if body.get("stream"):
+                    self.stream(answer)
+                else:
+                    time.sleep(server.generation_seconds)
+                    self.reply(200, {"output": [{"content": [{"type": "output_text", "text": answer}]}]})
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def do_GET(self):
+        """Serving-endpoint state (GET /api/2.0/serving-endpoints/<name>), as read by the warm-up."""
+        with self.server.lock:
+            self.server.state_requests += 1
+        name = self.path.rstrip("/").rsplit("/", 1)[-1]
+        if self.path.startswith("/api/2.0/serving-endpoints/"):
+            self.reply(200, {"name": name, "state": {"ready": "READY", "config_update": "NOT_UPDATING"}})
+        else:
+            self.reply(404, {"error_code": "RESOURCE_DOES_NOT_EXIST", "message": f"No route {self.path}"})
+
+    def reply(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status in (429, 503) and self.server.retry_after is not None:
+            self.send_header("Retry-After", self.server.retry_after)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def stream(self, answer: str, chunk_chars: int = 20):
+        """Send the answer as response.output_text.delta server-sent events, paced over generation_seconds."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        chunks = [answer[i:i + chunk_chars] for i in range(0, len(answer), chunk_chars)]
+        for chunk in chunks:
+            event = {"type": "response.output_text.delta", "delta": chunk}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.server.generation_seconds / len(chunks))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(cold_start: float, cold_start_delay: float, rate_limit: int, model_ms: float,
+               answer_chars: int = 0, generation_ms: float = 0.0) -> ThreadingHTTPServer:
+    """
+    Serve StubEndpoint on a free local port. Besides the arguments, the server object has
+    fail_statuses (statuses answered, in order, to the next POSTs), retry_after (Retry-After
+    header of 429/503 responses) and the counters requests, state_requests and max_active.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubEndpoint)
+    server.lock = threading.Lock()
+    server.active = 0
+    server.max_active = 0
+    server.requests = 0
+    server.state_requests = 0
+    server.fail_statuses = []
+    server.retry_after = None
+    server.cold_start = cold_start
+    server.cold_start_delay = cold_start_delay
+    server.rate_limit = rate_limit
+    server.model_seconds = model_ms / 1000
+    server.answer_chars = answer_chars
+    server.generation_seconds = generation_ms / 1000
+    server.started = time.monotonic()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def reset(db_mcp, stub, max_concurrency: int, max_retries: int):
+    """Fresh counters, cache, semaphore and a cold endpoint for the next run."""
+    for name, value in db_mcp.stats.items():
+        db_mcp.stats[name] = [] if isinstance(value, list) else (None if name == "warm_up_ms" else 0)
+    db_mcp.cache.entries.clear()
+    db_mcp.MAX_CONCURRENCY = max_concurrency
+    db_mcp.MAX_RETRIES = max_retries
+    db_mcp._semaphore = None
+    stub.started = time.monotonic()
+
+
+async def burst(db_mcp, agents: int):
+    async def ask(index: int):
+        started = time.perf_counter()
+        try:
+            await db_mcp.cached_query(f"How do I configure flowgroup {index} with TMPL004?")
+            return time.perf_counter() - started, None
+        except Exception as e:
+            return time.perf_counter() - started, type(e).__name__
+
+    results = await asyncio.gather(*(ask(i) for i in range(agents)))
+    await db_mcp.get_client().aclose()
+    db_mcp._client = None
+    return results
+
+
+class ProgressRecorder:
+    """Stands in for the MCP request context; notes when the first progress notification arrives."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_chunk = None
+        self.chunks = 0
+
+    async def report_progress(self, progress, total=None, message=None):
+        if self.first_chunk is None:
+            self.first_chunk = time.perf_counter() - self.started
+        self.chunks += 1
+
+
+async def long_answer(db_mcp, streaming: bool):
+    """Seconds until the client sees text, total seconds, answer length and notifications for one long answer."""
+    db_mcp.cache.entries.clear()
+    recorder = ProgressRecorder()
+    question = f"Generate a TMPL004 flowgroup ({'streaming' if streaming else 'buffered'})"
+    if streaming:
+        answer = await db_mcp.ask_lakehouse_plumber_streaming(question, recorder)
+    else:
+        answer = await db_mcp.ask_lakehouse_plumber(question)
+    total = time.perf_counter() - recorder.started
+    await db_mcp.get_client().aclose()
+    db_mcp._client = None
+    return recorder.first_chunk or total, total, len(answer), recorder.chunks
+
+
+def percentiles(samples):
+    """(p50, p95) of the samples, or (nan, nan) when there are none - printed as nan, not as a 0.00 latency."""
+    summary = sorted(samples)
+    if not summary:
+        return float("nan"), float("nan")
+    return summary[len(summary) // 2], summary[min(len(summary) - 1, int(len(summary) * 0.95))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=16, help="Concurrent questions in the burst")
+    parser.add_argument("--cold-start", type=float, default=5.0, help="Seconds the stub answers 503")
+    parser.add_argument("--cold-start-delay", type=float, default=1.0, help="Seconds per 503 response")
+    parser.add_argument("--rate-limit", type=int, default=4, help="Concurrent requests before the stub answers 429")
+    parser.add_argument("--model-ms", type=float, default=300.0)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--max-retries", type=int, default=6)
+    parser.add_argument("--answer-chars", type=int, default=20000, help="Length of the long answer")
+    parser.add_argument("--generation-ms", type=float, default=5000.0, help="Time the stub takes to generate it")
+    args = parser.parse_args()
+
+    stub = start_stub(args.cold_start, args.cold_start_delay, args.rate_limit, args.model_ms)
+    os.environ["LHP_CHATBOT_ENDPOINT"] = f"http://127.0.0.1:{stub.server_address[1]}/invocations"
+    os.environ["LHP_RETRY_BASE_SECONDS"] = "0.5"
+    os.environ.pop("LHP_CACHE_FILE", None)
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import db_mcp
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print(f"{'mode':>10} {'answered':>9} {'failed':>7} {'retries':>8} {'p50 (s)':>8} {'p95 (s)':>8} "
+          f"{'queue p95':>10} {'connect p95':>12} {'model p95':>10}")
+    runs = (("no-retry", args.agents, 0), ("resilient", args.max_concurrency, args.max_retries))
+    try:
+        for label, max_concurrency, max_retries in runs:
+            reset(db_mcp, stub, max_concurrency, max_retries)
+            results = asyncio.run(burst(db_mcp, args.agents))
+            answered = [seconds for seconds, error in results if error is None]
+            # Failed questions count too (time until their error), so a run where most fail is not reported as fast
+            p50, p95 = percentiles([seconds for seconds, _ in results])
+            print(f"{label:>10} {len(answered):>9} {len(results) - len(answered):>7} {db_mcp.stats['retries']:>8} "
+                  f"{p50:>8.2f} {p95:>8.2f} {percentiles(db_mcp.stats['queue_wait_ms'])[1]:>10.0f} "
+                  f"{percentiles(db_mcp.stats['connect_ms'])[1]:>12.1f} {percentiles(db_mcp.stats['model_ms'])[1]:>10.0f}")
+
+        stub.cold_start = 0
+        stub.answer_chars = args.answer_chars
+        stub.generation_seconds = args.generation_ms / 1000
+        print(f"\n{'answer':>10} {'first text (s)':>15} {'total (s)':>10} {'chars':>8} {'notifications':>14}")
+        for label, streaming in (("buffered", False), ("streaming", True)):
+            first_text, total, chars, chunks = asyncio.run(long_answer(db_mcp, streaming))
+            print(f"{label:>10} {first_text:>15.2f} {total:>10.2f} {chars:>8,} {chunks:>14}")
+    finally:
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
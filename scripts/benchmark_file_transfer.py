@@ -0,0 +1,150 @@
+# benchmark_file_transfer.py
+"""
+Benchmark: throughput of the volume-to-volume transfer engine
+(Notebooks/volume_transfer.py) on the local filesystem.
+
+Creates a synthetic arrival tree with many folders and dates, spread over the three
+layouts the transfer handles:
+
+    <folder>/YYYY-MM-DD_<folder>.csv     direct files
+    <folder>/YYYY-MM-DD/part-NNNNN.json  date folders
+    <folder>/YYYY-MM-DD.parquet          simple dated files
+
+then transfers every date with LocalStorage and InMemoryTrackingStore once per
+max_workers value, into a fresh target directory each time, and reports files/s,
+MB/s and listing calls. A second, cached run per configuration shows the listing
+calls of a run with nothing new to transfer, and the restart cleanup of the target
+directory is timed in objects/s. With --archive, the tree is also zipped and every
+configuration is repeated streaming from the archive (ArchiveStorage).
+
+Usage:
+    python scripts/benchmark_file_transfer.py [--folders 1000] [--dates 30] [--workers 1 2 4 8 16]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "Notebooks"))
+from volume_transfer import (  # noqa: E402
+    ArchiveStorage, InMemoryTrackingStore, LocalStorage, TransferConfig, VolumeTransfer
+)
+
+LAYOUTS = ("direct", "date_folder", "simple")
+
+
+def build_arrival_tree(root: str, folders: int, dates: int, files_per_date_folder: int, file_size: int) -> int:
+    """Write the synthetic arrival tree under root and return the number of files created."""
+    payload = os.urandom(file_size)
+    start = date(2024, 1, 1)
+    created = 0
+    for folder_index in range(folders):
+        folder_name = f"table_{folder_index:05d}"
+        folder_path = os.path.join(root, folder_name)
+        os.makedirs(folder_path)
+        layout = LAYOUTS[folder_index % len(LAYOUTS)]
+        for day in range(dates):
+            day_name = (start + timedelta(days=day)).isoformat()
+            if layout == "direct":
+                paths = [os.path.join(folder_path, f"{day_name}_{folder_name}.csv")]
+            elif layout == "date_folder":
+                os.makedirs(os.path.join(folder_path, day_name))
+                paths = [os.path.join(folder_path, day_name, f"part-{part:05d}.json")
+                         for part in range(files_per_date_folder)]
+            else:
+                paths = [os.path.join(folder_path, f"{day_name}.parquet")]
+            for path in paths:
+                with open(path, "wb") as f:
+                    f.write(payload)
+            created += len(paths)
+    return created
+
+
+def build_archive(root: str, archive_path: str):
+    """Zip the arrival tree under root into archive_path, below an 'export/' directory."""
+    with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for directory, _, files in os.walk(root):
+            for name in sorted(files):
+                path = os.path.join(directory, name)
+                archive.write(path, os.path.join("export", os.path.relpath(path, root)))
+
+
+def run_transfer(source: str, target: str, max_workers: int, dates: int, archive: str = None):
+    """Transfer all dates once, re-run with nothing pending, then clean up; return timings and counters."""
+    storage = LocalStorage()
+    if archive:
+        storage = ArchiveStorage(archive, storage)
+        source = storage.default_source_path()
+    store = InMemoryTrackingStore()
+    config = TransferConfig(source_path=source, target_path=target, max_workers=max_workers, max_dates=dates,
+                            cleanup_workers=max_workers)
+    transfer = VolumeTransfer(config, storage, store)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        all_stats = transfer.process_all_folders()
+        seconds = time.perf_counter() - start
+        first_run_calls = storage.listing_calls
+        transfer.process_all_folders()
+
+        cached_calls = storage.listing_calls - first_run_calls
+        cleanup_stats = transfer.cleanup_target_volume(target)
+
+    files = sum(stats['total_files_transferred'] for stats in all_stats.values())
+    copied = sum(stats['bytes_copied'] for stats in all_stats.values())
+    errors = sum(len(stats['errors']) for stats in all_stats.values())
+    cleanup_rate = cleanup_stats['deleted'] / max(cleanup_stats['seconds'], 1e-9)
+    return seconds, files, copied, errors, first_run_calls, cached_calls, cleanup_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folders", type=int, default=1000)
+    parser.add_argument("--dates", type=int, default=30)
+    parser.add_argument("--files-per-date-folder", type=int, default=4)
+    parser.add_argument("--file-size", type=int, default=16 * 1024, help="Bytes per file")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--archive", action="store_true", help="Also benchmark streaming from a zip of the tree")
+    parser.add_argument("--work-dir", help="Directory for the synthetic trees (default: a temporary directory)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="benchmark_file_transfer_", dir=args.work_dir)
+    try:
+        source = os.path.join(work_dir, "arrival")
+        os.makedirs(source)
+        start = time.perf_counter()
+        created = build_arrival_tree(source, args.folders, args.dates, args.files_per_date_folder, args.file_size)
+        print(f"Arrival tree: {args.folders} folders x {args.dates} dates, {created:,} files "
+              f"({created * args.file_size / 1024 / 1024:,.1f} MB), built in {time.perf_counter() - start:.1f}s")
+
+        archive = None
+        if args.archive:
+            archive = os.path.join(work_dir, "export.zip")
+            build_archive(source, archive)
+            print(f"Archive: {os.path.getsize(archive) / 1024 / 1024:,.1f} MB")
+
+        print(f"{'source':>8} {'workers':>8} {'seconds':>9} {'files/s':>10} {'MB/s':>8} {'listing calls':>14} "
+              f"{'cached calls':>13} {'cleanup obj/s':>14} {'errors':>7}")
+        runs = [("volume", None)] + ([("archive", archive)] if archive else [])
+        for (label, archive_path), max_workers in [(run, workers) for run in runs for workers in args.workers]:
+            target = os.path.join(work_dir, f"landing_{label}_{max_workers}")
+            seconds, files, copied, errors, calls, cached_calls, cleanup_rate = run_transfer(
+                source, target, max_workers, args.dates, archive_path
+            )
+            print(f"{label:>8} {max_workers:>8} {seconds:>9.2f} {files / seconds:>10,.0f} {copied / 1024 / 1024 / seconds:>8.1f} "
+                  f"{calls:>14,} {cached_calls:>13,} {cleanup_rate:>14,.0f} {errors:>7}")
+            shutil.rmtree(target, ignore_errors=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# benchmark_pos_fanout.py
+"""
+Benchmark: bytes read per bronze output row for the NCR POS header/line/payment fan-out
+(pipelines/02_bronze/NCR/pos_trx_header_lines_payment_bronze.yaml).
+
+Generates POS store files with scripts/generate_acme_data.py, builds the raw table the
+TMPL002 ingestion produces (raw_json_string, jsonCol, _source_file_path) and then runs
+the bronze SQL both ways:
+
+    before  three queries, each reading the raw table and exploding jsonCol.value
+    after   one query exploding jsonCol.value into brz_ncr_pos_txn_exploded, then three
+            queries reading only the columns they need from it
+
+Tables are Parquet here (Delta prunes columns the same way), and each query is run as a
+batch over all generated files, i.e. one large micro-batch. Bytes read are the input
+bytes of the Spark stages of each step, from the Spark UI REST API. Reports bytes read
+from the raw and exploded tables, bytes read per output row and seconds, and checks
+that both ways give identical header, line and payment rows.
+
+Usage:
+    python scripts/benchmark_pos_fanout.py [--days 3] [--stores 200] [--txns-per-store-day 300]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.request import urlopen
+
+from pyspark.sql import SparkSession
+from pyspark.sql.functions import col, from_json
+
+SCRIPTS = Path(__file__).resolve().parent
+
+# Bronze SQL from the flowgroup, with stream() reads replaced by the batch view
+EXPLODE_SQL = """
+    SELECT jsoncol_values.*, _source_file_path
+    FROM raw LATERAL VIEW explode(jsonCol.value) AS jsonCol_values
+"""
+BEFORE_SQL = {
+    "brz_ncr_pos_txn_hdr": """
+        SELECT jsoncol_values.* except (payments,transaction_lines), _source_file_path
+        FROM raw LATERAL VIEW explode(jsonCol.value) AS jsonCol_values""",
+    "brz_ncr_pos_txn_ln": """
+        SELECT jsoncol_values.txn_id, transaction_line.*, _source_file_path
+        FROM raw LATERAL VIEW explode(jsonCol.value) AS jsonCol_values
+        LATERAL VIEW explode(jsoncol_values.transaction_lines) AS transaction_line""",
+    "brz_ncr_pos_txn_pmt": """
+        SELECT jsoncol_values.txn_id, payments.*, payments.payment_details.*, _source_file_path
+        FROM raw LATERAL VIEW explode(jsonCol.value) AS jsonCol_values
+        LATERAL VIEW explode(jsoncol_values.payments) AS payments""",
+}
+AFTER_SQL = {
+    "brz_ncr_pos_txn_hdr": """
+        SELECT * except (payments,transaction_lines) FROM exploded""",
+    "brz_ncr_pos_txn_ln": """
+        SELECT txn_id, transaction_line.*, _source_file_path
+        FROM exploded LATERAL VIEW explode(transaction_lines) AS transaction_line""",
+    "brz_ncr_pos_txn_pmt": """
+        SELECT txn_id, payments.*, payments.payment_details.*, _source_file_path
+        FROM exploded LATERAL VIEW explode(payments) AS payments""",
+}
+
+
+def input_bytes(spark) -> int:
+    """Total input bytes of completed stages so far, once the UI has caught up with the listener."""
+    sc = spark.sparkContext
+    url = f"{sc.uiWebUrl}/api/v1/applications/{sc.applicationId}/stages?status=complete"
+    previous = -1
+    while True:
+        total = sum(stage["inputBytes"] for stage in json.load(urlopen(url)))
+        if total == previous:
+            return total
+        previous = total
+        time.sleep(0.5)
+
+
+def run_step(spark, sql: str, output: str):
+    """Run one query into a Parquet table; return (bytes read, rows written, seconds)."""
+    before = input_bytes(spark)
+    start = time.perf_counter()
+    spark.sql(sql).write.mode("overwrite").parquet(output)
+    seconds = time.perf_counter() - start
+    read = input_bytes(spark) - before
+    return read, spark.read.parquet(output).count(), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--stores", type=int, default=200)
+    parser.add_argument("--txns-per-store-day", type=int, default=300)
+    parser.add_argument("--work-dir", help="Directory for generated data (default: a temporary directory)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="benchmark_pos_fanout_", dir=args.work_dir)
+    spark = SparkSession.builder.master("local[*]").appName("benchmark_pos_fanout") \
+        .config("spark.ui.enabled", "true").getOrCreate()
+    spark.sparkContext.setLogLevel("ERROR")
+    try:
+        arrival = os.path.join(work_dir, "arrival")
+        subprocess.run([sys.executable, str(SCRIPTS / "generate_acme_data.py"), "--output", arrival,
+                        "--feeds", "ncr_pos", "--days", str(args.days), "--stores", str(args.stores),
+                        "--txns-per-store-day", str(args.txns_per_store_day)],
+                       check=True, stdout=subprocess.DEVNULL)
+
+        # Raw table as TMPL002 writes it: the whole file text plus its parsed JSON
+        files = f"{arrival}/pos_transactions_by_store/*/*.json"
+        schema = spark.read.json(files).schema
+        raw_path = os.path.join(work_dir, "raw_ncr_pos_txn_by_store")
+        spark.read.text(files, wholetext=True) \
+            .select(col("value").alias("raw_json_string"), from_json("value", schema).alias("jsonCol"),
+                    col("_metadata.file_path").alias("_source_file_path")) \
+            .write.parquet(raw_path)
+        spark.read.parquet(raw_path).createOrReplaceTempView("raw")
+
+        results = {}
+        print(f"{'flow':>7} {'step':>28} {'raw read (MB)':>14} {'exploded read (MB)':>19} {'rows':>12} {'seconds':>8}")
+        for label in ("before", "after"):
+            raw_read = exploded_read = seconds = 0.0
+            rows = {}
+            if label == "after":
+                exploded_path = os.path.join(work_dir, "brz_ncr_pos_txn_exploded")
+                read, count, step_seconds = run_step(spark, EXPLODE_SQL, exploded_path)
+                raw_read += read
+                seconds += step_seconds
+                print(f"{label:>7} {'brz_ncr_pos_txn_exploded':>28} {read / 1024 ** 2:>14.1f} {'':>19} "
+                      f"{count:>12,} {step_seconds:>8.2f}")
+                spark.read.parquet(exploded_path).createOrReplaceTempView("exploded")
+            for table, sql in (BEFORE_SQL if label == "before" else AFTER_SQL).items():
+                output = os.path.join(work_dir, label, table)
+                read, rows[table], step_seconds = run_step(spark, sql, output)
+                seconds += step_seconds
+                if label == "before":
+                    raw_read += read
+                    print(f"{label:>7} {table:>28} {read / 1024 ** 2:>14.1f} {'':>19} {rows[table]:>12,} {step_seconds:>8.2f}")
+                else:
+                    exploded_read += read
+                    print(f"{label:>7} {table:>28} {'':>14} {read / 1024 ** 2:>19.1f} {rows[table]:>12,} {step_seconds:>8.2f}")
+            results[label] = (raw_read, exploded_read, sum(rows.values()), seconds)
+
+        print(f"\n{'flow':>7} {'raw read (MB)':>14} {'total read (MB)':>16} {'output rows':>12} "
+              f"{'raw B/row':>10} {'total B/row':>12} {'seconds':>8}")
+        for label, (raw_read, exploded_read, rows, seconds) in results.items():
+            total = raw_read + exploded_read
+            print(f"{label:>7} {raw_read / 1024 ** 2:>14.1f} {total / 1024 ** 2:>16.1f} {rows:>12,} "
+                  f"{raw_read / rows:>10.1f} {total / rows:>12.1f} {seconds:>8.2f}")
+
+        identical = all(
+            spark.read.parquet(os.path.join(work_dir, "before", table))
+            .exceptAll(spark.read.parquet(os.path.join(work_dir, "after", table))).isEmpty()
+            and spark.read.parquet(os.path.join(work_dir, "after", table))
+            .exceptAll(spark.read.parquet(os.path.join(work_dir, "before", table))).isEmpty()
+            for table in BEFORE_SQL
+        )
+        print(f"Bronze rows before and after: {'identical' if identical else 'DIFFERENT'}")
+    finally:
+        spark.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
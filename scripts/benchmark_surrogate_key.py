@@ -0,0 +1,97 @@
+# benchmark_surrogate_key.py
+"""
+Micro-benchmark: hash cost per row of the TMPL004 surrogate key modes on wide tables.
+
+Builds cached tables of 20, 80 and 200 columns (a mix of bigint, decimal, string and
+timestamp columns, the first two being the business key, plus last_update_dttm and the
+operational metadata columns) and times each hash expression the cleanse step of
+TMPL004 can generate:
+
+    whole_row  xxhash64(* except (_processing_timestamp, _source_file_path)),
+               the legacy surrogate key
+    key        xxhash64(key_1, key_2), surrogate_key_columns
+    row_hash   xxhash64(* except (_processing_timestamp, _source_file_path,
+               _rescued_data, last_update_dttm)), generate_row_hash with
+               row_hash_except: [last_update_dttm]
+
+Each query is run to a noop sink; the time of the same scan without a hash is
+subtracted, so the figures are the cost of the hash alone, in nanoseconds per row.
+
+Usage:
+    python scripts/benchmark_surrogate_key.py [--columns 20 80 200] [--rows 1000000] [--repeat 5]
+"""
+
+import argparse
+import statistics
+import time
+
+from pyspark.sql import SparkSession
+from pyspark.sql.functions import col, concat, current_timestamp, expr, lit
+
+METADATA = "_processing_timestamp, _source_file_path"
+EXPRESSIONS = {
+    "whole_row": f"xxhash64(* except ({METADATA}))",
+    "key": "xxhash64(key_1, key_2)",
+    "row_hash": f"xxhash64(* except ({METADATA}, _rescued_data, last_update_dttm))",
+}
+
+
+def wide_table(spark, columns: int, rows: int):
+    """A cached DataFrame with two key columns, `columns` - 3 attributes, last_update_dttm and metadata."""
+    kinds = [
+        lambda i: (col("id") * 7 + i).alias(f"num_{i}"),
+        lambda i: (col("id") % 10000 / 100 + i).cast("decimal(10,2)").alias(f"dec_{i}"),
+        lambda i: concat(lit(f"attr_{i}_"), (col("id") % 1000).cast("string")).alias(f"str_{i}"),
+        lambda i: expr(f"timestamp_seconds(1700000000 + id + {i})").alias(f"ts_{i}"),
+    ]
+    df = spark.range(rows).select(
+        (col("id") % 1000).alias("key_1"),
+        (col("id") / 1000).cast("bigint").alias("key_2"),
+        *[kinds[i % len(kinds)](i) for i in range(columns - 3)],
+        expr("timestamp_seconds(1700000000 + id)").alias("last_update_dttm"),
+        lit(None).cast("string").alias("_rescued_data"),
+        current_timestamp().alias("_processing_timestamp"),
+        lit("/Volumes/landing/file.csv").alias("_source_file_path"),
+    ).cache()
+    df.count()
+    return df
+
+
+def run_seconds(df, hash_expression, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        query = df.selectExpr(f"{hash_expression} AS h") if hash_expression else df.select("key_1")
+        start = time.perf_counter()
+        query.write.format("noop").mode("overwrite").save()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--columns", type=int, nargs="+", default=[20, 80, 200])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    spark = SparkSession.builder.master("local[*]").appName("benchmark_surrogate_key").getOrCreate()
+    spark.sparkContext.setLogLevel("ERROR")
+
+    print(f"{'columns':>8} " + " ".join(f"{name + ' (ns/row)':>20}" for name in EXPRESSIONS)
+          + f" {'whole_row / key':>16}")
+    for columns in args.columns:
+        df = wide_table(spark, columns, args.rows)
+        scan = run_seconds(df, None, args.repeat)
+        cost = {
+            name: max(run_seconds(df, expression, args.repeat) - scan, 0.0) / args.rows * 1e9
+            for name, expression in EXPRESSIONS.items()
+        }
+        ratio = cost["whole_row"] / cost["key"] if cost["key"] else float("inf")
+        print(f"{columns:>8} " + " ".join(f"{cost[name]:>20.1f}" for name in EXPRESSIONS) + f" {ratio:>15.1f}x")
+        df.unpersist()
+
+    spark.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmark_type_conversion.py
+"""
+Micro-benchmark: plan analysis time of the single-projection type converter
+(py_functions/timestamp_converter.py) versus the previous withColumn-per-column loop.
+
+Builds wide DataFrames with a mix of timestamp_ntz, int, decimal and string columns
+and measures the time to build and analyze the converted plan, as happens for every
+streaming micro-batch of a TMPL003 ingestion.
+
+Usage:
+    python scripts/benchmark_type_conversion.py [--columns 10 100 500] [--repeat 5]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from pyspark.sql import SparkSession
+from pyspark.sql.functions import col, lit
+from pyspark.sql.types import TimestampNTZType, TimestampType
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "py_functions"))
+from timestamp_converter import convert_timestampntz_to_timestamp  # noqa: E402
+
+
+def loop_converter(df):
+    """The previous implementation: one withColumn (one projection) per timestampntz column."""
+    for field in df.schema.fields:
+        if isinstance(field.dataType, TimestampNTZType):
+            df = df.withColumn(field.name, col(field.name).cast(TimestampType()))
+    return df
+
+
+def wide_dataframe(spark, columns: int):
+    """A one-row DataFrame with `columns` columns, a quarter of each type."""
+    kinds = [
+        lambda i: lit("2024-01-01 00:00:00").cast("timestamp_ntz").alias(f"ts_{i}"),
+        lambda i: lit(i).cast("int").alias(f"int_{i}"),
+        lambda i: lit("1.25").cast("decimal(10,2)").alias(f"dec_{i}"),
+        lambda i: lit("x").alias(f"str_{i}"),
+    ]
+    return spark.range(1).select(*[kinds[i % len(kinds)](i) for i in range(columns)])
+
+
+def analysis_seconds(spark, converter, columns: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        df = wide_dataframe(spark, columns)
+        start = time.perf_counter()
+        converted = converter(df, spark, {})
+        converted._jdf.queryExecution().analyzed()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--columns", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    spark = SparkSession.builder.master("local[1]").appName("benchmark_type_conversion").getOrCreate()
+
+    print(f"{'columns':>8} {'loop (ms)':>12} {'projection (ms)':>16} {'speedup':>8}")
+    for columns in args.columns:
+        loop = analysis_seconds(spark, lambda df, s, p: loop_converter(df), columns, args.repeat)
+        projection = analysis_seconds(spark, convert_timestampntz_to_timestamp, columns, args.repeat)
+        print(f"{columns:>8} {loop * 1000:>12.1f} {projection * 1000:>16.1f} {loop / projection:>7.1f}x")
+
+    spark.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,602 @@
 # mcp_databricks_wrapper.py
 from mcp.server import FastMCP
+from mcp.server.fastmcp import Context
 import httpx
+import asyncio
 import os
 import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+from repo_index import RepoIndex, format_results
 
 DATABRICKS_TOKEN = os.getenv('DATABRICKS_TOKEN')
-DATABRICKS_ENDPOINT = "https://adb-984752964297111.11.azuredatabricks.net/serving-endpoints/ka-38ce1980-endpoint/invocations"
+DATABRICKS_ENDPOINT = os.getenv(
+    'LHP_CHATBOT_ENDPOINT',
+    "https://adb-984752964297111.11.azuredatabricks.net/serving-endpoints/ka-38ce1980-endpoint/invocations"
+)
+
+# Endpoint call settings - requests beyond MAX_CONCURRENCY wait in a queue for a free slot
+REQUEST_TIMEOUT_SECONDS = float(os.getenv('LHP_REQUEST_TIMEOUT_SECONDS', '60'))
+MAX_CONCURRENCY = int(os.getenv('LHP_MAX_CONCURRENCY', '4'))
+MAX_RETRIES = int(os.getenv('LHP_MAX_RETRIES', '4'))
+RETRY_BASE_SECONDS = float(os.getenv('LHP_RETRY_BASE_SECONDS', '1'))
+RETRY_MAX_SECONDS = float(os.getenv('LHP_RETRY_MAX_SECONDS', '30'))
+RETRY_STATUS_CODES = {429, 503}
+WARM_UP = os.getenv('LHP_WARM_UP', 'true').lower() == 'true'
+
+# Streaming settings - answer text is forwarded in chunks of at least this size or age
+STREAM_FLUSH_CHARS = int(os.getenv('LHP_STREAM_FLUSH_CHARS', '256'))
+STREAM_FLUSH_SECONDS = float(os.getenv('LHP_STREAM_FLUSH_SECONDS', '0.25'))
+
+# Local search settings - below this share of query terms matched, the question goes to the endpoint
+INDEX_MIN_COVERAGE = float(os.getenv('LHP_INDEX_MIN_COVERAGE', '0.6'))
+
+# Response cache settings - set LHP_CACHE_FILE to keep cached answers across restarts
+CACHE_MAX_ENTRIES = int(os.getenv('LHP_CACHE_MAX_ENTRIES', '256'))
+CACHE_TTL_SECONDS = float(os.getenv('LHP_CACHE_TTL_SECONDS', '3600'))
+CACHE_FILE = os.getenv('LHP_CACHE_FILE')
+
+
+class ResponseCache:
+    """LRU cache of answers with a time-to-live, optionally persisted to a JSON file."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()  # key -> (stored_at, answer)
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    for key, (stored_at, answer) in json.load(f).items():
+                        self.entries[key] = (stored_at, answer)
+                self._evict()
+            except (OSError, ValueError) as e:
+                # stdout carries the MCP protocol, so diagnostics go to stderr
+                print(f"Ignoring unreadable cache file {path}: {e}", file=sys.stderr)
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        stored_at, answer = entry
+        if time.time() - stored_at > self.ttl_seconds:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return answer
+
+    def put(self, key: str, answer: str):
+        self.entries[key] = (time.time(), answer)
+        self.entries.move_to_end(key)
+        self._evict()
+        self._save()
+
+    def _evict(self):
+        now = time.time()
+        for key in [key for key, (stored_at, _) in self.entries.items() if now - stored_at > self.ttl_seconds]:
+            del self.entries[key]
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _save(self):
+        if not self.path:
+            return
+        # Write to a temporary file and rename, so a crash never leaves a truncated cache
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(temp_path, self.path)
+
+
+cache = ResponseCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_FILE)
+in_flight: Dict[str, asyncio.Future] = {}
+repo_index = RepoIndex()
+# RepoIndex is not thread-safe: refresh and search run on worker threads, one at a time
+repo_index_lock = threading.Lock()
+stats = {
+    "requests": 0,
+    "cache_hits": 0,
+    "cache_misses": 0,
+    "shared_in_flight": 0,
+    "errors": 0,
+    "retries": 0,
+    "queued": 0,
+    "warm_up_ms": None,
+    "endpoint_latencies_ms": [],
+    "cache_hit_latencies_ms": [],
+    "queue_wait_ms": [],
+    "connect_ms": [],
+    "model_ms": [],
+    "local_answers": 0,
+    "local_fallbacks": 0,
+    "local_search_ms": [],
+    "streamed_answers": 0,
+    "first_token_ms": [],
+}
+MAX_LATENCY_SAMPLES = 1000
+
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """One long-lived client for the server, so connections (and TLS sessions) are reused between calls."""
+    global _client
+    if _client is None:
+        try:
+            import h2  # noqa: F401 - HTTP/2 support is optional (pip install "httpx[http2]")
+            http2 = True
+        except ImportError:
+            http2 = False
+        _client = httpx.AsyncClient(
+            # Long read timeout for slow answers; cold starts are handled by retrying
+            timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS, connect=10.0),
+            http2=http2,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=300),
+            headers={
+                "Authorization": f"Bearer {DATABRICKS_TOKEN}",
+                "Content-Type": "application/json"
+            },
+        )
+    return _client
+
+
+def get_semaphore() -> asyncio.Semaphore:
+    """Bound on concurrent endpoint calls; waiters are served in arrival order."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    return _semaphore
+
+
+def normalise_query(query: str) -> str:
+    """Cache key of a query: case-folded, with whitespace collapsed."""
+    return " ".join(query.split()).casefold()
+
+
+def record_latency(name: str, started: float):
+    record_sample(name, (time.perf_counter() - started) * 1000)
+
+
+def record_sample(name: str, milliseconds: float):
+    samples = stats[name]
+    samples.append(milliseconds)
+    if len(samples) > MAX_LATENCY_SAMPLES:
+        del samples[:len(samples) - MAX_LATENCY_SAMPLES]
+
+
+def latency_summary(samples) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[len(ordered) // 2], 1),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max": round(ordered[-1], 1),
+    }
+
+
+class RequestTimer:
+    """httpx trace hook that timestamps connection and request events of one call."""
+
+    def __init__(self):
+        self.events: Dict[str, float] = {}
+
+    async def trace(self, event_name: str, info):
+        self.events.setdefault(event_name, time.perf_counter())
+
+    def connect_seconds(self) -> float:
+        """TCP connect plus TLS handshake; zero when a pooled keep-alive connection was reused."""
+        started = self.events.get("connection.connect_tcp.started")
+        if started is None:
+            return 0.0
+        finished = self.events.get("connection.start_tls.complete", self.events.get("connection.connect_tcp.complete", started))
+        return finished - started
+
+
+def parse_answer(result: dict) -> str:
+    """Extract the answer text from a Databricks serving endpoint response."""
+    # Response format: {"output": [{"content": [{"text": "part1"}, {"text": "part2"}, ...]}]}
+    if "output" in result and len(result["output"]) > 0:
+        content = result["output"][0].get("content", [])
+        if len(content) > 0:
+            # Concatenate all text parts from the content array
+            text_parts = [item.get("text", "") for item in content if item.get("type") == "output_text"]
+            answer = "".join(text_parts)
+            if not answer:
+                answer = "No response text found"
+        else:
+            answer = "No content in response"
+    else:
+        # Fallback: return formatted JSON if structure is different
+        answer = json.dumps(result, indent=2)
+
+    return answer
+
+
+def retry_delay(attempt: int, error: Exception) -> float:
+    """Seconds to wait before the next attempt: Retry-After when given, else full-jitter exponential backoff."""
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("Retry-After", "")
+        if retry_after.replace(".", "", 1).isdigit():
+            return min(float(retry_after), RETRY_MAX_SECONDS)
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUS_CODES
+    return isinstance(error, (httpx.TimeoutException, httpx.ConnectError, httpx.RemoteProtocolError))
+
+
+async def call_endpoint(attempt):
+    """
+    Run one endpoint call, attempt(timer), with bounded concurrency and retries.
+
+    At most MAX_CONCURRENCY calls run at once; the rest queue for a slot. Timeouts,
+    connection failures and 429/503 responses (cold starts, rate limits) are retried up
+    to MAX_RETRIES times with jittered exponential backoff, releasing the slot while
+    waiting. Other HTTP errors, and the last failure, are raised.
+    """
+    semaphore = get_semaphore()
+    queue_wait = 0.0
+    for attempt_number in range(MAX_RETRIES + 1):
+        queued = time.perf_counter()
+        stats["queued"] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            stats["queued"] -= 1
+        queue_wait += time.perf_counter() - queued
+
+        timer = RequestTimer()
+        sent = time.perf_counter()
+        try:
+            result = await attempt(timer)
+        except Exception as e:
+            if attempt_number == MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = retry_delay(attempt_number, e)
+        else:
+            connect = timer.connect_seconds()
+            record_sample("queue_wait_ms", queue_wait * 1000)
+            record_sample("connect_ms", connect * 1000)
+            record_sample("model_ms", (time.perf_counter() - sent - connect) * 1000)
+            return result
+        finally:
+            semaphore.release()
+
+        stats["retries"] += 1
+        await asyncio.sleep(delay)
+
+
+async def query_endpoint(query: str) -> str:
+    """Send one query to the serving endpoint and return the answer text."""
+
+    async def post(timer: RequestTimer) -> str:
+        response = await get_client().post(
+            DATABRICKS_ENDPOINT,
+            json={
+                "input": [{"role": "user", "content": query}]
+            },
+            extensions={"trace": timer.trace},
+        )
+        # Check for HTTP errors
+        response.raise_for_status()
+        return parse_answer(response.json())
+
+    return await call_endpoint(post)
+
+
+class StreamInterruptedError(RuntimeError):
+    """The endpoint stream failed after text was already forwarded, so the call cannot be retried."""
+
+
+class StreamParser:
+    """Extracts answer text from the server-sent events of a streaming Responses API call."""
+
+    def __init__(self):
+        self.seen_delta = False
+
+    def text(self, line: str) -> Optional[str]:
+        if not line.startswith("data:"):
+            return None
+        data = line[5:].strip()
+        if not data or data == "[DONE]":
+            return None
+        event = json.loads(data)
+        event_type = event.get("type", "")
+        if event_type == "response.output_text.delta":
+            self.seen_delta = True
+            return event.get("delta", "")
+        if event_type == "response.output_item.done" and not self.seen_delta:
+            # Endpoints that do not stream deltas send each finished output item whole
+            content = event.get("item", {}).get("content", [])
+            return "".join(item.get("text", "") for item in content if item.get("type") == "output_text")
+        if event_type == "error" or "error" in event:
+            raise RuntimeError(f"Endpoint stream error: {event.get('error') or event.get('message') or data}")
+        return None
+
+
+async def stream_endpoint(query: str, on_text) -> str:
+    """
+    Send one query with streaming enabled, awaiting on_text(chunk) for every piece of
+    answer text as it arrives, and return the full answer.
+
+    The response is read line by line, so besides the answer itself only one event is held
+    in memory. Failures before the first chunk are retried like query_endpoint; failures
+    after it raise StreamInterruptedError.
+    """
+
+    async def stream(timer: RequestTimer) -> str:
+        parser = StreamParser()
+        parts = []
+        async with get_client().stream(
+            "POST",
+            DATABRICKS_ENDPOINT,
+            json={
+                "input": [{"role": "user", "content": query}],
+                "stream": True
+            },
+            extensions={"trace": timer.trace},
+        ) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            try:
+                async for line in response.aiter_lines():
+                    text = parser.text(line)
+                    if text:
+                        parts.append(text)
+                        await on_text(text)
+            except Exception as e:
+                if parts:
+                    raise StreamInterruptedError(f"{type(e).__name__}: {e} (after {sum(map(len, parts))} characters)") from e
+                raise
+        return "".join(parts) or "No response text found"
+
+    return await call_endpoint(stream)
+
+
+async def cached_query(query: str) -> str:
+    """
+    Answer a query from the cache, from an identical request already in flight, or from the endpoint.
+
+    Only successful answers are cached; errors propagate to every caller sharing the request. If the
+    caller that sent the request is cancelled, the callers sharing it send it again.
+    """
+    started = time.perf_counter()
+    stats["requests"] += 1
+    key = normalise_query(query)
+
+    answer = cache.get(key)
+    if answer is not None:
+        stats["cache_hits"] += 1
+        record_latency("cache_hit_latencies_ms", started)
+        return answer
+
+    while (shared := in_flight.get(key)) is not None:
+        stats["shared_in_flight"] += 1
+        try:
+            return await asyncio.shield(shared)
+        except asyncio.CancelledError:
+            if not shared.cancelled():
+                raise
+            # The caller that sent the request was cancelled: share or send the next one
+
+    stats["cache_misses"] += 1
+    future = asyncio.get_running_loop().create_future()
+    in_flight[key] = future
+    try:
+        answer = await query_endpoint(query)
+        record_latency("endpoint_latencies_ms", started)
+        cache.put(key, answer)
+        future.set_result(answer)
+        return answer
+    except asyncio.CancelledError:
+        # Not an endpoint error: callers sharing the request send it again
+        future.cancel()
+        raise
+    except Exception as e:
+        stats["errors"] += 1
+        future.set_exception(e)
+        # Mark the exception as retrieved when no other caller was waiting on it
+        future.exception()
+        raise
+    finally:
+        del in_flight[key]
+
+
+def endpoint_status_url() -> Optional[str]:
+    """Serving endpoint REST URL (GET returns its state), or None if the endpoint URL is not a Databricks one."""
+    match = re.match(r"(https?://[^/]+)/serving-endpoints/([^/]+)/invocations/?$", DATABRICKS_ENDPOINT)
+    return f"{match.group(1)}/api/2.0/serving-endpoints/{match.group(2)}" if match else None
+
+
+async def warm_up():
+    """
+    Open the connection to the workspace (TCP and TLS) and log whether the serving endpoint is ready,
+    before the first real question arrives. Reads the endpoint's state rather than asking the model,
+    so no model call is spent on it.
+    """
+    url = endpoint_status_url()
+    if url is None:
+        return
+    started = time.perf_counter()
+    try:
+        response = await get_client().get(url)
+        response.raise_for_status()
+        state = response.json().get("state", {})
+        stats["warm_up_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        print(f"Endpoint {state.get('ready', 'state unknown')} after {stats['warm_up_ms']:.0f} ms",
+              file=sys.stderr)
+    except Exception as e:
+        print(f"Endpoint warm-up failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    warm_up_task = asyncio.create_task(warm_up()) if WARM_UP else None
+    try:
+        yield
+    finally:
+        if warm_up_task is not None:
+            warm_up_task.cancel()
+        if _client is not None:
+            await _client.aclose()
+
+
+server = FastMCP(name="lhp-chatbot", lifespan=lifespan)
+
+
+def error_message(error: Exception) -> str:
+    """Tool result for a failed endpoint call."""
+    if isinstance(error, httpx.TimeoutException):
+        return (f"Error: Request timed out. The Databricks endpoint took too long to respond "
+                f"(>{REQUEST_TIMEOUT_SECONDS:.0f}s, {MAX_RETRIES + 1} attempts).")
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"Error: HTTP {error.response.status_code} - {error.response.text}"
+    return f"Error: {type(error).__name__}: {str(error)}"
+
+
+class ChunkForwarder:
+    """Forwards streamed answer text to the MCP client as progress notifications."""
+
+    def __init__(self, ctx: Context, started: float):
+        self.ctx = ctx
+        self.started = started
+        self.pending = []
+        self.pending_chars = 0
+        self.sent_chars = 0
+        self.last_flush = started
+
+    async def __call__(self, text: str):
+        if self.sent_chars == 0 and self.pending_chars == 0:
+            record_latency("first_token_ms", self.started)
+        self.pending.append(text)
+        self.pending_chars += len(text)
+        # The first chunk goes out immediately; later ones are batched to limit notification overhead
+        if (self.sent_chars == 0 or self.pending_chars >= STREAM_FLUSH_CHARS
+                or time.perf_counter() - self.last_flush >= STREAM_FLUSH_SECONDS):
+            await self.flush()
+
+    async def flush(self):
+        if not self.pending:
+            return
+        self.sent_chars += self.pending_chars
+        chunk = "".join(self.pending)
+        self.pending = []
+        self.pending_chars = 0
+        self.last_flush = time.perf_counter()
+        await self.ctx.report_progress(self.sent_chars, None, chunk)
 
-server = FastMCP(name="lhp-chatbot")
 
 @server.tool()
 async def ask_lakehouse_plumber(query: str) -> str:
     """Ask the Lakehouse Plumber chatbot for help with flowgroups, templates, and YAML configurations."""
-    
+
     try:
-        # Set a longer timeout (60 seconds) to handle cold starts
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                DATABRICKS_ENDPOINT,
-                headers={
-                    "Authorization": f"Bearer {DATABRICKS_TOKEN}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "input": [{"role": "user", "content": query}]
-                }
-            )
-            
-            # Check for HTTP errors
-            response.raise_for_status()
-            
-            # Parse the response
-            result = response.json()
-            
-            # Extract the actual answer from Databricks response structure
-            # Response format: {"output": [{"content": [{"text": "part1"}, {"text": "part2"}, ...]}]}
-            if "output" in result and len(result["output"]) > 0:
-                content = result["output"][0].get("content", [])
-                if len(content) > 0:
-                    # Concatenate all text parts from the content array
-                    text_parts = [item.get("text", "") for item in content if item.get("type") == "output_text"]
-                    answer = "".join(text_parts)
-                    if not answer:
-                        answer = "No response text found"
-                else:
-                    answer = "No content in response"
-            else:
-                # Fallback: return formatted JSON if structure is different
-                answer = json.dumps(result, indent=2)
-            
-            return answer
-            
-    except httpx.TimeoutException:
-        return "Error: Request timed out. The Databricks endpoint took too long to respond (>60s)."
-    except httpx.HTTPStatusError as e:
-        return f"Error: HTTP {e.response.status_code} - {e.response.text}"
+        return await cached_query(query)
     except Exception as e:
-        return f"Error: {type(e).__name__}: {str(e)}"
+        return error_message(e)
+
+
+@server.tool()
+async def ask_lakehouse_plumber_streaming(query: str, ctx: Context) -> str:
+    """
+    Ask the Lakehouse Plumber chatbot, streaming the answer while it is generated. Prefer this for
+    long answers such as generated flowgroup YAML: text chunks arrive as progress notifications
+    (when the client sends a progress token) and the complete answer is the tool result.
+    """
+    started = time.perf_counter()
+    stats["requests"] += 1
+    key = normalise_query(query)
+    answer = cache.get(key)
+    if answer is not None:
+        stats["cache_hits"] += 1
+        record_latency("cache_hit_latencies_ms", started)
+        return answer
+
+    stats["cache_misses"] += 1
+    forwarder = ChunkForwarder(ctx, started)
+    try:
+        answer = await stream_endpoint(query, forwarder)
+        await forwarder.flush()
+    except Exception as e:
+        stats["errors"] += 1
+        return error_message(e)
+    stats["streamed_answers"] += 1
+    record_latency("endpoint_latencies_ms", started)
+    cache.put(key, answer)
+    return answer
+
+
+def search_repo_index(query: str, top_k: int):
+    """
+    Refresh the index, then search it. Cheap when nothing changed (only files with a new size or
+    mtime are re-read), but still a stat of every file, so it is run off the event loop.
+    """
+    with repo_index_lock:
+        repo_index.refresh()
+        return repo_index.search(query, top_k)
+
+
+@server.tool()
+async def search_lakehouse_plumber(query: str, top_k: int = 8) -> str:
+    """
+    Search this project's templates (the templates/ directory), flowgroup YAML, schema transforms,
+    metric views and docs locally, e.g. "which flowgroups use TMPL004 with surrogate keys". Returns matching file
+    excerpts with paths and line numbers. Falls back to the Lakehouse Plumber chatbot when nothing
+    in the repository matches well.
+    """
+    started = time.perf_counter()
+    results = await asyncio.to_thread(search_repo_index, query, top_k)
+    record_latency("local_search_ms", started)
+
+    if results and results[0]["coverage"] >= INDEX_MIN_COVERAGE:
+        stats["local_answers"] += 1
+        return format_results(results)
+
+    stats["local_fallbacks"] += 1
+    return await ask_lakehouse_plumber(query)
+
+
+@server.tool()
+async def lakehouse_plumber_stats() -> str:
+    """Cache hit/miss counters, retries and latency percentiles (ms) of the Lakehouse Plumber chatbot tool."""
+    lookups = stats["cache_hits"] + stats["cache_misses"]
+    return json.dumps({
+        "requests": stats["requests"],
+        "cache_hits": stats["cache_hits"],
+        "cache_misses": stats["cache_misses"],
+        "cache_hit_rate": round(stats["cache_hits"] / lookups, 3) if lookups else None,
+        "shared_in_flight": stats["shared_in_flight"],
+        "errors": stats["errors"],
+        "retries": stats["retries"],
+        "queued_now": stats["queued"],
+        "cache_entries": len(cache.entries),
+        "warm_up_ms": stats["warm_up_ms"],
+        "endpoint_latency_ms": latency_summary(stats["endpoint_latencies_ms"]),
+        "cache_hit_latency_ms": latency_summary(stats["cache_hit_latencies_ms"]),
+        "queue_wait_ms": latency_summary(stats["queue_wait_ms"]),
+        "connect_ms": latency_summary(stats["connect_ms"]),
+        "model_ms": latency_summary(stats["model_ms"]),
+        "local_answers": stats["local_answers"],
+        "local_fallbacks": stats["local_fallbacks"],
+        "local_search_ms": latency_summary(stats["local_search_ms"]),
+        "streamed_answers": stats["streamed_answers"],
+        "first_token_ms": latency_summary(stats["first_token_ms"]),
+        "index": repo_index.last_refresh,
+    }, indent=2)
+
 
 if __name__ == "__main__":
     server.run()
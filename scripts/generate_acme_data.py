@@ -0,0 +1,466 @@
+# generate_acme_data.py
+"""
+Synthetic ACME Supermarkets arrival-volume generator for load-testing the ingestion flows.
+
+Writes the folder layout the transfer notebook (Notebooks/03_Transfer_Files_To_Volume.py)
+and the raw ingestion templates expect, at any scale:
+
+    pos_transactions_by_store/YYYY-MM-DD/store_NNNNN.json   NCR POS, TMPL002 (JSON text)
+        One file per store and day: {"value": [transaction, ...]}, each transaction with
+        nested transaction_lines and payments (payment_details as a struct), timestamps
+        as ISO strings without offset. With --pos-json-layout records, one transaction
+        per line instead (TMPL002 json_layout: records).
+    product_csv/HIST_YYYY-MM-DD_product.csv                 SAP product, TMPL001 (CSV)
+    product_csv/YYYY-MM-DD_product.csv
+        A historical baseline plus weekly (Monday) full snapshots in which a share of
+        products change price or status and new products appear.
+    sales_order/YYYY-MM-DD/part-NNNNN.parquet               SFCC e-commerce, TMPL003 (Parquet)
+    sales_order_line/YYYY-MM-DD/part-NNNNN.parquet
+    warehouse_inventory_transaction/YYYY-MM-DD/part-NNNNN.parquet
+        SAP warehouse stock movements, TMPL003 (Parquet). Parquet timestamps are
+        written as timestamp_ntz (no time zone).
+
+Store, product and customer counts, date range and volumes are configurable. Product
+and store popularity follow a Zipf distribution (--product-skew, --store-skew), so a
+few products and stores dominate as in real retail data. Work is split into one task
+per feed, date and shard, run in a process pool across all cores; every task seeds its
+own random generator, so output is identical for the same arguments whatever the
+number of workers. Parquet output needs pyarrow.
+
+Usage:
+    python scripts/generate_acme_data.py --output /tmp/acme_arrival --days 30 --stores 1000
+    python scripts/generate_acme_data.py --output /tmp/acme_x10 --stores 1000 --txns-per-store-day 2000
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from typing import Dict, List, Tuple
+
+FEEDS = ("ncr_pos", "sap_product", "sap_whse_invtry_txn", "sfcc_sales_order")
+
+# Id strides keep ids unique across tasks without coordination
+TXN_ID_STRIDE = 1_000_000      # transactions per store and day
+ORDER_ID_STRIDE = 100_000_000  # orders per day
+WHSE_TXN_ID_STRIDE = 100_000_000  # warehouse inventory transactions per day
+
+PRODUCT_COLUMNS = [
+    "product_id", "sku", "upc", "name", "brand_id", "category_id", "uom_id", "open_food_facts_code",
+    "quantity", "packaging", "nutrition_data", "base_cost", "base_price", "reorder_quantity",
+    "shelf_life_days", "status", "created_at", "updated_at", "last_update_dttm",
+]
+PRODUCT_WORDS = ["Organic", "Fresh", "Classic", "Whole", "Light", "Crunchy", "Smoked", "Golden", "Family", "Mini"]
+PRODUCT_NOUNS = ["Milk", "Bread", "Apples", "Coffee", "Pasta", "Yogurt", "Cheese", "Rice", "Cereal", "Juice"]
+PACKAGING = ["Plastic", "Cardboard", "Glass", "Can", "Paper bag"]
+SHIPPING_METHODS = ["standard", "express", "click_and_collect", "same_day"]
+CARD_BRANDS = ["visa", "mastercard", "amex", "discover"]
+WAREHOUSES = 12
+# Warehouse transaction types with their relative frequency and stock direction
+WHSE_TXN_TYPES = [("receipt", 30, 1), ("shipment", 50, -1), ("adjustment", 5, -1),
+                  ("transfer_in", 6, 1), ("transfer_out", 6, -1), ("return", 3, 1)]
+
+# Per-process caches, built on first use in each worker
+_weights: Dict[Tuple[int, float], List[float]] = {}
+
+
+def zipf_cumulative(n: int, skew: float) -> List[float]:
+    """Cumulative Zipf weights for ranks 1..n (skew 0 gives a uniform distribution)."""
+    key = (n, skew)
+    if key not in _weights:
+        _weights[key] = list(accumulate(1 / (rank ** skew) for rank in range(1, n + 1)))
+    return _weights[key]
+
+
+def pick(rng: random.Random, cumulative: List[float]) -> int:
+    """Zero-based index drawn from cumulative weights."""
+    return bisect_left(cumulative, rng.random() * cumulative[-1])
+
+
+def product_price_cents(product_id: int) -> int:
+    """Base price of a product; stable across feeds so POS and e-commerce lines agree."""
+    return 99 + (product_id * 7919) % 2400
+
+
+def task_rng(seed: int, *parts) -> random.Random:
+    return random.Random(f"{seed}:{':'.join(map(str, parts))}")
+
+
+def money(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def amount(cents: int) -> float:
+    """JSON amount; cents / 100 prints with at most two decimals."""
+    return cents / 100
+
+
+def iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def store_volume(args, store_index: int) -> int:
+    """Transactions per day for a store: the Zipf share of store-days, scaled to the mean volume."""
+    cumulative = zipf_cumulative(args.stores, args.store_skew)
+    weight = cumulative[store_index] - (cumulative[store_index - 1] if store_index else 0.0)
+    return max(1, round(args.txns_per_store_day * args.stores * weight / cumulative[-1]))
+
+
+# ---------------------------------------------------------------------------------------
+# NCR POS transactions by store (JSON text)
+# ---------------------------------------------------------------------------------------
+
+def generate_pos_transactions(args, day: date, store_ids: List[int]) -> Tuple[int, int, int]:
+    """Write one JSON file per store for the day; returns (files, bytes, transactions)."""
+    directory = os.path.join(args.output, "pos_transactions_by_store", day.isoformat())
+    os.makedirs(directory, exist_ok=True)
+    products = zipf_cumulative(args.products, args.product_skew)
+    day_index = (day - args.start_date).days
+    files = size = transactions = 0
+
+    for store_id in store_ids:
+        rng = task_rng(args.seed, "ncr_pos", day, store_id)
+        opening = datetime.combine(day, datetime.min.time()) + timedelta(hours=7)
+        records = []
+        for n in range(store_volume(args, store_id - 1)):
+            txn_id = (day_index * args.stores + store_id - 1) * TXN_ID_STRIDE + n + 1
+            moment = opening + timedelta(seconds=rng.randrange(15 * 3600))
+            lines = []
+            gross = discount = 0
+            for line_number in range(1, max(1, int(rng.expovariate(1 / args.lines_per_txn))) + 1):
+                product_id = pick(rng, products) + 1
+                qty = 1 if rng.random() < 0.8 else rng.randint(2, 6)
+                unit_price = product_price_cents(product_id)
+                line_discount = unit_price * qty // 10 if rng.random() < 0.1 else 0
+                gross += unit_price * qty
+                discount += line_discount
+                lines.append({
+                    "txn_line_id": txn_id * 100 + line_number,
+                    "line_number": line_number,
+                    "product_id": product_id,
+                    "qty": qty,
+                    "unit_price": amount(unit_price),
+                    "line_discount": amount(line_discount),
+                    "line_total": amount(unit_price * qty - line_discount),
+                    "last_update_dttm": iso(moment),
+                })
+            tax = (gross - discount) * 8 // 100
+            net = gross - discount + tax
+            card = rng.random() < 0.75
+            records.append({
+                "txn_id": txn_id,
+                "store_id": store_id,
+                "terminal_id": f"T{store_id:05d}-{rng.randint(1, 8):02d}",
+                "cashier_user_id": store_id * 100 + rng.randint(1, 20),
+                "txn_datetime": iso(moment),
+                "customer_id": rng.randint(1, args.customers) if rng.random() < 0.4 else None,
+                "status": "completed",
+                "total_gross": amount(gross),
+                "total_tax": amount(tax),
+                "total_discount": amount(discount),
+                "total_net": amount(net),
+                "payment_status": "paid",
+                "last_update_dttm": iso(moment),
+                "transaction_lines": lines,
+                "payments": [{
+                    "payment_id": txn_id * 10 + 1,
+                    "method_id": rng.randint(2, 4) if card else 1,
+                    "amount": amount(net),
+                    "auth_code": f"{rng.randrange(16 ** 6):06X}" if card else None,
+                    "captured_at": iso(moment + timedelta(seconds=rng.randint(5, 90))),
+                    "payment_details": {
+                        "card_brand": rng.choice(CARD_BRANDS),
+                        "last4": f"{rng.randrange(10000):04d}",
+                        "entry_mode": rng.choice(["chip", "contactless", "swipe"]),
+                    } if card else None,
+                    "last_update_dttm": iso(moment),
+                }],
+            })
+        path = os.path.join(directory, f"store_{store_id:05d}.json")
+        with open(path, "w") as f:
+            if args.pos_json_layout == "records":
+                f.writelines(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+            else:
+                json.dump({"value": records}, f, separators=(",", ":"))
+        files += 1
+        size += os.path.getsize(path)
+        transactions += len(records)
+    return files, size, transactions
+
+
+# ---------------------------------------------------------------------------------------
+# SAP product snapshots (CSV)
+# ---------------------------------------------------------------------------------------
+
+def product_row(rng: random.Random, product_id: int, created: datetime, updated: datetime,
+                price_cents: int, status: str) -> list:
+    return [
+        product_id,
+        f"SKU-{product_id:08d}",
+        f"{(product_id * 104729) % 10 ** 12:012d}",
+        f"{PRODUCT_WORDS[product_id % len(PRODUCT_WORDS)]} {PRODUCT_NOUNS[(product_id // 10) % len(PRODUCT_NOUNS)]} {product_id}",
+        1 + product_id % 200,
+        1 + product_id % 40,
+        1 + product_id % 6,
+        f"{(product_id * 15485863) % 10 ** 13:013d}",
+        f"{rng.choice([250, 500, 750, 1000])} g",
+        rng.choice(PACKAGING),
+        json.dumps({"energy_kcal": rng.randint(20, 600), "fat_g": round(rng.uniform(0, 40), 1),
+                    "sugars_g": round(rng.uniform(0, 60), 1)}),
+        money(price_cents * 6 // 10),
+        money(price_cents),
+        rng.choice([24, 48, 96, 144]),
+        rng.choice([7, 14, 30, 180, 365]),
+        status,
+        created.strftime("%Y-%m-%d %H:%M:%S"),
+        updated.strftime("%Y-%m-%d %H:%M:%S"),
+        updated.strftime("%Y-%m-%d %H:%M:%S"),
+    ]
+
+
+def generate_product_snapshot(args, snapshot_day: date, baseline: bool) -> Tuple[int, int, int]:
+    """
+    Write one full product snapshot; returns (files, bytes, rows).
+
+    Snapshot week w contains the baseline products plus new_products_per_week * w new
+    ones; a product's price and status are those of its most recent change week, so
+    each snapshot is computed independently of the others.
+    """
+    week = 0 if baseline else (snapshot_day - args.start_date).days // 7 + 1
+    count = args.products + args.new_products_per_week * week
+    baseline_time = datetime.combine(args.start_date - timedelta(days=365), datetime.min.time())
+    snapshot_time = datetime.combine(snapshot_day, datetime.min.time())
+
+    name = f"HIST_{snapshot_day.isoformat()}_product.csv" if baseline else f"{snapshot_day.isoformat()}_product.csv"
+    path = os.path.join(args.output, "product_csv", name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(PRODUCT_COLUMNS)
+        for product_id in range(1, count + 1):
+            rng = task_rng(args.seed, "sap_product", product_id)
+            introduced = 0 if product_id <= args.products else (product_id - args.products - 1) // args.new_products_per_week + 1
+            created = baseline_time if introduced == 0 else baseline_time + timedelta(days=365 + 7 * (introduced - 1))
+            # Latest week (<= this snapshot) in which the product changed
+            changed = max((w for w in range(introduced + 1, week + 1)
+                           if task_rng(args.seed, "sap_product_change", product_id, w).random() < args.weekly_change_rate),
+                          default=None)
+            price = product_price_cents(product_id)
+            status = "active"
+            updated = created
+            if changed is not None:
+                change_rng = task_rng(args.seed, "sap_product_change", product_id, changed)
+                change_rng.random()
+                price = round(price * change_rng.uniform(0.9, 1.15))
+                status = "discontinued" if change_rng.random() < 0.05 else "active"
+                updated = snapshot_time - timedelta(days=7 * (week - changed), hours=change_rng.randint(1, 48))
+            writer.writerow(product_row(rng, product_id, created, updated, price, status))
+    return 1, os.path.getsize(path), count
+
+
+# ---------------------------------------------------------------------------------------
+# SFCC sales orders and lines (Parquet, timestamp_ntz)
+# ---------------------------------------------------------------------------------------
+
+def generate_sales_orders(args, day: date, part: int, orders: int) -> Tuple[int, int, int]:
+    """Write one sales_order and one sales_order_line Parquet part for the day; returns (files, bytes, orders)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rng = task_rng(args.seed, "sfcc_sales_order", day, part)
+    products = zipf_cumulative(args.products, args.product_skew)
+    day_index = (day - args.start_date).days
+    start = datetime.combine(day, datetime.min.time())
+    headers = {name: [] for name in (
+        "order_id", "order_number", "customer_id", "order_date", "delivery_address_id", "shipping_method",
+        "payment_method_id", "payment_details", "currency", "subtotal", "tax_amount", "shipping_amount",
+        "discount_amount", "total_amount", "fulfillment_status", "warehouse_id", "estimated_delivery_date",
+        "actual_delivery_date", "tracking_number", "carrier_id", "status", "created_at", "updated_at",
+        "last_update_dttm")}
+    lines = {name: [] for name in (
+        "line_id", "order_id", "line_number", "product_id", "qty", "unit_price", "discount_amount",
+        "tax_amount", "line_total", "status", "allocated_qty", "shipped_qty", "cancelled_qty", "last_update_dttm")}
+
+    for n in range(orders):
+        order_id = day_index * ORDER_ID_STRIDE + part * args.rows_per_part + n + 1
+        ordered = start + timedelta(seconds=rng.randrange(86400))
+        customer_id = rng.randint(1, args.customers)
+        subtotal = 0
+        for line_number in range(1, max(1, int(rng.expovariate(1 / args.lines_per_order))) + 1):
+            product_id = pick(rng, products) + 1
+            qty = rng.randint(1, 4)
+            unit_price = product_price_cents(product_id)
+            line_tax = unit_price * qty * 8 // 100
+            subtotal += unit_price * qty
+            values = (order_id * 100 + line_number, order_id, line_number, product_id, qty, money(unit_price),
+                      money(0), money(line_tax), money(unit_price * qty + line_tax), "allocated", qty, 0, 0, ordered)
+            for name, value in zip(lines, values):
+                lines[name].append(value)
+        tax = subtotal * 8 // 100
+        shipping = 0 if subtotal > 5000 else 499
+        estimated = (ordered + timedelta(days=rng.randint(1, 4))).date()
+        values = (order_id, f"SO-{order_id:012d}", customer_id, ordered, customer_id * 2 + rng.randint(0, 1),
+                  rng.choice(SHIPPING_METHODS), rng.randint(2, 5),
+                  json.dumps({"card_brand": rng.choice(CARD_BRANDS), "last4": f"{rng.randrange(10000):04d}"}),
+                  "USD", money(subtotal), money(tax), money(shipping), money(0), money(subtotal + tax + shipping),
+                  "pending", 1 + customer_id % WAREHOUSES, estimated, None, None, None, "open", ordered, ordered, ordered)
+        for name, value in zip(headers, values):
+            headers[name].append(value)
+
+    # Naive pa.timestamp columns are written with isAdjustedToUTC=false, which Spark reads as timestamp_ntz
+    money_type = pa.decimal128(10, 2)
+    header_types = {"order_date": pa.timestamp("us"), "created_at": pa.timestamp("us"),
+                    "updated_at": pa.timestamp("us"), "last_update_dttm": pa.timestamp("us"),
+                    "estimated_delivery_date": pa.date32(), "actual_delivery_date": pa.date32(),
+                    "tracking_number": pa.string(), "carrier_id": pa.int64(),
+                    **{name: money_type for name in ("subtotal", "tax_amount", "shipping_amount",
+                                                     "discount_amount", "total_amount")}}
+    line_types = {"last_update_dttm": pa.timestamp("us"),
+                  **{name: money_type for name in ("unit_price", "discount_amount", "tax_amount", "line_total")}}
+
+    files = size = 0
+    for folder, columns, types in (("sales_order", headers, header_types), ("sales_order_line", lines, line_types)):
+        table = pa.table({name: pa.array(values, type=types.get(name)) for name, values in columns.items()})
+        path = os.path.join(args.output, folder, day.isoformat(), f"part-{part:05d}.parquet")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(table, path)
+        files += 1
+        size += os.path.getsize(path)
+    return files, size, orders
+
+
+# ---------------------------------------------------------------------------------------
+# SAP warehouse inventory transactions (Parquet, timestamp_ntz)
+# ---------------------------------------------------------------------------------------
+
+def generate_warehouse_transactions(args, day: date, part: int, transactions: int) -> Tuple[int, int, int]:
+    """Write one warehouse_inventory_transaction Parquet part for the day; returns (files, bytes, transactions)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rng = task_rng(args.seed, "sap_whse_invtry_txn", day, part)
+    products = zipf_cumulative(args.products, args.product_skew)
+    txn_types = list(accumulate(weight for _, weight, _ in WHSE_TXN_TYPES))
+    day_index = (day - args.start_date).days
+    start = datetime.combine(day, datetime.min.time())
+    columns = {name: [] for name in (
+        "wh_inv_txn_id", "warehouse_id", "product_id", "txn_type", "qty", "source_ref", "created_at", "user_id",
+        "last_update_dttm")}
+
+    for n in range(transactions):
+        txn_id = day_index * WHSE_TXN_ID_STRIDE + part * args.rows_per_part + n + 1
+        created = start + timedelta(seconds=rng.randrange(86400))
+        txn_type, _, direction = WHSE_TXN_TYPES[pick(rng, txn_types)]
+        qty = rng.randint(1, 24) * (12 if txn_type in ("receipt", "transfer_in", "transfer_out") else 1)
+        source_ref = {"receipt": f"PO-{rng.randrange(10 ** 9):09d}", "shipment": f"SO-{rng.randrange(10 ** 12):012d}",
+                      "transfer_in": f"TO-{rng.randrange(10 ** 8):08d}",
+                      "transfer_out": f"TO-{rng.randrange(10 ** 8):08d}"}.get(txn_type)
+        values = (txn_id, rng.randint(1, WAREHOUSES), pick(rng, products) + 1, txn_type, qty * direction, source_ref,
+                  created, rng.randint(1, 50) if txn_type != "shipment" else None, created)
+        for name, value in zip(columns, values):
+            columns[name].append(value)
+
+    types = {"source_ref": pa.string(), "user_id": pa.int64(),
+             "created_at": pa.timestamp("us"), "last_update_dttm": pa.timestamp("us")}
+    table = pa.table({name: pa.array(values, type=types.get(name)) for name, values in columns.items()})
+    path = os.path.join(args.output, "warehouse_inventory_transaction", day.isoformat(), f"part-{part:05d}.parquet")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path)
+    return 1, os.path.getsize(path), transactions
+
+
+# ---------------------------------------------------------------------------------------
+# Task planning
+# ---------------------------------------------------------------------------------------
+
+def plan_tasks(args) -> List[Tuple]:
+    """(feed, function name, call arguments) for every unit of work."""
+    days = [args.start_date + timedelta(days=offset) for offset in range(args.days)]
+    tasks = []
+    if "ncr_pos" in args.feeds:
+        store_ids = list(range(1, args.stores + 1))
+        for day in days:
+            for first in range(0, len(store_ids), args.stores_per_task):
+                tasks.append(("ncr_pos", "generate_pos_transactions", (day, store_ids[first:first + args.stores_per_task])))
+    if "sap_product" in args.feeds:
+        tasks.append(("sap_product", "generate_product_snapshot", (args.start_date, True)))
+        for day in days:
+            if day.weekday() == 0:
+                tasks.append(("sap_product", "generate_product_snapshot", (day, False)))
+    if "sap_whse_invtry_txn" in args.feeds:
+        for day in days:
+            for part, first in enumerate(range(0, args.whse_txns_per_day, args.rows_per_part)):
+                tasks.append(("sap_whse_invtry_txn", "generate_warehouse_transactions",
+                              (day, part, min(args.rows_per_part, args.whse_txns_per_day - first))))
+    if "sfcc_sales_order" in args.feeds:
+        for day in days:
+            for part, first in enumerate(range(0, args.orders_per_day, args.rows_per_part)):
+                tasks.append(("sfcc_sales_order", "generate_sales_orders",
+                              (day, part, min(args.rows_per_part, args.orders_per_day - first))))
+    return tasks
+
+
+def run_task(args, function_name: str, call_args: Tuple) -> Tuple[int, int, int]:
+    return globals()[function_name](args, *call_args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", required=True, help="Arrival root directory (a folder per feed is created)")
+    parser.add_argument("--feeds", nargs="+", choices=FEEDS, default=list(FEEDS))
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--stores", type=int, default=100)
+    parser.add_argument("--products", type=int, default=5000, help="Products in the baseline catalogue")
+    parser.add_argument("--customers", type=int, default=100000)
+    parser.add_argument("--txns-per-store-day", type=int, default=200, help="Mean POS transactions per store and day")
+    parser.add_argument("--pos-json-layout", choices=["document", "records"], default="document",
+                        help="POS files as one {\"value\": [...]} document, or one transaction per line")
+    parser.add_argument("--lines-per-txn", type=float, default=4.0, help="Mean lines per POS transaction")
+    parser.add_argument("--orders-per-day", type=int, default=5000, help="SFCC sales orders per day")
+    parser.add_argument("--lines-per-order", type=float, default=5.0)
+    parser.add_argument("--whse-txns-per-day", type=int, default=20000,
+                        help="SAP warehouse inventory transactions per day")
+    parser.add_argument("--rows-per-part", type=int, default=50000,
+                        help="Sales orders or warehouse transactions per Parquet part file")
+    parser.add_argument("--new-products-per-week", type=int, default=20)
+    parser.add_argument("--weekly-change-rate", type=float, default=0.02, help="Share of products changed per week")
+    parser.add_argument("--product-skew", type=float, default=1.1, help="Zipf exponent of product popularity")
+    parser.add_argument("--store-skew", type=float, default=0.5, help="Zipf exponent of store volume")
+    parser.add_argument("--stores-per-task", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tasks = plan_tasks(args)
+    totals = {feed: [0, 0, 0] for feed in args.feeds}
+    start = time.perf_counter()
+    print(f"Generating {len(tasks):,} tasks with {args.workers} workers into {args.output}")
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(run_task, args, function_name, call_args): feed
+                   for feed, function_name, call_args in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            for i, value in enumerate(future.result()):
+                totals[futures[future]][i] += value
+            if done % max(1, len(tasks) // 10) == 0:
+                written = sum(total[1] for total in totals.values())
+                print(f"  {done:,}/{len(tasks):,} tasks, {written / 1024 ** 3:,.2f} GB "
+                      f"({written / 1024 ** 2 / (time.perf_counter() - start):,.0f} MB/s)")
+
+    seconds = time.perf_counter() - start
+    print(f"\n{'feed':>18} {'files':>9} {'GB':>9} {'records':>14}")
+    for feed, (files, size, records) in totals.items():
+        print(f"{feed:>18} {files:>9,} {size / 1024 ** 3:>9.3f} {records:>14,}")
+    written = sum(total[1] for total in totals.values())
+    print(f"Done in {seconds:.1f}s ({written / 1024 ** 2 / seconds:,.0f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
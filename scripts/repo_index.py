@@ -0,0 +1,242 @@
+# repo_index.py
+"""
+Local BM25 search over the Lakehouse Plumber project files.
+
+Indexes the templates, flowgroup YAML, schema transforms, metric views and docs of the
+repository so the lhp-chatbot MCP server (scripts/db_mcp.py) can answer questions about
+them without a round trip to the serving endpoint. YAML files are indexed whole (or in
+overlapping line windows when long), Markdown files per heading section.
+
+The index is persisted as JSON and refreshed incrementally: a file is re-read only when
+its size or mtime changed, and re-chunked only when its content hash changed too.
+
+Usage:
+    python scripts/repo_index.py "which flowgroups use TMPL004 with surrogate keys"
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(os.getenv('LHP_REPO_ROOT', Path(__file__).resolve().parents[1]))
+INDEX_FILE = os.getenv('LHP_INDEX_FILE', str(REPO_ROOT / ".lhp_index.json"))
+
+# (directory, glob) pairs relative to the repository root
+SOURCES = [
+    ("templates", "**/*.yaml"),
+    ("pipelines", "**/*.yaml"),
+    ("schema_transforms", "**/*.yaml"),
+    ("metric_views", "**/*.yaml"),
+    ("metric_views", "**/*.md"),
+    ("docs", "*.md"),
+]
+INDEX_VERSION = 1
+YAML_WINDOW_LINES = 60
+YAML_WINDOW_OVERLAP = 10
+MAX_SECTION_LINES = 80
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i", "in",
+    "is", "it", "of", "on", "or", "that", "the", "this", "to", "use", "used", "uses", "what", "which",
+    "with", "where", "who", "why", "me", "my", "we", "our", "you", "all", "any", "there", "have", "has",
+}
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_]+")
+
+
+def stem(token: str) -> str:
+    """Light plural stemming, enough for 'keys' to match 'key' and 'flowgroups' 'flowgroup'."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; snake_case identifiers yield the whole identifier and each part."""
+    terms = []
+    for word in TOKEN_PATTERN.findall(text.lower()):
+        parts = [part for part in word.split("_") if part]
+        if len(parts) > 1:
+            terms.append(word)
+        for part in parts:
+            if part not in STOPWORDS:
+                terms.append(stem(part))
+    return terms
+
+
+def chunk_file(relative_path: str, text: str) -> List[Dict]:
+    """Split a file into searchable chunks of {start, end, title, text} (1-based inclusive lines)."""
+    lines = text.splitlines()
+    if not lines:
+        return []
+    spans = []
+    if relative_path.endswith(".md"):
+        starts = [i for i, line in enumerate(lines) if line.startswith("#")] or [0]
+        if starts[0] != 0:
+            starts.insert(0, 0)
+        for start, end in zip(starts, starts[1:] + [len(lines)]):
+            for window_start in range(start, end, MAX_SECTION_LINES):
+                spans.append((window_start, min(end, window_start + MAX_SECTION_LINES), lines[start].lstrip("# ")))
+    elif len(lines) <= 2 * YAML_WINDOW_LINES:
+        spans.append((0, len(lines), relative_path))
+    else:
+        step = YAML_WINDOW_LINES - YAML_WINDOW_OVERLAP
+        for window_start in range(0, len(lines) - YAML_WINDOW_OVERLAP, step):
+            spans.append((window_start, min(len(lines), window_start + YAML_WINDOW_LINES), relative_path))
+    return [
+        {"start": start + 1, "end": end, "title": title, "text": "\n".join(lines[start:end])}
+        for start, end, title in spans
+    ]
+
+
+class RepoIndex:
+    """Inverted index with BM25 ranking over the project files, refreshed by mtime and content hash."""
+
+    def __init__(self, root: Path = REPO_ROOT, index_file: Optional[str] = INDEX_FILE):
+        self.root = Path(root)
+        self.index_file = index_file
+        self.files: Dict[str, Dict] = {}  # relative path -> {size, mtime, sha1, chunks}
+        self.postings: Dict[str, Dict[int, int]] = {}  # term -> {chunk id: term frequency}
+        self.chunks: List[Dict] = []  # chunk id -> {path, start, end, title, text, length}
+        self.average_length = 0.0
+        self.last_refresh = {}
+        if index_file and os.path.exists(index_file):
+            try:
+                with open(index_file) as f:
+                    saved = json.load(f)
+                if saved.get("version") == INDEX_VERSION:
+                    self.files = saved["files"]
+            except (OSError, ValueError) as e:
+                print(f"Rebuilding unreadable index {index_file}: {e}", file=sys.stderr)
+        self._build_postings()
+
+    def source_files(self) -> List[Path]:
+        paths = set()
+        for directory, pattern in SOURCES:
+            paths.update(path for path in (self.root / directory).glob(pattern) if path.is_file())
+        return sorted(paths)
+
+    def refresh(self) -> Dict:
+        """Re-index new and changed files, drop deleted ones; returns counts and seconds."""
+        start = time.perf_counter()
+        seen = set()
+        changed = unchanged = 0
+        for path in self.source_files():
+            relative = path.relative_to(self.root).as_posix()
+            seen.add(relative)
+            stat = path.stat()
+            entry = self.files.get(relative)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                unchanged += 1
+                continue
+            data = path.read_bytes()
+            sha1 = hashlib.sha1(data).hexdigest()
+            if entry and entry["sha1"] == sha1:
+                # Touched but not modified (checkout, copy): keep the chunks
+                entry.update(size=stat.st_size, mtime=stat.st_mtime)
+                unchanged += 1
+                continue
+            self.files[relative] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "sha1": sha1,
+                "chunks": chunk_file(relative, data.decode("utf-8", errors="replace")),
+            }
+            changed += 1
+
+        removed = [relative for relative in self.files if relative not in seen]
+        for relative in removed:
+            del self.files[relative]
+
+        if changed or removed:
+            self._build_postings()
+            self._save()
+        self.last_refresh = {
+            "files": len(self.files), "changed": changed, "unchanged": unchanged, "removed": len(removed),
+            "seconds": round(time.perf_counter() - start, 4),
+        }
+        return self.last_refresh
+
+    def _build_postings(self):
+        self.postings = defaultdict(dict)
+        self.chunks = []
+        for relative in sorted(self.files):
+            for chunk in self.files[relative]["chunks"]:
+                # The path is searchable too, so 'bronze_sap_cat_TMPL004' matches its flowgroup file
+                terms = Counter(tokenize(relative) + tokenize(chunk["text"]))
+                chunk_id = len(self.chunks)
+                self.chunks.append({**chunk, "path": relative, "length": sum(terms.values())})
+                for term, frequency in terms.items():
+                    self.postings[term][chunk_id] = frequency
+        self.average_length = sum(chunk["length"] for chunk in self.chunks) / max(len(self.chunks), 1)
+
+    def _save(self):
+        if not self.index_file:
+            return
+        temp_path = f"{self.index_file}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f)
+        os.replace(temp_path, self.index_file)
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict]:
+        """
+        Best matching chunks for a query, by BM25 score.
+
+        Each result has path, start, end, title, text, score and coverage - the share of
+        distinct query terms found in the chunk, a scale-free measure of match quality.
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.chunks:
+            return []
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, int] = defaultdict(int)
+        total = len(self.chunks)
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings.items():
+                length_norm = 1 - B + B * self.chunks[chunk_id]["length"] / self.average_length
+                scores[chunk_id] += idf * frequency * (K1 + 1) / (frequency + K1 * length_norm)
+                matched[chunk_id] += 1
+        ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return [
+            {**{key: self.chunks[chunk_id][key] for key in ("path", "start", "end", "title", "text")},
+             "score": round(scores[chunk_id], 3), "coverage": round(matched[chunk_id] / len(terms), 2)}
+            for chunk_id in ranked
+        ]
+
+
+def format_results(results: List[Dict], max_lines: int = 40) -> str:
+    """Render search results as Markdown: one heading with the file and line range, then the excerpt."""
+    sections = []
+    for result in results:
+        lines = result["text"].splitlines()
+        excerpt = "\n".join(lines[:max_lines]) + ("\n..." if len(lines) > max_lines else "")
+        fence = "yaml" if result["path"].endswith(".yaml") else ""
+        sections.append(f"### {result['path']}:{result['start']}-{result['end']} (score {result['score']})\n"
+                        f"```{fence}\n{excerpt}\n```")
+    return "\n\n".join(sections)
+
+
+if __name__ == "__main__":
+    index = RepoIndex()
+    print(index.refresh())
+    started = time.perf_counter()
+    found = index.search(" ".join(sys.argv[1:]) or "TMPL004 surrogate key")
+    print(f"Search: {(time.perf_counter() - started) * 1000:.1f} ms")
+    for hit in found:
+        print(f"{hit['score']:>8.2f} {hit['coverage']:>5.2f}  {hit['path']}:{hit['start']}-{hit['end']}  {hit['title']}")
@@ -0,0 +1,6 @@
+-- One row per POS transaction from raw_ncr_pos_txn_by_store loaded with
+-- TMPL002 json_layout: records (one transaction per row, fields as top-level columns).
+-- Nothing to explode; selects the same columns as the whole_text variant.
+-- _rescued_data stays in the raw table.
+SELECT * EXCEPT (_rescued_data, _processing_timestamp)
+FROM stream(vw_pos_transaction_by_store)
@@ -0,0 +1,6 @@
+-- One row per POS transaction from raw_ncr_pos_txn_by_store loaded with
+-- TMPL002 json_layout: whole_text (one parsed {"value": [...]} document per file in jsonCol).
+SELECT jsoncol_values.*,
+_source_file_path
+FROM stream(vw_pos_transaction_by_store)
+LATERAL VIEW explode(jsonCol.value) AS jsonCol_values
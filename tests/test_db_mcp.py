@@ -0,0 +1,169 @@
+# test_db_mcp.py
+"""
+Tests of the lhp-chatbot MCP server (scripts/db_mcp.py) against the StubEndpoint of
+scripts/benchmark_db_mcp.py: retries, the concurrency bound, shared in-flight requests
+and the endpoint warm-up.
+
+Usage:
+    python -m pytest tests/test_db_mcp.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+os.environ.pop("LHP_CACHE_FILE", None)
+
+import db_mcp  # noqa: E402
+from benchmark_db_mcp import reset, start_stub  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = start_stub(cold_start=0, cold_start_delay=0, rate_limit=100, model_ms=0)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def endpoint(stub, monkeypatch):
+    """db_mcp pointed at the stub, with fresh counters, cache and semaphore, 4 slots and 4 retries."""
+    monkeypatch.setattr(db_mcp, "DATABRICKS_ENDPOINT", f"http://127.0.0.1:{stub.server_address[1]}/invocations")
+    monkeypatch.setattr(db_mcp, "RETRY_BASE_SECONDS", 0.01)
+    stub.model_seconds = 0
+    stub.requests = stub.state_requests = stub.max_active = 0
+    stub.fail_statuses = []
+    stub.retry_after = None
+    reset(db_mcp, stub, max_concurrency=4, max_retries=4)
+    yield db_mcp
+    monkeypatch.setattr(db_mcp, "MAX_CONCURRENCY", int(os.getenv('LHP_MAX_CONCURRENCY', '4')))
+    monkeypatch.setattr(db_mcp, "MAX_RETRIES", int(os.getenv('LHP_MAX_RETRIES', '4')))
+
+
+def run(coroutine):
+    """Run a coroutine on a fresh event loop, closing the module's client (bound to that loop) afterwards."""
+
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            if db_mcp._client is not None:
+                await db_mcp._client.aclose()
+                db_mcp._client = None
+            db_mcp._semaphore = None
+
+    return asyncio.run(main())
+
+
+def test_retries_429_and_503_honouring_retry_after(endpoint, stub):
+    stub.fail_statuses = [429, 503]
+    stub.retry_after = "0.25"
+
+    started = time.perf_counter()
+    answer = run(endpoint.cached_query("Which template loads SAP snapshots?"))
+    elapsed = time.perf_counter() - started
+
+    assert answer == "Answer to: Which template loads SAP snapshots?"
+    assert stub.requests == 3
+    assert endpoint.stats["retries"] == 2
+    # Backoff alone would wait at most 0.01 s and 0.02 s
+    assert elapsed >= 0.5
+
+
+def test_raises_after_max_retries(endpoint, stub):
+    reset(endpoint, stub, max_concurrency=4, max_retries=2)
+    stub.fail_statuses = [503] * 5
+    stub.retry_after = "0"
+
+    with pytest.raises(httpx.HTTPStatusError) as raised:
+        run(endpoint.cached_query("Is the endpoint up?"))
+
+    assert raised.value.response.status_code == 503
+    assert stub.requests == 3
+    assert endpoint.stats["retries"] == 2
+    assert endpoint.stats["errors"] == 1
+    assert not endpoint.cache.entries
+    assert not endpoint.in_flight
+
+
+def test_in_flight_calls_never_exceed_max_concurrency(endpoint, stub):
+    reset(endpoint, stub, max_concurrency=2, max_retries=0)
+    stub.model_seconds = 0.05
+
+    async def burst():
+        return await asyncio.gather(*(endpoint.cached_query(f"Question {i}") for i in range(10)))
+
+    answers = run(burst())
+
+    assert answers == [f"Answer to: Question {i}" for i in range(10)]
+    assert stub.requests == 10
+    assert stub.max_active == 2
+    assert endpoint.stats["queued"] == 0
+
+
+def test_cancelled_sender_hands_shared_request_to_waiting_caller(endpoint, stub):
+    stub.model_seconds = 0.3
+
+    async def scenario():
+        sender = asyncio.create_task(endpoint.cached_query("Shared question"))
+        await asyncio.sleep(0.1)
+        sharer = asyncio.create_task(endpoint.cached_query("shared   QUESTION"))
+        await asyncio.sleep(0.05)
+        sender.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await sender
+        return await sharer
+
+    answer = run(scenario())
+
+    assert answer == "Answer to: shared   QUESTION"
+    # The waiting caller shared the first request once, then sent its own
+    assert endpoint.stats["shared_in_flight"] == 1
+    assert endpoint.stats["cache_misses"] == 2
+    assert stub.requests == 2
+    assert not endpoint.in_flight
+
+
+def test_cancelled_sharer_leaves_request_running(endpoint, stub):
+    stub.model_seconds = 0.2
+
+    async def scenario():
+        sender = asyncio.create_task(endpoint.cached_query("Shared question"))
+        await asyncio.sleep(0.05)
+        sharer = asyncio.create_task(endpoint.cached_query("Shared question"))
+        await asyncio.sleep(0.05)
+        sharer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await sharer
+        return await sender
+
+    answer = run(scenario())
+
+    assert answer == "Answer to: Shared question"
+    assert stub.requests == 1
+    assert endpoint.cache.get("shared question") == answer
+
+
+def test_warm_up_reads_endpoint_state_without_calling_the_model(endpoint, stub, monkeypatch, capsys):
+    monkeypatch.setattr(endpoint, "DATABRICKS_ENDPOINT",
+                        f"http://127.0.0.1:{stub.server_address[1]}/serving-endpoints/lhp-test/invocations")
+
+    run(endpoint.warm_up())
+
+    assert stub.state_requests == 1
+    assert stub.requests == 0
+    assert endpoint.stats["warm_up_ms"] is not None
+    assert "Endpoint READY" in capsys.readouterr().err
+
+
+def test_warm_up_skips_non_databricks_endpoint(endpoint, stub):
+    run(endpoint.warm_up())
+
+    assert stub.state_requests == 0
+    assert endpoint.stats["warm_up_ms"] is None